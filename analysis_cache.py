@@ -0,0 +1,230 @@
+import json
+import math
+import threading
+import time
+from typing import List, Dict, Any, Callable, Optional
+from config import Config
+from config_reload import on_config_change
+from job_store import connect, immediate_transaction, serialize_product_data, deserialize_product_data
+
+REQUEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS product_requests (
+    product_id TEXT PRIMARY KEY,
+    score REAL NOT NULL,
+    total INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+ANALYSIS_CONFIG_KEYS = (
+    "MAX_SUPPLIERS_PER_PRODUCT",
+    "SUPPLIER_SCORE_WEIGHTS",
+    "DESTINATION_COUNTRY",
+    "VOLUMETRIC_DIVISOR",
+    "DEFAULT_DELIVERY_PERCENT",
+    "DEFAULT_STORAGE_PERCENT",
+    "DEFAULT_ADDITIONAL_COSTS_PERCENT",
+    "USD_TO_RUB_EXCHANGE_RATE",
+    "FX_RATES_FILE",
+    "GROQ_MODELS",
+    "GROQ_TEMPERATURE",
+    "GROQ_TOKEN_BUDGETS"
+)
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    product_id TEXT PRIMARY KEY,
+    product_data TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class AnalysisCache:
+    def __init__(self, ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds or Config.ANALYSIS_CACHE_TTL_SECONDS
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(product_id)
+        if entry is None or entry["expires_at"] <= self.clock():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, product_id: str, product_data: Dict[str, Any], analysis: Dict[str, Any]):
+        now = self.clock()
+        self._entries[product_id] = {
+            "product_data": product_data,
+            "analysis": analysis,
+            "created_at": now,
+            "expires_at": now + self.ttl_seconds
+        }
+
+    def needs_refresh(self, product_id: str, margin_seconds: float) -> bool:
+        entry = self._entries.get(product_id)
+        return entry is None or entry["expires_at"] - self.clock() <= margin_seconds
+
+    def evict_expired(self) -> int:
+        now = self.clock()
+        expired = [product_id for product_id, entry in self._entries.items() if entry["expires_at"] <= now]
+        for product_id in expired:
+            del self._entries[product_id]
+        return len(expired)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SharedAnalysisCache(AnalysisCache):
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        super().__init__(ttl_seconds, clock)
+        self.path = path or Config.STATE_DB_PATH
+        self._connection = connect(self.path)
+        self._lock = threading.Lock()
+        self._connection.executescript(CACHE_SCHEMA)
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM analysis_cache WHERE product_id = ? AND expires_at > ?",
+                (product_id, self.clock())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            "product_data": deserialize_product_data(json.loads(row["product_data"])),
+            "analysis": json.loads(row["analysis"]),
+            "created_at": row["created_at"],
+            "expires_at": row["expires_at"]
+        }
+
+    def put(self, product_id: str, product_data: Dict[str, Any], analysis: Dict[str, Any]):
+        now = self.clock()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO analysis_cache (product_id, product_data, analysis, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    product_id,
+                    json.dumps(serialize_product_data(product_data), ensure_ascii=False),
+                    json.dumps(analysis, ensure_ascii=False),
+                    now,
+                    now + self.ttl_seconds
+                )
+            )
+
+    def needs_refresh(self, product_id: str, margin_seconds: float) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT expires_at FROM analysis_cache WHERE product_id = ?", (product_id,)
+            ).fetchone()
+        return row is None or row["expires_at"] - self.clock() <= margin_seconds
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (self.clock(),))
+        return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM analysis_cache")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class RequestTracker:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        half_life_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path or Config.STATE_DB_PATH
+        self.half_life_seconds = half_life_seconds or Config.REQUEST_HALF_LIFE_SECONDS
+        self.clock = clock
+        self._connection = connect(self.path)
+        self._lock = threading.Lock()
+        self._connection.executescript(REQUEST_SCHEMA)
+
+    def _decay(self, score: float, updated_at: float, now: float) -> float:
+        return score * math.pow(0.5, max(0.0, now - updated_at) / self.half_life_seconds)
+
+    def record(self, product_ids: List[str]):
+        now = self.clock()
+        with self._lock, immediate_transaction(self._connection):
+            for product_id in dict.fromkeys(product_ids):
+                row = self._connection.execute(
+                    "SELECT score, updated_at FROM product_requests WHERE product_id = ?", (product_id,)
+                ).fetchone()
+                score = self._decay(row["score"], row["updated_at"], now) if row else 0.0
+                self._connection.execute(
+                    "INSERT INTO product_requests (product_id, score, total, updated_at) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT (product_id) DO UPDATE SET "
+                    "score = excluded.score, total = total + 1, updated_at = excluded.updated_at",
+                    (product_id, score + 1.0, now)
+                )
+
+    def scores(self) -> Dict[str, float]:
+        now = self.clock()
+        with self._lock:
+            rows = self._connection.execute("SELECT product_id, score, updated_at FROM product_requests").fetchall()
+        return {row["product_id"]: self._decay(row["score"], row["updated_at"], now) for row in rows}
+
+    def top(self, n: int) -> List[str]:
+        scores = self.scores()
+        return sorted(scores, key=lambda product_id: (-scores[product_id], product_id))[:n]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+_request_tracker: Optional[RequestTracker] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = SharedAnalysisCache() if Config.BOT_MODE == "webhook" else AnalysisCache()
+    return _analysis_cache
+
+
+def get_request_tracker() -> RequestTracker:
+    global _request_tracker
+    if _request_tracker is None:
+        _request_tracker = RequestTracker()
+    return _request_tracker
+
+
+@on_config_change("ANALYSIS_CACHE_TTL_SECONDS", *ANALYSIS_CONFIG_KEYS)
+def _reload_analysis_cache(changed):
+    if _analysis_cache is None:
+        return
+    _analysis_cache.ttl_seconds = Config.ANALYSIS_CACHE_TTL_SECONDS
+    if changed & set(ANALYSIS_CONFIG_KEYS):
+        _analysis_cache.clear()
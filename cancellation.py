@@ -0,0 +1,122 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+
+REASON_SUPERSEDED = "superseded"
+REASON_SHUTDOWN = "shutdown"
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class CancelScope:
+    def __init__(self, timeout: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.deadline = clock() + timeout if timeout else None
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and self.clock() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock())
+
+    def cancel(self, reason: str = REASON_SUPERSEDED):
+        if self.reason is None:
+            self.reason = reason
+
+    def check(self):
+        if self.reason is not None:
+            raise SearchCancelled(self.reason)
+
+
+_current_scope: ContextVar[Optional[CancelScope]] = ContextVar("cancel_scope", default=None)
+
+
+def current_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
+
+
+def check_cancelled():
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.check()
+
+
+@contextmanager
+def cancel_scope(scope: CancelScope):
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+class ActiveSearches:
+    def __init__(self):
+        self._searches: Dict[int, Tuple[asyncio.Task, CancelScope]] = {}
+
+    def start(
+        self,
+        chat_id: int,
+        run: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> asyncio.Task:
+        self.cancel(chat_id)
+        scope = CancelScope(timeout)
+
+        async def run_in_scope():
+            with cancel_scope(scope):
+                return await run()
+
+        task = asyncio.create_task(run_in_scope())
+        entry = (task, scope)
+        self._searches[chat_id] = entry
+
+        def forget(_):
+            if self._searches.get(chat_id) is entry:
+                del self._searches[chat_id]
+
+        task.add_done_callback(forget)
+        return task
+
+    def cancel(self, chat_id: int, reason: str = REASON_SUPERSEDED) -> bool:
+        entry = self._searches.pop(chat_id, None)
+        if entry is None:
+            return False
+        task, scope = entry
+        scope.cancel(reason)
+        task.cancel()
+        return True
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        tasks = [task for task, _ in self._searches.values()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            return not pending
+        return True
+
+    async def cancel_all(self, reason: str = REASON_SHUTDOWN):
+        tasks = [task for task, _ in self._searches.values()]
+        for chat_id in list(self._searches):
+            self.cancel(chat_id, reason)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._searches
+
+    def __len__(self) -> int:
+        return len(self._searches)
+
+
+active_searches = ActiveSearches()
@@ -0,0 +1,90 @@
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Deque, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        failure_ratio: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.window = window or Config.CIRCUIT_WINDOW
+        self.min_calls = min_calls or Config.CIRCUIT_MIN_CALLS
+        self.failure_ratio = failure_ratio or Config.CIRCUIT_FAILURE_RATIO
+        self.slow_call_seconds = slow_call_seconds or Config.CIRCUIT_SLOW_CALL_SECONDS
+        self.open_seconds = open_seconds or Config.CIRCUIT_OPEN_SECONDS
+        self.clock = clock
+        self.state = STATE_CLOSED
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.rejected = 0
+        self._outcomes: Deque[bool] = deque(maxlen=self.window)
+
+    def allow(self) -> bool:
+        if self.state == STATE_CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def ready_to_probe(self) -> bool:
+        if self.state != STATE_OPEN or self.clock() - self.opened_at < self.open_seconds:
+            return False
+        self.state = STATE_HALF_OPEN
+        logger.info("Circuit %s half-open, probing", self.name)
+        return True
+
+    def record(self, success: bool, latency: float):
+        if self.state != STATE_CLOSED:
+            return
+        self._outcomes.append(success and latency < self.slow_call_seconds)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self.trip()
+
+    def probe_result(self, success: bool):
+        if success:
+            self.state = STATE_CLOSED
+            self.opened_at = None
+            self._outcomes.clear()
+            logger.info("Circuit %s closed", self.name)
+        else:
+            self.trip()
+
+    def trip(self):
+        self.state = STATE_OPEN
+        self.opened_at = self.clock()
+        self.trips += 1
+        self._outcomes.clear()
+        logger.warning("Circuit %s opened for %.0fs", self.name, self.open_seconds)
+
+    def configure(self, window: int, min_calls: int, failure_ratio: float, slow_call_seconds: float, open_seconds: float):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._outcomes = deque(self._outcomes, maxlen=window)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False)
+        }
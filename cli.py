@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+from config import Config
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Пакетный анализ поставщиков без Telegram")
+    parser.add_argument("products", nargs="*", help="Названия товаров (можно через запятую)")
+    parser.add_argument("--file", help="Файл с названиями товаров, по одному на строку")
+    parser.add_argument("--currency", help="Валюта итоговых цен в отчете")
+    parser.add_argument("--no-ai", action="store_true", help="Не запрашивать AI анализ")
+    return parser.parse_args(argv)
+
+
+def read_product_names(args: argparse.Namespace) -> List[str]:
+    names = [name for value in args.products for name in value.split(",")]
+    if args.file:
+        with open(args.file, encoding="utf-8") as names_file:
+            names.extend(names_file.read().splitlines())
+    return [name.strip() for name in names if name.strip()]
+
+
+async def run_batch(product_names: List[str], currency: Optional[str] = None, analyze: bool = True) -> dict:
+    from config_reload import pinned_snapshot
+    from excel_generator import get_report_generator
+    from groq_analyzer import get_groq_analyzer
+    from pipeline import Pipeline, search_stages
+    from price_history import get_price_history_writer
+    from profiling import profiler
+    from query_planner import plan_query
+
+    plan = plan_query("\n".join(product_names), max_products=len(product_names), max_terms=len(product_names))
+    products = plan.products
+    not_found = plan.not_found
+
+    async def emit(product_data: dict, analysis: Optional[dict]):
+        if analysis:
+            print(get_groq_analyzer().format_analysis_for_telegram(analysis), flush=True)
+        else:
+            print(f"✓ {product_data['product'].name}", flush=True)
+
+    with profiler.request("cli_batch"), pinned_snapshot():
+        report = get_report_generator().start_report(currency)
+        pipeline = Pipeline(search_stages(report=report, analyze=analyze, emit=emit))
+        analyses = [analysis async for _, analysis in pipeline.run(products)]
+        report_path = await asyncio.to_thread(report.finish, [analysis for analysis in analyses if analysis])
+    await get_price_history_writer().close()
+
+    return {
+        "report_path": report_path,
+        "analyses": [analysis for analysis in analyses if analysis],
+        "not_found": not_found
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    product_names = read_product_names(args)
+    if not product_names:
+        print("❌ Не указаны названия товаров", file=sys.stderr)
+        return 2
+
+    analyze = not args.no_ai
+    if analyze and not Config.GROQ_API_KEY:
+        print("❌ GROQ_API_KEY не задан, используйте --no-ai", file=sys.stderr)
+        return 2
+
+    result = asyncio.run(run_batch(product_names, args.currency, analyze))
+
+    if result["not_found"]:
+        print(f"❌ Не найдено: {', '.join(result['not_found'])}", file=sys.stderr)
+    print(f"📊 Отчет: {result['report_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,23 +6,118 @@ load_dotenv()
 
 class Config:
     TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+    TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL')
 
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
     GROQ_MODEL = "llama3-70b-8192"
+    GROQ_SMALL_MODEL = "llama3-8b-8192"
+    GROQ_MODELS = {
+        GROQ_SMALL_MODEL: {"tier": "small", "max_concurrency": 8},
+        GROQ_MODEL: {"tier": "large", "max_concurrency": 4},
+        "mixtral-8x7b-32768": {"tier": "large", "max_concurrency": 2}
+    }
+    GROQ_SMALL_REQUEST_TOKENS = 650
+    GROQ_BASE_URL = os.getenv('GROQ_BASE_URL')
+    GROQ_TIMEOUT_SECONDS = 30.0
     GROQ_TEMPERATURE = 0.7
+    GROQ_TOKEN_BUDGETS = {
+        "default": {"prompt": 1000, "completion": 600},
+        GROQ_SMALL_MODEL: {"prompt": 700, "completion": 450},
+        GROQ_MODEL: {"prompt": 1200, "completion": 600}
+    }
+    CIRCUIT_WINDOW = 20
+    CIRCUIT_MIN_CALLS = 5
+    CIRCUIT_FAILURE_RATIO = 0.5
+    CIRCUIT_SLOW_CALL_SECONDS = 15.0
+    CIRCUIT_OPEN_SECONDS = 30.0
+
+    BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+    WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+    WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '2'))
+    MAX_CONCURRENT_UPDATES = 64
 
     TEMP_DIR = "temp_reports"
 
+    CONFIG_FILE = os.getenv('CONFIG_FILE')
+    CONFIG_POLL_SECONDS = 5.0
+
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+    PROFILING_DIR = os.path.join(TEMP_DIR, "profiles")
+    PROFILING_SLOWEST_REQUESTS = 5
+    PROFILING_TOP_ALLOCATIONS = 10
+    PROFILING_TRACEMALLOC_FRAMES = 5
+    STATE_DB_PATH = os.getenv('STATE_DB_PATH', 'bot_state.sqlite3')
+
+    PRICE_HISTORY_DB_PATH = os.getenv('PRICE_HISTORY_DB_PATH', 'price_history.sqlite3')
+    PRICE_HISTORY_BATCH_SIZE = 200
+    PRICE_HISTORY_FLUSH_SECONDS = 5.0
+    PRICE_HISTORY_DAYS = 30
+    PRICE_HISTORY_MA_DAYS = 7
+
+    JOB_MAX_ATTEMPTS = 3
+    JOB_MAX_AGE_SECONDS = 6 * 3600
+    SEARCH_DEADLINE_SECONDS = 120.0
+
+    PIPELINE_QUEUE_SIZE = 2
+    PIPELINE_STAGES = {
+        "price": {"concurrency": 1, "timeout": 30.0},
+        "report": {"concurrency": 1, "timeout": 30.0},
+        "analyze": {"concurrency": 4, "timeout": 90.0},
+        "send": {"concurrency": 1, "timeout": 60.0}
+    }
+
+    ANALYSIS_CACHE_TTL_SECONDS = 3 * 3600
+    REQUEST_HALF_LIFE_SECONDS = 7 * 24 * 3600
+    WARMUP_TOP_PRODUCTS = 5
+    WARMUP_INTERVAL_SECONDS = 15 * 60
+    WARMUP_REFRESH_MARGIN_SECONDS = 30 * 60
+
     MAX_SUPPLIERS_PER_PRODUCT = 5
+    SUPPLIER_SCORE_WEIGHTS = {
+        "price": 0.55,
+        "rating": 0.2,
+        "lead_time": 0.15,
+        "moq": 0.1
+    }
+
+    DESTINATION_COUNTRY = os.getenv('DESTINATION_COUNTRY', 'Russia')
+    VOLUMETRIC_DIVISOR = 5000.0
 
     DEFAULT_DELIVERY_PERCENT = 3.0
     DEFAULT_STORAGE_PERCENT = 2.0
     DEFAULT_ADDITIONAL_COSTS_PERCENT = 1.5
 
     USD_TO_RUB_EXCHANGE_RATE = 90.0
+    FX_RATES_FILE = os.getenv('FX_RATES_FILE')
+    FX_CACHE_TTL_SECONDS = 3600
+    REPORT_CURRENCY = os.getenv('REPORT_CURRENCY', 'RUB').upper()
+
+    TELEGRAM_GLOBAL_RATE = 30.0
+    TELEGRAM_CHAT_RATE = 1.0
+    TELEGRAM_CHAT_BURST = 3.0
+    MAX_MESSAGE_LENGTH = 4000
+
+    MAX_PRODUCTS_PER_REQUEST = 10
+    MAX_QUERY_TERMS = 30
 
-    MAX_PRODUCTS_PER_REQUEST = 5
+    SEMANTIC_SEARCH_ENABLED = os.getenv('SEMANTIC_SEARCH_ENABLED', '').lower() in ('1', 'true', 'yes')
+    SEMANTIC_INDEX_PATH = os.getenv('SEMANTIC_INDEX_PATH', os.path.join(TEMP_DIR, 'semantic_index.npy'))
+    SEMANTIC_DIMENSIONS = 256
+    # a floor for the n-gram score; near misses either side of it are settled by shared word stems
+    SEMANTIC_MIN_SCORE = 0.45
+
+    REPORT_FORMATS = ("excel", "text")
+    DEFAULT_REPORT_FORMAT = "excel"
+    MAX_USER_SUPPLIERS = 10
+    DAILY_REQUEST_QUOTA = int(os.getenv('DAILY_REQUEST_QUOTA', '50'))
+    DAILY_TOKEN_QUOTA = int(os.getenv('DAILY_TOKEN_QUOTA', '200000'))
+    USER_SETTINGS_CACHE_SIZE = 1024
+    USER_SETTINGS_CACHE_TTL_SECONDS = 60
     MIN_SEARCH_TEXT_LENGTH = 3
 
     @classmethod
@@ -35,12 +130,107 @@ class Config:
         if not cls.GROQ_API_KEY:
             errors.append("GROQ_API_KEY")
 
+        if cls.BOT_MODE not in ("polling", "webhook"):
+            errors.append("BOT_MODE")
+
+        if cls.BOT_MODE == "webhook" and not cls.WEBHOOK_URL:
+            errors.append("WEBHOOK_URL")
+
+        if not cls.WEBHOOK_PATH.startswith("/"):
+            errors.append("WEBHOOK_PATH")
+
+        if not 0 < cls.WEBHOOK_PORT < 65536:
+            errors.append("WEBHOOK_PORT")
+
+        if cls.WORKER_PROCESSES <= 0:
+            errors.append("WORKER_PROCESSES")
+
+        if cls.MAX_CONCURRENT_UPDATES <= 0:
+            errors.append("MAX_CONCURRENT_UPDATES")
+
+        if cls.CONFIG_POLL_SECONDS <= 0.0:
+            errors.append("CONFIG_POLL_SECONDS")
+
+        if not cls.GROQ_MODELS or any(
+            spec.get("tier") not in ("small", "large") or spec.get("max_concurrency", 0) <= 0
+            for spec in cls.GROQ_MODELS.values()
+        ):
+            errors.append("GROQ_MODELS")
+
+        if cls.GROQ_TIMEOUT_SECONDS <= 0.0:
+            errors.append("GROQ_TIMEOUT_SECONDS")
+
         if cls.GROQ_TEMPERATURE < 0.0 or cls.GROQ_TEMPERATURE > 2.0:
             errors.append("GROQ_TEMPERATURE")
 
+        if cls.CIRCUIT_WINDOW <= 0 or not 0 < cls.CIRCUIT_MIN_CALLS <= cls.CIRCUIT_WINDOW:
+            errors.append("CIRCUIT_WINDOW")
+
+        if not 0.0 < cls.CIRCUIT_FAILURE_RATIO <= 1.0:
+            errors.append("CIRCUIT_FAILURE_RATIO")
+
+        if cls.CIRCUIT_SLOW_CALL_SECONDS <= 0.0 or cls.CIRCUIT_OPEN_SECONDS <= 0.0:
+            errors.append("CIRCUIT_SLOW_CALL_SECONDS")
+
+        if cls.PROFILING_SLOWEST_REQUESTS <= 0 or cls.PROFILING_TOP_ALLOCATIONS <= 0:
+            errors.append("PROFILING_SLOWEST_REQUESTS")
+
+        if cls.PROFILING_TRACEMALLOC_FRAMES <= 0:
+            errors.append("PROFILING_TRACEMALLOC_FRAMES")
+
+        if cls.PRICE_HISTORY_BATCH_SIZE <= 0 or cls.PRICE_HISTORY_FLUSH_SECONDS <= 0.0:
+            errors.append("PRICE_HISTORY_BATCH_SIZE")
+
+        if cls.PRICE_HISTORY_DAYS <= 0 or not 0 < cls.PRICE_HISTORY_MA_DAYS <= cls.PRICE_HISTORY_DAYS:
+            errors.append("PRICE_HISTORY_DAYS")
+
+        if cls.JOB_MAX_ATTEMPTS <= 0:
+            errors.append("JOB_MAX_ATTEMPTS")
+
+        if cls.JOB_MAX_AGE_SECONDS <= 0:
+            errors.append("JOB_MAX_AGE_SECONDS")
+
+        if cls.SEARCH_DEADLINE_SECONDS <= 0.0:
+            errors.append("SEARCH_DEADLINE_SECONDS")
+
+        if cls.PIPELINE_QUEUE_SIZE <= 0:
+            errors.append("PIPELINE_QUEUE_SIZE")
+
+        if any(
+            settings.get("concurrency", 1) <= 0 or (settings.get("timeout") or 1.0) <= 0.0
+            for settings in cls.PIPELINE_STAGES.values()
+        ):
+            errors.append("PIPELINE_STAGES")
+
+        if cls.ANALYSIS_CACHE_TTL_SECONDS <= cls.WARMUP_REFRESH_MARGIN_SECONDS:
+            errors.append("ANALYSIS_CACHE_TTL_SECONDS")
+
+        if cls.REQUEST_HALF_LIFE_SECONDS <= 0:
+            errors.append("REQUEST_HALF_LIFE_SECONDS")
+
+        if cls.WARMUP_TOP_PRODUCTS < 0:
+            errors.append("WARMUP_TOP_PRODUCTS")
+
+        if cls.WARMUP_INTERVAL_SECONDS <= 0 or cls.WARMUP_REFRESH_MARGIN_SECONDS <= cls.WARMUP_INTERVAL_SECONDS:
+            errors.append("WARMUP_INTERVAL_SECONDS")
+
+        budgets = cls.GROQ_TOKEN_BUDGETS
+        if "default" not in budgets or any(
+            budget.get("prompt", 0) <= 0 or budget.get("completion", 0) <= 0
+            for budget in budgets.values()
+        ):
+            errors.append("GROQ_TOKEN_BUDGETS")
+
         if cls.MAX_SUPPLIERS_PER_PRODUCT <= 0:
             errors.append("MAX_SUPPLIERS_PER_PRODUCT")
 
+        weights = cls.SUPPLIER_SCORE_WEIGHTS
+        if any(weight < 0.0 for weight in weights.values()) or sum(weights.values()) <= 0.0:
+            errors.append("SUPPLIER_SCORE_WEIGHTS")
+
+        if cls.VOLUMETRIC_DIVISOR <= 0.0:
+            errors.append("VOLUMETRIC_DIVISOR")
+
         if cls.DEFAULT_DELIVERY_PERCENT < 0.0:
             errors.append("DEFAULT_DELIVERY_PERCENT")
 
@@ -53,9 +243,45 @@ class Config:
         if cls.USD_TO_RUB_EXCHANGE_RATE <= 0.0:
             errors.append("USD_TO_RUB_EXCHANGE_RATE")
 
+        if cls.FX_CACHE_TTL_SECONDS <= 0:
+            errors.append("FX_CACHE_TTL_SECONDS")
+
+        if not cls.REPORT_CURRENCY or len(cls.REPORT_CURRENCY) != 3:
+            errors.append("REPORT_CURRENCY")
+
+        if cls.TELEGRAM_GLOBAL_RATE <= 0.0:
+            errors.append("TELEGRAM_GLOBAL_RATE")
+
+        if cls.TELEGRAM_CHAT_RATE <= 0.0 or cls.TELEGRAM_CHAT_BURST < 1.0:
+            errors.append("TELEGRAM_CHAT_RATE")
+
+        if cls.MAX_MESSAGE_LENGTH <= 0 or cls.MAX_MESSAGE_LENGTH > 4096:
+            errors.append("MAX_MESSAGE_LENGTH")
+
         if cls.MAX_PRODUCTS_PER_REQUEST <= 0:
             errors.append("MAX_PRODUCTS_PER_REQUEST")
 
+        if cls.MAX_QUERY_TERMS < cls.MAX_PRODUCTS_PER_REQUEST:
+            errors.append("MAX_QUERY_TERMS")
+
+        if cls.SEMANTIC_DIMENSIONS <= 0:
+            errors.append("SEMANTIC_DIMENSIONS")
+
+        if not 0.0 < cls.SEMANTIC_MIN_SCORE <= 1.0:
+            errors.append("SEMANTIC_MIN_SCORE")
+
+        if cls.DEFAULT_REPORT_FORMAT not in cls.REPORT_FORMATS:
+            errors.append("DEFAULT_REPORT_FORMAT")
+
+        if not cls.MAX_SUPPLIERS_PER_PRODUCT <= cls.MAX_USER_SUPPLIERS:
+            errors.append("MAX_USER_SUPPLIERS")
+
+        if cls.DAILY_REQUEST_QUOTA <= 0 or cls.DAILY_TOKEN_QUOTA < 0:
+            errors.append("DAILY_QUOTA")
+
+        if cls.USER_SETTINGS_CACHE_SIZE <= 0 or cls.USER_SETTINGS_CACHE_TTL_SECONDS <= 0:
+            errors.append("USER_SETTINGS_CACHE")
+
         if cls.MIN_SEARCH_TEXT_LENGTH <= 0:
             errors.append("MIN_SEARCH_TEXT_LENGTH")
 
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import List, Dict, Any, Callable, Iterable, Optional, Set, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STARTUP_ONLY = frozenset({
+    "TELEGRAM_TOKEN",
+    "TELEGRAM_BASE_URL",
+    "GROQ_API_KEY",
+    "GROQ_BASE_URL",
+    "BOT_MODE",
+    "WEBHOOK_URL",
+    "WEBHOOK_PATH",
+    "WEBHOOK_SECRET",
+    "WEBHOOK_LISTEN",
+    "WEBHOOK_PORT",
+    "WORKER_PROCESSES",
+    "MAX_CONCURRENT_UPDATES",
+    "TEMP_DIR",
+    "PROFILING_DIR",
+    "STATE_DB_PATH",
+    "PRICE_HISTORY_DB_PATH",
+    "SEMANTIC_INDEX_PATH",
+    "CONFIG_FILE"
+})
+
+MODEL_NAME_SETTINGS = ("GROQ_MODEL", "GROQ_SMALL_MODEL")
+MODEL_KEYED_SETTINGS = ("GROQ_MODELS", "GROQ_TOKEN_BUDGETS")
+
+_listeners: List[Tuple[Optional[frozenset], Callable[[Set[str]], None]]] = []
+
+
+def on_config_change(*keys: str):
+    def register(callback: Callable[[Set[str]], None]):
+        _listeners.append((frozenset(keys) or None, callback))
+        return callback
+    return register
+
+
+def config_values(config=Config) -> Dict[str, Any]:
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+class ConfigSnapshot:
+    def __init__(self, version: int, values: Dict[str, Any]):
+        self.version = version
+        self.values = MappingProxyType(dict(values))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _coerce(name: str, value: Any, default: Any) -> Any:
+    if default is None or value is None:
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{name} must be a string")
+        return value
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{name} must be a boolean")
+        return value
+    if isinstance(default, float) and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(default, tuple) and isinstance(value, list):
+        return tuple(value)
+    if type(value) is not type(default):
+        raise ValueError(f"{name} must be {type(default).__name__}")
+    return value
+
+
+class ConfigReloader:
+    def __init__(self, path: Optional[str] = None, config=Config):
+        self.path = path or Config.CONFIG_FILE
+        self.config = config
+        self.defaults = config_values(config)
+        self.snapshot = ConfigSnapshot(0, self.defaults)
+        self.reloads = 0
+        self.errors = 0
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def prepare(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(overrides, dict):
+            raise ValueError("config file must contain a JSON object")
+
+        values = dict(self.defaults)
+        for name, value in overrides.items():
+            if name not in self.defaults:
+                raise ValueError(f"Unknown setting: {name}")
+            if name in STARTUP_ONLY:
+                raise ValueError(f"{name} can only be changed with a restart")
+            values[name] = _coerce(name, value, self.defaults[name])
+        self._rename_models(values)
+
+        candidate = type("ConfigCandidate", (self.config,), values)
+        errors = [error for error in candidate.validate() if error not in self.config.validate()]
+        if errors:
+            raise ValueError(f"Invalid settings: {', '.join(errors)}")
+        return values
+
+    def _rename_models(self, values: Dict[str, Any]):
+        # GROQ_MODELS and GROQ_TOKEN_BUDGETS are keyed by the model names, so renaming a model moves its entries
+        renamed = {
+            self.defaults[name]: values[name]
+            for name in MODEL_NAME_SETTINGS
+            if values[name] != self.defaults[name]
+        }
+        if not renamed:
+            return
+        for name in MODEL_KEYED_SETTINGS:
+            models = {renamed.get(model, model): spec for model, spec in values[name].items()}
+            if len(models) < len(values[name]):
+                raise ValueError(f"renamed models clash with existing {name} entries")
+            values[name] = models
+
+    def apply(self, values: Dict[str, Any]) -> Set[str]:
+        with self._lock:
+            changed = {name for name, value in values.items() if getattr(self.config, name) != value}
+            if not changed:
+                return changed
+            for name in changed:
+                setattr(self.config, name, values[name])
+            self.snapshot = ConfigSnapshot(self.snapshot.version + 1, config_values(self.config))
+            self.reloads += 1
+
+        logger.info("Config v%s applied: %s", self.snapshot.version, ", ".join(sorted(changed)))
+        notify(changed)
+        return changed
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> Set[str]:
+        if not self.path:
+            return set()
+
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return set()
+        self._stamp = stamp
+
+        try:
+            overrides = {}
+            if stamp is not None:
+                with open(self.path, encoding="utf-8") as config_file:
+                    overrides = json.load(config_file)
+            values = self.prepare(overrides)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.error("Config %s rejected, keeping v%s: %s", self.path, self.snapshot.version, e)
+            return set()
+
+        return self.apply(values)
+
+    async def watch(self, interval: Optional[float] = None):
+        interval = interval or Config.CONFIG_POLL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            self.check()
+
+
+def notify(changed: Iterable[str]):
+    changed = set(changed)
+    for keys, callback in list(_listeners):
+        if keys is None or keys & changed:
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.error("Config listener %s failed: %s", callback.__qualname__, e)
+
+
+_config_reloader: Optional[ConfigReloader] = None
+_pinned_snapshot: ContextVar[Optional[ConfigSnapshot]] = ContextVar("config_snapshot", default=None)
+
+
+def get_config_reloader() -> ConfigReloader:
+    global _config_reloader
+    if _config_reloader is None:
+        _config_reloader = ConfigReloader()
+    return _config_reloader
+
+
+def current_snapshot() -> ConfigSnapshot:
+    return _pinned_snapshot.get() or get_config_reloader().snapshot
+
+
+@contextmanager
+def pinned_snapshot(snapshot: Optional[ConfigSnapshot] = None):
+    # a job reads one config version throughout, even if a reload lands while it runs
+    token = _pinned_snapshot.set(snapshot or get_config_reloader().snapshot)
+    try:
+        yield _pinned_snapshot.get()
+    finally:
+        _pinned_snapshot.reset(token)
@@ -1,4 +1,3 @@
-import random
 from typing import List, Dict, Any
 from datetime import datetime
 from config import Config
@@ -18,6 +17,7 @@ class Supplier:
         self.rating: float = supplier_data["rating"]
         self.delivery_time: str = supplier_data["delivery_time"]
         self.min_order_value: float = supplier_data["min_order_value"]
+        self.currency: str = supplier_data["currency"]
 
 
 class Product:
@@ -47,7 +47,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.8,
             "delivery_time": "7-14 days",
-            "min_order_value": 500
+            "min_order_value": 500,
+            "currency": "USD"
         },
         {
             "id": "SUP002",
@@ -61,7 +62,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.5,
             "delivery_time": "14-21 days",
-            "min_order_value": 300
+            "min_order_value": 300,
+            "currency": "CNY"
         },
         {
             "id": "SUP003",
@@ -75,7 +77,8 @@ class SupplierDatabase:
             "status": "Premium",
             "rating": 4.9,
             "delivery_time": "3-5 days",
-            "min_order_value": 1000
+            "min_order_value": 1000,
+            "currency": "EUR"
         },
         {
             "id": "SUP004",
@@ -89,7 +92,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.6,
             "delivery_time": "5-7 days",
-            "min_order_value": 750
+            "min_order_value": 750,
+            "currency": "USD"
         },
         {
             "id": "SUP005",
@@ -103,7 +107,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.4,
             "delivery_time": "10-15 days",
-            "min_order_value": 200
+            "min_order_value": 200,
+            "currency": "INR"
         },
         {
             "id": "SUP006",
@@ -117,7 +122,8 @@ class SupplierDatabase:
             "status": "Premium",
             "rating": 4.7,
             "delivery_time": "7-10 days",
-            "min_order_value": 400
+            "min_order_value": 400,
+            "currency": "TRY"
         },
         {
             "id": "SUP007",
@@ -131,7 +137,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.3,
             "delivery_time": "12-18 days",
-            "min_order_value": 250
+            "min_order_value": 250,
+            "currency": "USD"
         },
         {
             "id": "SUP008",
@@ -145,7 +152,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.2,
             "delivery_time": "8-12 days",
-            "min_order_value": 350
+            "min_order_value": 350,
+            "currency": "USD"
         },
         {
             "id": "SUP009",
@@ -159,7 +167,8 @@ class SupplierDatabase:
             "status": "Premium",
             "rating": 4.8,
             "delivery_time": "4-7 days",
-            "min_order_value": 600
+            "min_order_value": 600,
+            "currency": "USD"
         },
         {
             "id": "SUP010",
@@ -173,7 +182,8 @@ class SupplierDatabase:
             "status": "Verified",
             "rating": 4.1,
             "delivery_time": "15-20 days",
-            "min_order_value": 450
+            "min_order_value": 450,
+            "currency": "USD"
         }
     ]
 
@@ -193,7 +203,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 45.99,
             "weight_kg": 0.05,
-            "dimensions_cm": "6x4x3"
+            "dimensions_cm": "6x4x3",
+            "aliases": ["наушники tws", "earbuds", "wireless headphones", "гарнитура"]
         },
         {
             "id": "PROD002",
@@ -204,7 +215,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 89.99,
             "weight_kg": 0.08,
-            "dimensions_cm": "4x4x1"
+            "dimensions_cm": "4x4x1",
+            "aliases": ["smartwatch", "smart watch", "умные часы"]
         },
         {
             "id": "PROD003",
@@ -215,7 +227,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 24.99,
             "weight_kg": 1.2,
-            "dimensions_cm": "183x61x6"
+            "dimensions_cm": "183x61x6",
+            "aliases": ["коврик для йоги", "yoga mat", "фитнес коврик"]
         },
         {
             "id": "PROD004",
@@ -226,7 +239,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 19.99,
             "weight_kg": 0.6,
-            "dimensions_cm": "35x15x15"
+            "dimensions_cm": "35x15x15",
+            "aliases": ["светильник", "desk lamp", "led лампа"]
         },
         {
             "id": "PROD005",
@@ -237,7 +251,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 29.99,
             "weight_kg": 0.35,
-            "dimensions_cm": "25x8x8"
+            "dimensions_cm": "25x8x8",
+            "aliases": ["термобутылка", "термос", "water bottle"]
         },
         {
             "id": "PROD006",
@@ -248,7 +263,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 34.99,
             "weight_kg": 0.22,
-            "dimensions_cm": "10x6x2"
+            "dimensions_cm": "10x6x2",
+            "aliases": ["powerbank", "power bank", "пауэрбанк", "внешний аккумулятор"]
         },
         {
             "id": "PROD007",
@@ -259,7 +275,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 12.99,
             "weight_kg": 0.03,
-            "dimensions_cm": "16x8x1"
+            "dimensions_cm": "16x8x1",
+            "aliases": ["phone case", "бампер для телефона", "кейс для смартфона"]
         },
         {
             "id": "PROD008",
@@ -270,7 +287,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 39.99,
             "weight_kg": 0.45,
-            "dimensions_cm": "12x12x6"
+            "dimensions_cm": "12x12x6",
+            "aliases": ["bluetooth speaker", "портативная акустика", "беспроводная колонка"]
         },
         {
             "id": "PROD009",
@@ -281,7 +299,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 49.99,
             "weight_kg": 0.02,
-            "dimensions_cm": "4x2x1"
+            "dimensions_cm": "4x2x1",
+            "aliases": ["fitness tracker", "фитнес-браслет", "smart band"]
         },
         {
             "id": "PROD010",
@@ -292,7 +311,8 @@ class ProductDatabase:
             "doc_unit": "шт.",
             "base_price_usd": 44.99,
             "weight_kg": 0.8,
-            "dimensions_cm": "45x30x15"
+            "dimensions_cm": "45x30x15",
+            "aliases": ["backpack", "рюкзак для ноутбука", "laptop bag"]
         }
     ]
 
@@ -308,51 +328,19 @@ class ProductDatabase:
         return None
 
     @classmethod
-    def generate_supplier_prices(cls, product: Product, config: Config) -> List[Dict[str, Any]]:
-        suppliers_with_prices = []
-
-        for supplier in SupplierDatabase.get_all_suppliers():
-            supplier_data = cls._convert_supplier_to_dict(supplier)
-
-            price_variation = 0.85 + (random.random() * 0.35)
-            base_price = product.base_price_usd
-            supplier_price_usd = round(base_price * price_variation, 2)
-
-            delivery_cost_percent = config.DEFAULT_DELIVERY_PERCENT + random.uniform(-1, 1)
-            storage_cost_percent = config.DEFAULT_STORAGE_PERCENT
-            additional_costs_percent = config.DEFAULT_ADDITIONAL_COSTS_PERCENT + random.uniform(-0.5, 0.5)
-
-            price_rub = supplier_price_usd * config.USD_TO_RUB_EXCHANGE_RATE
-            delivery_cost_rub = price_rub * (delivery_cost_percent / 100)
-            storage_cost_rub = price_rub * (storage_cost_percent / 100)
-            additional_costs_rub = price_rub * (additional_costs_percent / 100)
-
-            final_price_rub = price_rub + delivery_cost_rub + storage_cost_rub + additional_costs_rub
+    def get_product_by_id(cls, product_id: str) -> Product:
+        for product in cls.PRODUCTS_DATA:
+            if product["id"] == product_id:
+                return Product(product)
 
-            supplier_data.update({
-                "price_usd": supplier_price_usd,
-                "price_rub": round(price_rub, 2),
-                "delivery_cost_percent": round(delivery_cost_percent, 2),
-                "delivery_cost_rub": round(delivery_cost_rub, 2),
-                "storage_cost_percent": storage_cost_percent,
-                "storage_cost_rub": round(storage_cost_rub, 2),
-                "additional_costs_percent": round(additional_costs_percent, 2),
-                "additional_costs_rub": round(additional_costs_rub, 2),
-                "final_price_rub": round(final_price_rub, 2),
-                "final_price_usd": round(final_price_rub / config.USD_TO_RUB_EXCHANGE_RATE, 2),
-                "additional_costs_name": random.choice([
-                    "Таможенный контроль",
-                    "Страховка",
-                    "Упаковка",
-                    "Документация"
-                ]),
-                "moq": supplier.min_order_value,
-                "lead_time": supplier.delivery_time
-            })
+        return None
 
-            suppliers_with_prices.append(supplier_data)
+    @classmethod
+    def generate_supplier_prices(cls, product: Product, config: Config) -> List[Dict[str, Any]]:
+        from pricing import price_suppliers
 
-        return suppliers_with_prices
+        suppliers = [cls._convert_supplier_to_dict(s) for s in SupplierDatabase.get_all_suppliers()]
+        return price_suppliers(product, suppliers, config)
 
     @classmethod
     def generate_product_code(cls, product: Product, supplier: Dict[str, Any]) -> str:
@@ -390,7 +378,8 @@ class ProductDatabase:
             "status": supplier.status,
             "rating": supplier.rating,
             "delivery_time": supplier.delivery_time,
-            "min_order_value": supplier.min_order_value
+            "min_order_value": supplier.min_order_value,
+            "currency": supplier.currency
         }
 
 
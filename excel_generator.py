@@ -1,11 +1,21 @@
 import os
+import tempfile
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from config import Config
+from config_reload import current_snapshot
 from database import product_db, Product
+from supplier_stats import statistics_engine
+from supplier_ranking import supplier_ranker
+from fx import fx_table
+from profiling import profiler
+from cancellation import check_cancelled
+from structured_analysis import SHEET_HEADER, sheet_rows
+
+ANALYSIS_SHEET_TITLE = "AI рекомендации"
 
 
 class ExcelReportGenerator:
@@ -36,18 +46,24 @@ class ExcelReportGenerator:
             bottom=Side(style='thin')
         )
 
-    def generate_supplier_analysis_report(self, products_data: List[Dict[str, Any]]) -> str:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Анализ поставщиков"
-
-        self._add_report_header(ws)
-        self._add_data_headers(ws)
-        self._populate_report_data(ws, products_data)
-        self._auto_resize_columns(ws)
-        self._add_summary_sheet(wb, products_data)
-
-        return self._save_report(wb)
+    def generate_supplier_analysis_report(
+        self,
+        products_data: List[Dict[str, Any]],
+        currency: Optional[str] = None,
+        max_suppliers: Optional[int] = None,
+        analyses: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        report = self.start_report(currency, max_suppliers)
+        for product_data in products_data:
+            report.add_product(product_data)
+        return report.finish(analyses)
+
+    def start_report(self, currency: Optional[str] = None, max_suppliers: Optional[int] = None) -> "SupplierReport":
+        return SupplierReport(
+            self,
+            (currency or current_snapshot().REPORT_CURRENCY).upper(),
+            max_suppliers or current_snapshot().MAX_SUPPLIERS_PER_PRODUCT
+        )
 
     def _add_report_header(self, ws):
         ws.merge_cells('A1:Z1')
@@ -59,7 +75,7 @@ class ExcelReportGenerator:
         title_cell.font = Font(bold=True, size=14)
         title_cell.alignment = Alignment(horizontal="center", vertical="center")
 
-    def _add_data_headers(self, ws):
+    def _add_data_headers(self, ws, currency: str):
         headers = [
             "№", "Код товара", "Название товара", "Полное название товара",
             "Категория", "Единица", "Единица в документе", "Базовая цена (USD)",
@@ -70,7 +86,8 @@ class ExcelReportGenerator:
             "Конечная цена RUB", "Конечная цена USD", "Время доставки",
             "МОК (USD)", "Место склада", "Статус поставщика",
             "Сайт поставщика", "ИНН поставщика", "Вес товара (кг)",
-            "Размеры (см)", "Год", "Квартал"
+            "Размеры (см)", "Год", "Квартал", "Валюта поставщика",
+            "Цена в валюте поставщика", f"Конечная цена ({currency})"
         ]
 
         for col_idx, header in enumerate(headers, 1):
@@ -80,69 +97,88 @@ class ExcelReportGenerator:
             cell.alignment = self.center_alignment
             cell.border = self.thin_border
 
-    def _populate_report_data(self, ws, products_data: List[Dict[str, Any]]):
-        row_idx = 4
+    def _populate_product_rows(
+        self,
+        ws,
+        row_idx: int,
+        product_data: Dict[str, Any],
+        currency: str,
+        max_suppliers: Optional[int] = None
+    ) -> int:
         current_year = datetime.now().year
         current_quarter = (datetime.now().month - 1) // 3 + 1
 
-        for product_data in products_data:
-            product: Product = product_data["product"]
-            suppliers = product_data["suppliers"][:Config.MAX_SUPPLIERS_PER_PRODUCT]
-
-            for supplier_idx, supplier in enumerate(suppliers, 1):
-                product_code = product_db.generate_product_code(product, supplier)
-
-                row_data = [
-                    supplier_idx,
-                    product_code,
-                    product.name,
-                    product.full_name,
-                    product.category,
-                    product.unit,
-                    product.doc_unit,
-                    product.base_price_usd,
-                    supplier["name"],
-                    supplier["country"],
-                    supplier["rating"],
-                    supplier["price_usd"],
-                    supplier["price_rub"],
-                    supplier["delivery_cost_percent"],
-                    supplier["delivery_cost_rub"],
-                    supplier["storage_cost_percent"],
-                    supplier["storage_cost_rub"],
-                    supplier["additional_costs_name"],
-                    supplier["additional_costs_percent"],
-                    supplier["additional_costs_rub"],
-                    supplier["final_price_rub"],
-                    supplier["final_price_usd"],
-                    supplier["lead_time"],
-                    supplier["moq"],
-                    supplier["warehouse_location"],
-                    supplier["status"],
-                    supplier["url"],
-                    supplier["tax_id"],
-                    product.weight_kg,
-                    product.dimensions_cm,
-                    current_year,
-                    current_quarter
-                ]
+        product: Product = product_data["product"]
+        suppliers = self._get_top_suppliers(product_data, max_suppliers)
+        final_prices = fx_table.convert(
+            [supplier["final_price_usd"] for supplier in suppliers], "USD", currency
+        ).round(2).tolist()
+
+        for supplier_idx, (supplier, final_price) in enumerate(zip(suppliers, final_prices), 1):
+            product_code = product_db.generate_product_code(product, supplier)
+
+            row_data = [
+                supplier_idx,
+                product_code,
+                product.name,
+                product.full_name,
+                product.category,
+                product.unit,
+                product.doc_unit,
+                product.base_price_usd,
+                supplier["name"],
+                supplier["country"],
+                supplier["rating"],
+                supplier["price_usd"],
+                supplier["price_rub"],
+                supplier["delivery_cost_percent"],
+                supplier["delivery_cost_rub"],
+                supplier["storage_cost_percent"],
+                supplier["storage_cost_rub"],
+                supplier["additional_costs_name"],
+                supplier["additional_costs_percent"],
+                supplier["additional_costs_rub"],
+                supplier["final_price_rub"],
+                supplier["final_price_usd"],
+                supplier["lead_time"],
+                supplier["moq"],
+                supplier["warehouse_location"],
+                supplier["status"],
+                supplier["url"],
+                supplier["tax_id"],
+                product.weight_kg,
+                product.dimensions_cm,
+                current_year,
+                current_quarter,
+                supplier["currency"],
+                supplier["price_local"],
+                final_price
+            ]
+
+            for col_idx, value in enumerate(row_data, 1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                cell.alignment = self.left_alignment
+                cell.border = self.thin_border
+
+                if col_idx in [8, 11, 12, 14, 15, 16, 17, 19, 20, 21, 22, 24, 34, 35]:
+                    if value is not None:
+                        cell.number_format = '#,##0.00'
 
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                    cell.alignment = self.left_alignment
-                    cell.border = self.thin_border
+                if col_idx == 10:
+                    if value is not None:
+                        cell.number_format = '0.0'
 
-                    if col_idx in [8, 11, 12, 14, 15, 16, 17, 19, 20, 21, 22, 24]:
-                        if value is not None:
-                            cell.number_format = '#,##0.00'
+            row_idx += 1
 
-                    if col_idx == 10:
-                        if value is not None:
-                            cell.number_format = '0.0'
+        return row_idx + 1
 
-                row_idx += 1
-
-            row_idx += 1
+    @staticmethod
+    def _get_top_suppliers(product_data: Dict[str, Any], max_suppliers: Optional[int] = None) -> List[Dict[str, Any]]:
+        max_suppliers = max_suppliers or current_snapshot().MAX_SUPPLIERS_PER_PRODUCT
+        top_suppliers = product_data.get("top_suppliers")
+        if top_suppliers is None or len(top_suppliers) < min(max_suppliers, len(product_data["suppliers"])):
+            top_suppliers = supplier_ranker.top_k(product_data["suppliers"], max_suppliers)
+        return top_suppliers[:max_suppliers]
 
     def _auto_resize_columns(self, ws):
         for column in ws.columns:
@@ -159,46 +195,57 @@ class ExcelReportGenerator:
             adjusted_width = min(max_length + 2, 50)
             ws.column_dimensions[column_letter].width = adjusted_width
 
-    def _add_summary_sheet(self, wb, products_data: List[Dict[str, Any]]):
+    def _add_summary_sheet(self, wb, products_data: List[Dict[str, Any]], currency: str):
         ws = wb.create_sheet(title="Сводка")
 
-        ws.merge_cells('A1:E1')
+        ws.merge_cells('A1:F1')
         title_cell = ws['A1']
         title_cell.value = "Сводка анализа поставщиков"
         title_cell.font = Font(bold=True, size=14)
         title_cell.alignment = Alignment(horizontal="center")
 
-        headers = ["Товар", "Лучший поставщик", "Лучшая цена (USD)", "Время доставки", "Рейтинг"]
+        headers = [
+            "Товар", "Лучший поставщик", "Лучшая цена (USD)", "Время доставки", "Рейтинг",
+            f"Лучшая цена ({currency})"
+        ]
         for col_idx, header in enumerate(headers, 1):
             cell = ws.cell(row=3, column=col_idx, value=header)
             cell.font = self.header_font
             cell.fill = self.header_fill
 
-        row_idx = 4
+        best_rows = []
         for product_data in products_data:
             product = product_data["product"]
             suppliers = product_data["suppliers"]
 
             if suppliers:
-                best_supplier = min(suppliers, key=lambda x: x["final_price_usd"])
+                stats = product_data.get("statistics") or statistics_engine.calculate(suppliers)
+                best_rows.append((product, suppliers[stats["best_supplier_index"]]))
 
-                row_data = [
-                    product.name,
-                    best_supplier["name"],
-                    best_supplier["final_price_usd"],
-                    best_supplier["lead_time"],
-                    best_supplier["rating"]
-                ]
+        target_prices = fx_table.convert(
+            [best_supplier["final_price_usd"] for _, best_supplier in best_rows], "USD", currency
+        ).round(2).tolist()
 
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-
-                    if col_idx == 3:
-                        cell.number_format = '#,##0.00'
-                    elif col_idx == 5:
-                        cell.number_format = '0.0'
+        row_idx = 4
+        for (product, best_supplier), target_price in zip(best_rows, target_prices):
+            row_data = [
+                product.name,
+                best_supplier["name"],
+                best_supplier["final_price_usd"],
+                best_supplier["lead_time"],
+                best_supplier["rating"],
+                target_price
+            ]
+
+            for col_idx, value in enumerate(row_data, 1):
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+
+                if col_idx in [3, 6]:
+                    cell.number_format = '#,##0.00'
+                elif col_idx == 5:
+                    cell.number_format = '0.0'
 
-                row_idx += 1
+            row_idx += 1
 
         for column in ws.columns:
             max_length = 0
@@ -214,12 +261,94 @@ class ExcelReportGenerator:
             adjusted_width = min(max_length + 2, 30)
             ws.column_dimensions[column_letter].width = adjusted_width
 
+    def _add_analysis_sheet(self, wb, analyses: List[Dict[str, Any]]):
+        ws = wb.create_sheet(title=ANALYSIS_SHEET_TITLE)
+
+        ws.merge_cells('A1:G1')
+        title_cell = ws['A1']
+        title_cell.value = "Рекомендации AI по поставщикам"
+        title_cell.font = Font(bold=True, size=14)
+        title_cell.alignment = Alignment(horizontal="center")
+
+        for col_idx, header in enumerate(SHEET_HEADER, 1):
+            cell = ws.cell(row=3, column=col_idx, value=header)
+            cell.font = self.header_font
+            cell.fill = self.header_fill
+            cell.alignment = self.center_alignment
+            cell.border = self.thin_border
+
+        row_idx = 4
+        for analysis in analyses:
+            for row_data in sheet_rows(analysis):
+                for col_idx, value in enumerate(row_data, 1):
+                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                    cell.alignment = self.left_alignment
+                    cell.border = self.thin_border
+
+                    if col_idx == 5 and value is not None:
+                        cell.number_format = '#,##0.00'
+                    elif col_idx == 6 and value is not None:
+                        cell.number_format = '0.0'
+
+                row_idx += 1
+
+        for col_idx, width in enumerate([25, 20, 25, 15, 14, 10, 60], 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+
     def _save_report(self, wb: Workbook) -> str:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"анализ_поставщиков_{timestamp}.xlsx"
-        filepath = os.path.join(self.reports_dir, filename)
+        # concurrent searches finish within the same second, so the timestamp alone is not unique
+        fd, filepath = tempfile.mkstemp(
+            prefix=f"анализ_поставщиков_{timestamp}_", suffix=".xlsx", dir=self.reports_dir
+        )
+        os.close(fd)
         wb.save(filepath)
         return filepath
 
 
-report_generator = ExcelReportGenerator()
\ No newline at end of file
+class SupplierReport:
+    def __init__(self, generator: ExcelReportGenerator, currency: str, max_suppliers: Optional[int] = None):
+        self.generator = generator
+        self.currency = currency
+        self.max_suppliers = max_suppliers
+        self.products_data: List[Dict[str, Any]] = []
+
+        self.workbook = Workbook()
+        self.sheet = self.workbook.active
+        self.sheet.title = "Анализ поставщиков"
+        self._next_row = 4
+
+        generator._add_report_header(self.sheet)
+        generator._add_data_headers(self.sheet, currency)
+
+    def add_product(self, product_data: Dict[str, Any]):
+        check_cancelled()
+        with profiler.stage("report_rows"):
+            self._next_row = self.generator._populate_product_rows(
+                self.sheet, self._next_row, product_data, self.currency, self.max_suppliers
+            )
+        self.products_data.append(product_data)
+
+    def finish(self, analyses: Optional[List[Dict[str, Any]]] = None) -> str:
+        with profiler.stage("report_save"):
+            self.generator._auto_resize_columns(self.sheet)
+            self.generator._add_summary_sheet(self.workbook, self.products_data, self.currency)
+            if analyses:
+                self.generator._add_analysis_sheet(self.workbook, analyses)
+            return self.generator._save_report(self.workbook)
+
+
+_report_generator: Optional[ExcelReportGenerator] = None
+
+
+def get_report_generator() -> ExcelReportGenerator:
+    global _report_generator
+    if _report_generator is None:
+        _report_generator = ExcelReportGenerator()
+    return _report_generator
+
+
+def __getattr__(name: str):
+    if name == "report_generator":
+        return get_report_generator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple, Union
+
+SUPPLIER_MARKETS = {
+    "Germany": "EU",
+    "China": "Asia",
+    "India": "Asia",
+    "Vietnam": "Asia",
+    "USA": "Americas",
+    "Mexico": "Americas",
+    "Brazil": "Americas",
+    "Turkey": "MENA",
+    "UAE": "MENA",
+    "International": "Global"
+}
+
+RATING_BUCKETS = [(4.5, "4.5+"), (4.0, "4.0-4.4"), (0.0, "<4.0")]
+
+
+def rating_bucket(rating: float) -> str:
+    for threshold, label in RATING_BUCKETS:
+        if rating >= threshold:
+            return label
+    return RATING_BUCKETS[-1][1]
+
+
+def _normalize(value: Any) -> str:
+    return str(value).casefold()
+
+
+class FacetIndex:
+    def __init__(self, records: Iterable[Dict[str, Any]], facets: Dict[str, Callable[[Dict[str, Any]], Any]]):
+        self.records = list(records)
+        self.all_bits = (1 << len(self.records)) - 1
+        self._bits: Dict[str, Dict[str, int]] = {facet: {} for facet in facets}
+        self._labels: Dict[str, Dict[str, str]] = {facet: {} for facet in facets}
+
+        for position, record in enumerate(self.records):
+            for facet, key in facets.items():
+                value = key(record)
+                normalized = _normalize(value)
+                self._bits[facet][normalized] = self._bits[facet].get(normalized, 0) | (1 << position)
+                self._labels[facet].setdefault(normalized, str(value))
+
+        self._counts = {
+            facet: {self._labels[facet][value]: bits.bit_count() for value, bits in values.items()}
+            for facet, values in self._bits.items()
+        }
+
+    def facets(self) -> List[str]:
+        return list(self._bits)
+
+    def values(self, facet: str) -> List[str]:
+        return list(self._labels[facet].values())
+
+    def bits(self, facet: str, values: Union[str, Iterable[str]]) -> int:
+        if isinstance(values, str):
+            values = [values]
+        facet_bits = self._bits[facet]
+        mask = 0
+        for value in values:
+            mask |= facet_bits.get(_normalize(value), 0)
+        return mask
+
+    def select(self, **filters: Union[str, Iterable[str]]) -> int:
+        mask = self.all_bits
+        for facet, values in filters.items():
+            mask &= self.bits(facet, values)
+        return mask
+
+    def counts(self, facet: str, mask: Optional[int] = None) -> Dict[str, int]:
+        if mask is None or mask == self.all_bits:
+            return dict(self._counts[facet])
+        return {
+            self._labels[facet][value]: (bits & mask).bit_count()
+            for value, bits in self._bits[facet].items()
+            if bits & mask
+        }
+
+    def records_for(self, mask: int) -> List[Dict[str, Any]]:
+        records = []
+        while mask:
+            lowest = mask & -mask
+            records.append(self.records[lowest.bit_length() - 1])
+            mask ^= lowest
+        return records
+
+    def match(self, term: str) -> List[Tuple[str, str]]:
+        normalized = _normalize(term)
+        return [
+            (facet, self._labels[facet][normalized])
+            for facet in self._bits
+            if normalized in self._bits[facet]
+        ]
+
+    def parse_filters(self, terms: Iterable[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+        filters: Dict[str, List[str]] = {}
+        unknown = []
+        for term in terms:
+            matches = self.match(term)
+            if not matches:
+                unknown.append(term)
+            for facet, value in matches[:1]:
+                filters.setdefault(facet, []).append(value)
+        return filters, unknown
+
+
+@lru_cache(maxsize=1)
+def product_facets() -> FacetIndex:
+    from database import ProductDatabase
+
+    return FacetIndex(ProductDatabase.PRODUCTS_DATA, {
+        "category": lambda product: product["category"]
+    })
+
+
+@lru_cache(maxsize=1)
+def supplier_facets() -> FacetIndex:
+    from database import SupplierDatabase
+
+    return FacetIndex(SupplierDatabase.SUPPLIERS_DATA, {
+        "status": lambda supplier: supplier["status"],
+        "market": lambda supplier: SUPPLIER_MARKETS.get(supplier["country"], "Global"),
+        "country": lambda supplier: supplier["country"],
+        "rating": lambda supplier: rating_bucket(supplier["rating"])
+    })
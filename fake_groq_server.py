@@ -0,0 +1,137 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Any
+
+CHAT_COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+SUPPLIER_ID_PATTERN = re.compile(r"^(SUP\d+),", re.MULTILINE)
+
+
+def default_responder(request: Dict[str, Any]) -> str:
+    if request.get("response_format", {}).get("type") != "json_object":
+        return f"Анализ от {request.get('model')}"
+
+    ids = SUPPLIER_ID_PATTERN.findall(request["messages"][-1]["content"]) or [""]
+    pick = lambda supplier_id: {"supplier_id": supplier_id, "reason": f"Анализ от {request.get('model')}"}
+    return json.dumps({
+        "best_pick": pick(ids[0]),
+        "budget": pick(ids[-1]),
+        "premium": pick(ids[min(1, len(ids) - 1)]),
+        "risks": ["Проверьте сертификаты"],
+        "recommendation": {"supplier_id": ids[0], "text": "Начните с образцов"}
+    }, ensure_ascii=False)
+
+
+class FakeGroqServer:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        model_latency: Optional[Dict[str, float]] = None,
+        failures: Optional[Dict[str, List[int]]] = None,
+        responder: Callable[[Dict[str, Any]], str] = default_responder,
+        retry_after: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.failures = {model: list(codes) for model, codes in (failures or {}).items()}
+        self.responder = responder
+        self.retry_after = retry_after
+        self.rate_limit_ratio = rate_limit_ratio
+        self._random = random.Random(seed)
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = json.loads(body or b"{}")
+                status, payload, headers = fake._handle(self.path, request)
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeGroqServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handle(self, path: str, request: Dict[str, Any]):
+        if path != CHAT_COMPLETIONS_PATH:
+            return 404, {"error": {"message": f"Unknown path {path}"}}, {}
+
+        model = request.get("model", "")
+        time.sleep(self.model_latency.get(model, self.latency))
+
+        with self._lock:
+            pending = self.failures.get(model)
+            status = pending.pop(0) if pending else 200
+            if status == 200 and self.rate_limit_ratio and self._random.random() < self.rate_limit_ratio:
+                status = 429
+            self.requests.append({"model": model, "time": time.monotonic(), "request": request, "status": status})
+
+        if status != 200:
+            headers = {"Retry-After": str(self.retry_after)} if status == 429 else {}
+            return status, {"error": {"message": f"Injected error {status}", "type": "fake"}}, headers
+
+        content = self.responder(request)
+        prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        return 200, {
+            "id": f"chatcmpl-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }, {}
+
+    def models_called(self) -> List[str]:
+        with self._lock:
+            return [entry["model"] for entry in self.requests]
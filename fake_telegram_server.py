@@ -0,0 +1,143 @@
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from urllib.parse import parse_qs
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Supplier Scout", "username": "supplier_scout_bot"}
+
+
+def parse_form(content_type: str, body: bytes) -> Dict[str, Any]:
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+        )
+        return {
+            part.get_param("name", header="content-disposition"): (
+                part.get_filename() or part.get_content()
+            )
+            for part in message.iter_parts()
+        }
+    if content_type.startswith("application/json"):
+        return json.loads(body or b"{}")
+    return {name: values[0] for name, values in parse_qs(body.decode("utf-8")).items()}
+
+
+class FakeTelegramServer:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.calls: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+        self._message_id = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeTelegramServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                params = parse_form(self.headers.get("Content-Type", ""), body)
+                status, payload = fake._handle(self.path.rsplit("/", 1)[-1], params)
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeTelegramServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _message(self, chat_id: int, **fields: Any) -> Dict[str, Any]:
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **fields
+        }
+
+    def _handle(self, method: str, params: Dict[str, Any]):
+        if method == "getMe":
+            return 200, {"ok": True, "result": BOT_USER}
+
+        time.sleep(self.latency)
+        chat_id = int(params.get("chat_id", 0))
+
+        with self._lock:
+            limited = bool(self.rate_limit_ratio) and self._random.random() < self.rate_limit_ratio
+            self.calls.append({
+                "method": method,
+                "chat_id": chat_id,
+                "text": params.get("text") or params.get("caption") or "",
+                "time": time.monotonic(),
+                "status": 429 if limited else 200
+            })
+
+        if limited:
+            return 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after}
+            }
+
+        if method in ("sendMessage", "editMessageText"):
+            return 200, {"ok": True, "result": self._message(chat_id, text=params.get("text", ""))}
+        if method == "sendDocument":
+            document = {"file_id": "report", "file_unique_id": "report", "file_name": params.get("document")}
+            return 200, {"ok": True, "result": self._message(chat_id, document=document)}
+        if method in ("deleteMessage", "sendChatAction"):
+            return 200, {"ok": True, "result": True}
+        return 404, {"ok": False, "error_code": 404, "description": f"Unknown method {method}"}
+
+    def calls_for(self, chat_id: int, method: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                call for call in self.calls
+                if call["chat_id"] == chat_id and (method is None or call["method"] == method)
+            ]
@@ -0,0 +1,130 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional, Sequence, Union
+import numpy as np
+from config import Config
+from config_reload import on_config_change
+
+logger = logging.getLogger(__name__)
+
+CurrencySpec = Union[str, Sequence[str]]
+
+DEFAULT_RATES_PER_USD = {
+    "USD": 1.0,
+    "EUR": 0.92,
+    "CNY": 7.2,
+    "TRY": 32.5,
+    "INR": 83.3,
+}
+
+
+class StaticRateProvider:
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self.rates = rates
+
+    def fetch_rates(self) -> Dict[str, float]:
+        if self.rates is not None:
+            return dict(self.rates)
+
+        rates = dict(DEFAULT_RATES_PER_USD)
+        rates["RUB"] = Config.USD_TO_RUB_EXCHANGE_RATE
+        return rates
+
+
+class FileRateProvider:
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch_rates(self) -> Dict[str, float]:
+        with open(self.path, encoding="utf-8") as rates_file:
+            data = json.load(rates_file)
+
+        rates = {code.upper(): float(rate) for code, rate in data.get("rates", data).items()}
+        rates.setdefault(data.get("base", "USD").upper(), 1.0)
+        if "USD" not in rates:
+            raise ValueError(f"FX rates file {self.path} has no USD rate")
+
+        usd_rate = rates["USD"]
+        return {code: rate / usd_rate for code, rate in rates.items()}
+
+
+def create_rate_provider():
+    if Config.FX_RATES_FILE:
+        return FileRateProvider(Config.FX_RATES_FILE)
+    return StaticRateProvider()
+
+
+class FxRateTable:
+    def __init__(self, provider=None, ttl_seconds: Optional[float] = None):
+        self.provider = provider or create_rate_provider()
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.FX_CACHE_TTL_SECONDS
+        self._rates: Optional[Dict[str, float]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_rates(self) -> Dict[str, float]:
+        rates = self._rates
+        if rates is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return rates
+
+        with self._lock:
+            if self._rates is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._rates
+
+            try:
+                rates = self.provider.fetch_rates()
+            except Exception as e:
+                if self._rates is None:
+                    raise
+                logger.warning("FX rate refresh failed, keeping stale rates: %s", e)
+                rates = self._rates
+
+            self._rates = rates
+            self._loaded_at = time.monotonic()
+            return rates
+
+    def invalidate(self):
+        with self._lock:
+            self._rates = None
+
+    def rate(self, currency: str) -> float:
+        rates = self.get_rates()
+        try:
+            return rates[currency.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown currency: {currency}") from None
+
+    def rate_vector(self, currencies: CurrencySpec, shape=None) -> np.ndarray:
+        if isinstance(currencies, str):
+            return np.full(shape, self.rate(currencies))
+
+        rates = self.get_rates()
+        try:
+            vector = np.fromiter((rates[code] for code in currencies), dtype=float, count=len(currencies))
+        except KeyError as e:
+            raise ValueError(f"Unknown currency: {e.args[0]}") from None
+        return vector.reshape(shape) if shape is not None else vector
+
+    def convert(
+        self,
+        amounts,
+        from_currency: CurrencySpec,
+        to_currency: CurrencySpec
+    ) -> np.ndarray:
+        amounts = np.asarray(amounts, dtype=float)
+        from_rates = self.rate_vector(from_currency, amounts.shape)
+        to_rates = self.rate_vector(to_currency, amounts.shape)
+        return amounts / from_rates * to_rates
+
+
+fx_table = FxRateTable()
+
+
+@on_config_change("USD_TO_RUB_EXCHANGE_RATE", "FX_RATES_FILE", "FX_CACHE_TTL_SECONDS")
+def _reload_fx_table(changed):
+    if "FX_RATES_FILE" in changed:
+        fx_table.provider = create_rate_provider()
+    fx_table.ttl_seconds = Config.FX_CACHE_TTL_SECONDS
+    fx_table.invalidate()
@@ -1,86 +1,188 @@
 import asyncio
-from typing import List, Dict, Any
-from groq import Groq
+import contextvars
+import logging
+import time
+from typing import List, Dict, Any, Optional
 from config import Config
+from config_reload import on_config_change
+from database import Product
+from supplier_stats import statistics_engine
+from supplier_ranking import supplier_ranker
+from prompt_builder import prompt_builder, compact_whitespace
+from model_router import ModelRouter
+from circuit_breaker import CircuitBreaker
+from structured_analysis import (
+    AnalysisFormatError,
+    JSON_INSTRUCTIONS,
+    escape_markdown,
+    parse_analysis,
+    render_markdown,
+    render_text,
+    rule_based_analysis
+)
+
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = compact_whitespace("""
+    Вы эксперт в международной торговле и анализе поставщиков.
+    Ваша задача - анализировать поставщиков товаров для e-commerce и предоставлять действенные insights.
+
+    Анализируйте каждого поставщика по:
+    1. Конкурентоспособность цены
+    2. Время доставки и надежность
+    3. Репутация поставщика (рейтинг)
+    4. Минимальные требования к заказу
+    5. Географические преимущества/недостатки
+    6. Общая оценка рисков
+
+    Предоставляйте рекомендации в формате JSON.
+""")
+
+PROBE_PROMPT = {
+    "messages": [{"role": "user", "content": "ping"}],
+    "max_tokens": 1,
+    "prompt_tokens": 1,
+    "truncated": False
+}
 
 
 class GroqAnalyzer:
-    def __init__(self):
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
-        self.model = Config.GROQ_MODEL
+    def __init__(self, router: Optional[ModelRouter] = None, breaker: Optional[CircuitBreaker] = None):
+        self.router = router or ModelRouter()
+        self.breaker = breaker or CircuitBreaker("groq")
         self.temperature = Config.GROQ_TEMPERATURE
+        self._probe_task: Optional[asyncio.Task] = None
 
     async def analyze_product_suppliers(
         self,
-        product: Dict[str, Any],
-        suppliers: List[Dict[str, Any]]
+        product: Product,
+        suppliers: List[Dict[str, Any]],
+        statistics: Optional[Dict[str, Any]] = None,
+        top_suppliers: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
+        if top_suppliers is None:
+            top_suppliers = supplier_ranker.top_k(suppliers, Config.MAX_SUPPLIERS_PER_PRODUCT)
+        stats = statistics if statistics is not None else self._calculate_statistics(suppliers)
+
+        if not self.breaker.allow():
+            self._schedule_probe()
+            return self._fallback_analysis(product, suppliers, stats, top_suppliers)
+
+        started = time.monotonic()
         try:
-            sorted_suppliers = sorted(suppliers, key=lambda x: x["final_price_usd"])
-            supplier_info = self._format_supplier_info(sorted_suppliers)
-
-            system_prompt = self._get_system_prompt()
-            user_prompt = self._get_user_prompt(product, supplier_info)
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=600
+            completion = await self.router.complete(
+                lambda model: {
+                    **prompt_builder.build(
+                        model,
+                        self._get_system_prompt(),
+                        lambda supplier_table: self._get_user_prompt(product, supplier_table, stats),
+                        top_suppliers
+                    ),
+                    "response_format": {"type": "json_object"}
+                },
+                self.temperature
             )
+        except asyncio.CancelledError:
+            # a call cut off by the search deadline still tells us the upstream is slow
+            latency = time.monotonic() - started
+            if latency >= self.breaker.slow_call_seconds:
+                self.breaker.record(False, latency)
+            raise
+        except Exception as e:
+            self.breaker.record(False, time.monotonic() - started)
+            logger.error("Groq analysis of %s failed: %s", product.name, e)
+            return self._fallback_analysis(product, suppliers, stats, top_suppliers)
 
-            analysis = response.choices[0].message.content.strip()
-            stats = self._calculate_statistics(sorted_suppliers)
+        self.breaker.record(True, time.monotonic() - started)
 
-            return {
-                "product_name": product["name"],
-                "analysis": analysis,
-                "statistics": stats,
-                "top_suppliers": sorted_suppliers[:3]
-            }
+        try:
+            structured = parse_analysis(
+                completion["content"],
+                top_suppliers[:completion["prompt"]["supplier_count"]]
+            )
+        except AnalysisFormatError as e:
+            logger.warning("Unstructured analysis for %s from %s: %s", product.name, completion["model"], e)
+            structured = None
 
+        return {
+            "product_name": product.name,
+            "analysis": render_text(structured) if structured else completion["content"],
+            "structured": structured,
+            "statistics": stats,
+            "top_suppliers": top_suppliers[:3],
+            "model": completion["model"]
+        }
+
+    def _fallback_analysis(
+        self,
+        product: Product,
+        suppliers: List[Dict[str, Any]],
+        stats: Dict[str, Any],
+        top_suppliers: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        structured = rule_based_analysis(suppliers, stats, top_suppliers)
+        return {
+            "product_name": product.name,
+            "analysis": render_text(structured) if structured else "Не удалось сгенерировать анализ в данный момент.",
+            "structured": structured,
+            "statistics": stats,
+            "top_suppliers": top_suppliers[:3],
+            "fallback": "rules"
+        }
+
+    def _schedule_probe(self):
+        if self._probe_task is None and self.breaker.ready_to_probe():
+            # a fresh context keeps the probe out of the caller's token meter and deadline
+            self._probe_task = asyncio.create_task(self._probe(), context=contextvars.Context())
+
+    async def _probe(self):
+        try:
+            await self.router.complete(lambda model: PROBE_PROMPT, 0.0)
+            self.breaker.probe_result(True)
         except Exception as e:
-            print(f"Groq analysis error: {e}")
-            return {
-                "product_name": product["name"],
-                "analysis": "Не удалось сгенерировать анализ в данный момент.",
-                "statistics": {},
-                "top_suppliers": []
-            }
+            logger.warning("Groq probe failed: %s", e)
+            self.breaker.probe_result(False)
+        finally:
+            self._probe_task = None
 
     async def analyze_multiple_products(
         self,
         products_data: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        analyses = []
-
-        for product_data in products_data:
-            try:
-                analysis = await self.analyze_product_suppliers(
+        results = await asyncio.gather(
+            *(
+                self.analyze_product_suppliers(
                     product_data["product"],
-                    product_data["suppliers"]
+                    product_data["suppliers"],
+                    product_data.get("statistics"),
+                    product_data.get("top_suppliers")
                 )
-                analyses.append(analysis)
-
-                await asyncio.sleep(0.5)
+                for product_data in products_data
+            ),
+            return_exceptions=True
+        )
 
-            except Exception as e:
-                print(f"Error analyzing product {product_data['product']['name']}: {e}")
-                analyses.append({
-                    "product_name": product_data["product"]["name"],
+        analyses = []
+        for product_data, result in zip(products_data, results):
+            if isinstance(result, Exception):
+                logger.error("Error analyzing product %s: %s", product_data["product"].name, result)
+                result = {
+                    "product_name": product_data["product"].name,
                     "analysis": "Анализ не удался.",
                     "statistics": {},
                     "top_suppliers": []
-                })
+                }
+            analyses.append(result)
 
         return analyses
 
     def format_analysis_for_telegram(self, analysis: Dict[str, Any]) -> str:
-        product_name = analysis["product_name"]
-        analysis_text = analysis["analysis"]
+        product_name = escape_markdown(analysis["product_name"])
+        structured = analysis.get("structured")
+        analysis_text = render_markdown(structured) if structured else escape_markdown(analysis["analysis"])
+        if analysis.get("fallback"):
+            analysis_text = f"⚙️ AI временно недоступен, подборка по правилам:\n{analysis_text}"
         stats = analysis["statistics"]
 
         formatted = (
@@ -89,9 +191,10 @@ class GroqAnalyzer:
             "📊 **БЫСТРАЯ СТАТИСТИКА:**\n"
             f"• Поставщики проанализированы: {stats.get('total_suppliers_analyzed', 'N/A')}\n"
             f"• Диапазон цен: {stats.get('price_range_usd', 'N/A')}\n"
-            f"• Средний рейтинг: {stats.get('average_rating', 'N/A'):.1f}/5\n"
-            f"• Лучшая цена: ${stats.get('best_price_usd', 'N/A'):.2f} "
-            f"({stats.get('best_supplier', 'N/A')})\n\n"
+            f"• Медианная цена: {self._format_stat(stats, 'median_price_usd', '${:.2f}')}\n"
+            f"• Средний рейтинг: {self._format_stat(stats, 'average_rating', '{:.1f}/5')}\n"
+            f"• Лучшая цена: {self._format_stat(stats, 'best_price_usd', '${:.2f}')} "
+            f"({escape_markdown(stats.get('best_supplier', 'N/A'))})\n\n"
             "💡 **СЛЕДУЮЩИЕ ШАГИ:**\n"
             "1. Свяжитесь с топ 3 поставщиками для образцов\n"
             "2. Обсудите лучшие условия MOQ\n"
@@ -101,66 +204,93 @@ class GroqAnalyzer:
 
         return formatted
 
-    def _format_supplier_info(self, suppliers: List[Dict[str, Any]]) -> List[str]:
-        supplier_info = []
-        for i, supplier in enumerate(suppliers[:5], 1):
-            supplier_info.append(
-                f"{i}. {supplier['name']} ({supplier['country']}): "
-                f"${supplier['final_price_usd']:.2f}, "
-                f"Rating: {supplier['rating']}/5, "
-                f"Lead Time: {supplier['lead_time']}, "
-                f"MOQ: ${supplier['moq']}"
-            )
-        return supplier_info
+    @staticmethod
+    def _format_stat(stats: Dict[str, Any], key: str, template: str) -> str:
+        value = stats.get(key)
+        return template.format(value) if value is not None else "N/A"
 
     def _get_system_prompt(self) -> str:
-        return """Вы эксперт в международной торговле и анализе поставщиков.
-        Ваша задача - анализировать поставщиков товаров для e-commerce и предоставлять действенные insights.
-
-        Анализируйте каждого поставщика по:
-        1. Конкурентоспособность цены
-        2. Время доставки и надежность
-        3. Репутация поставщика (рейтинг)
-        4. Минимальные требования к заказу
-        5. Географические преимущества/недостатки
-        6. Общая оценка рисков
-
-        Предоставляйте рекомендации в структурированном формате."""
+        return SYSTEM_PROMPT
 
     def _get_user_prompt(
         self,
-        product: Dict[str, Any],
-        supplier_info: List[str]
+        product: Product,
+        supplier_table: str,
+        stats: Dict[str, Any]
     ) -> str:
         return (
-            f"Пожалуйста, проанализируйте поставщиков для следующего товара:\n\n"
-            f"ТОВАР: {product['name']}\n"
-            f"КАТЕГОРИЯ: {product['category']}\n"
-            f"БАЗОВЫЙ ДИАПАЗОН ЦЕН: ${product['base_price_usd']:.2f}\n\n"
-            f"ТОП ПОСТАВЩИКИ:\n{' | '.join(supplier_info)}\n\n"
-            "Пожалуйста, предоставьте:\n"
-            "1. ЛУЧШИЙ ВЫБОР: Какой поставщик предлагает лучшую ценность?\n"
-            "2. БЮДЖЕТНЫЙ ВАРИАНТ: Лучший вариант для низкого бюджета?\n"
-            "3. ПРЕМИУМ ВАРИАНТ: Лучший для качества/надежности?\n"
-            "4. ОЦЕНКА РИСКОВ: Есть ли красные флаги?\n"
-            "5. РЕКОМЕНДАЦИЯ: Общая рекомендация с обоснованием.\n\n"
-            "Форматируйте ответ четко с маркерами и эмодзи."
+            f"Проанализируйте поставщиков товара.\n"
+            f"ТОВАР: {product.name}\n"
+            f"КАТЕГОРИЯ: {product.category}\n"
+            f"БАЗОВАЯ ЦЕНА: ${product.base_price_usd:.2f}\n"
+            f"{self._format_market_summary(stats)}\n"
+            f"ТОП ПОСТАВЩИКИ (CSV, цена с доставкой и пошлиной):\n{supplier_table}\n"
+            "Дайте:\n"
+            "1. ЛУЧШИЙ ВЫБОР: лучшая ценность\n"
+            "2. БЮДЖЕТНЫЙ ВАРИАНТ\n"
+            "3. ПРЕМИУМ ВАРИАНТ: качество/надежность\n"
+            "4. ОЦЕНКА РИСКОВ: красные флаги\n"
+            "5. РЕКОМЕНДАЦИЯ с обоснованием\n"
+            f"{JSON_INSTRUCTIONS}"
+        )
+
+    def _format_market_summary(self, stats: Dict[str, Any]) -> str:
+        if not stats.get("total_suppliers_analyzed"):
+            return "РЫНОК: нет данных"
+
+        summary = (
+            f"РЫНОК: {stats['total_suppliers_analyzed']} поставщиков, "
+            f"цены {stats['price_range_usd']}, "
+            f"медиана ${stats['median_price_usd']:.2f}, "
+            f"средневзвешенная по рейтингу ${stats['rating_weighted_price_usd']:.2f}"
         )
+        if "mean_lead_time_days" in stats:
+            summary += (
+                f", доставка {stats['min_lead_time_days']:.0f}-{stats['max_lead_time_days']:.0f} дн. "
+                f"(в среднем {stats['mean_lead_time_days']:.1f})"
+            )
+        return summary
 
     def _calculate_statistics(self, suppliers: List[Dict[str, Any]]) -> Dict[str, Any]:
-        top_5_suppliers = suppliers[:5]
-        return {
-            "total_suppliers_analyzed": len(suppliers),
-            "price_range_usd": (
-                f"${suppliers[0]['final_price_usd']:.2f} - "
-                f"${suppliers[-1]['final_price_usd']:.2f}"
-            ),
-            "average_rating": sum(s['rating'] for s in top_5_suppliers) / 5,
-            "best_supplier": suppliers[0]['name'],
-            "best_price_usd": suppliers[0]['final_price_usd'],
-            "worst_supplier": suppliers[-1]['name'],
-            "worst_price_usd": suppliers[-1]['final_price_usd']
-        }
+        return statistics_engine.calculate(suppliers)
+
+
+_groq_analyzer: Optional[GroqAnalyzer] = None
+
+
+def get_groq_analyzer() -> GroqAnalyzer:
+    global _groq_analyzer
+    if _groq_analyzer is None:
+        _groq_analyzer = GroqAnalyzer()
+    return _groq_analyzer
 
 
-groq_analyzer = GroqAnalyzer()
\ No newline at end of file
+def __getattr__(name: str):
+    if name == "groq_analyzer":
+        return get_groq_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@on_config_change("GROQ_TEMPERATURE", "GROQ_MODELS")
+def _reload_analyzer(changed):
+    if _groq_analyzer is not None:
+        _groq_analyzer.temperature = Config.GROQ_TEMPERATURE
+        _groq_analyzer.router.resize(Config.GROQ_MODELS)
+
+
+@on_config_change(
+    "CIRCUIT_WINDOW",
+    "CIRCUIT_MIN_CALLS",
+    "CIRCUIT_FAILURE_RATIO",
+    "CIRCUIT_SLOW_CALL_SECONDS",
+    "CIRCUIT_OPEN_SECONDS"
+)
+def _reload_circuit_breaker(changed):
+    if _groq_analyzer is not None:
+        _groq_analyzer.breaker.configure(
+            Config.CIRCUIT_WINDOW,
+            Config.CIRCUIT_MIN_CALLS,
+            Config.CIRCUIT_FAILURE_RATIO,
+            Config.CIRCUIT_SLOW_CALL_SECONDS,
+            Config.CIRCUIT_OPEN_SECONDS
+        )
@@ -0,0 +1,180 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from config import Config
+from database import ProductDatabase
+
+STAGE_CREATED = "created"
+STAGE_PRICED = "priced"
+STAGE_REPORTED = "reported"
+STAGE_ANALYZED = "analyzed"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+FINISHED_STAGES = (STAGE_DONE, STAGE_FAILED)
+
+CACHED_ANALYSIS = "cached_analysis"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER,
+    query TEXT NOT NULL,
+    product_ids TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    products_data TEXT,
+    report_path TEXT,
+    analyses TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_stage ON jobs (stage, updated_at);
+"""
+
+
+def connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
+
+
+@contextmanager
+def immediate_transaction(connection: sqlite3.Connection):
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def serialize_product_data(product_data: Dict[str, Any]) -> Dict[str, Any]:
+    serialized = dict(product_data)
+    serialized["product"] = product_data["product"].id
+    serialized.pop(CACHED_ANALYSIS, None)
+    return serialized
+
+
+def deserialize_product_data(product_data: Dict[str, Any]) -> Dict[str, Any]:
+    deserialized = dict(product_data)
+    deserialized["product"] = ProductDatabase.get_product_by_id(product_data["product"])
+    return deserialized
+
+
+class JobStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.STATE_DB_PATH
+        self._connection = connect(self.path)
+        self._lock = threading.Lock()
+        self._connection.executescript(SCHEMA)
+
+    def create_job(self, chat_id: int, user_id: Optional[int], query: str, product_ids: List[str]) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (chat_id, user_id, query, product_ids, stage, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chat_id, user_id, query, json.dumps(product_ids), STAGE_CREATED, now, now)
+            )
+            return cursor.lastrowid
+
+    def save_priced(self, job_id: int, products_data: List[Dict[str, Any]]):
+        self._update(job_id, STAGE_PRICED, products_data=json.dumps(
+            [serialize_product_data(product_data) for product_data in products_data],
+            ensure_ascii=False
+        ))
+
+    def save_report(self, job_id: int, report_path: str):
+        self._update(job_id, STAGE_REPORTED, report_path=report_path)
+
+    def save_analyses(self, job_id: int, analyses: List[Dict[str, Any]]):
+        self._update(job_id, STAGE_ANALYZED, analyses=json.dumps(analyses, ensure_ascii=False))
+
+    def complete(self, job_id: int):
+        self._update(job_id, STAGE_DONE)
+
+    def fail(self, job_id: int, error: str):
+        self._update(job_id, STAGE_FAILED, error=error)
+
+    def start_attempt(self, job_id: int) -> int:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (time.time(), job_id)
+            )
+            row = self._connection.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["attempts"] if row else 0
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._deserialize_job(row) if row else None
+
+    def unfinished_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM jobs WHERE stage NOT IN ({', '.join('?' * len(FINISHED_STAGES))}) "
+                "ORDER BY created_at",
+                FINISHED_STAGES
+            ).fetchall()
+        return [self._deserialize_job(row) for row in rows]
+
+    def stage_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute("SELECT stage, COUNT(*) AS jobs FROM jobs GROUP BY stage").fetchall()
+        return {row["stage"]: row["jobs"] for row in rows}
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        with self._lock:
+            cursor = self._connection.execute(
+                f"DELETE FROM jobs WHERE stage IN ({', '.join('?' * len(FINISHED_STAGES))}) "
+                "AND updated_at < ?",
+                (*FINISHED_STAGES, time.time() - older_than_seconds)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _update(self, job_id: int, stage: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        values = list(fields.values())
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE jobs SET stage = ?, updated_at = ?{', ' + assignments if assignments else ''} "
+                "WHERE id = ?",
+                (stage, time.time(), *values, job_id)
+            )
+
+    def _deserialize_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["product_ids"] = json.loads(job["product_ids"])
+        if job["products_data"]:
+            job["products_data"] = [
+                deserialize_product_data(product_data)
+                for product_data in json.loads(job["products_data"])
+            ]
+        if job["analyses"]:
+            job["analyses"] = json.loads(job["analyses"])
+        return job
+
+
+_job_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
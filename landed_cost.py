@@ -0,0 +1,102 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional
+import numpy as np
+from config import Config
+from database import Product
+
+DIMENSIONS_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+
+FREIGHT_RATES_USD_PER_KG = {
+    "International": {"Russia": 6.0, "Germany": 5.5, "USA": 5.5},
+    "China": {"Russia": 4.5, "Germany": 5.0, "USA": 5.5},
+    "Germany": {"Russia": 3.5, "Germany": 1.5, "USA": 6.5},
+    "USA": {"Russia": 8.0, "Germany": 6.5, "USA": 2.0},
+    "India": {"Russia": 5.5, "Germany": 5.0, "USA": 6.0},
+    "Turkey": {"Russia": 3.0, "Germany": 3.5, "USA": 6.5},
+    "Vietnam": {"Russia": 5.0, "Germany": 5.5, "USA": 5.5},
+    "Mexico": {"Russia": 8.5, "Germany": 7.0, "USA": 2.5},
+    "UAE": {"Russia": 4.0, "Germany": 4.5, "USA": 6.0},
+    "Brazil": {"Russia": 9.0, "Germany": 7.5, "USA": 5.0},
+}
+
+DUTY_RATES_PERCENT = {
+    "Электроника": 5.0,
+    "Фитнес": 7.5,
+    "Спорт": 7.5,
+    "Дом и офис": 10.0,
+    "Аксессуары": 12.0,
+    "Путешествия": 10.0,
+}
+
+
+@lru_cache(maxsize=1024)
+def chargeable_weight_kg(weight_kg: float, dimensions_cm: str, divisor: float) -> float:
+    dimensions = [float(value.replace(",", ".")) for value in DIMENSIONS_PATTERN.findall(dimensions_cm or "")]
+    if len(dimensions) != 3:
+        return weight_kg
+
+    volumetric_weight = dimensions[0] * dimensions[1] * dimensions[2] / divisor
+    return max(weight_kg, volumetric_weight)
+
+
+class LandedCostModel:
+    def __init__(
+        self,
+        freight_rates: Optional[Dict[str, Dict[str, float]]] = None,
+        duty_rates: Optional[Dict[str, float]] = None
+    ):
+        freight_rates = freight_rates or FREIGHT_RATES_USD_PER_KG
+        self.duty_rates = duty_rates or DUTY_RATES_PERCENT
+
+        destinations = sorted({dest for routes in freight_rates.values() for dest in routes})
+        self.origin_index = {origin: idx for idx, origin in enumerate(freight_rates)}
+        self.destination_index = {dest: idx for idx, dest in enumerate(destinations)}
+
+        self.freight_matrix = np.full((len(self.origin_index) + 1, len(destinations)), np.nan)
+        for origin, routes in freight_rates.items():
+            for destination, rate in routes.items():
+                self.freight_matrix[self.origin_index[origin], self.destination_index[destination]] = rate
+
+    def freight_rates(self, origins: List[str], destination: str) -> np.ndarray:
+        unknown_row = len(self.origin_index)
+        rows = np.fromiter(
+            (self.origin_index.get(origin, unknown_row) for origin in origins),
+            dtype=np.intp,
+            count=len(origins)
+        )
+        column = self.destination_index.get(destination)
+        if column is None:
+            return np.full(len(origins), np.nan)
+        return self.freight_matrix[rows, column]
+
+    def duty_percent(self, category: str, config=Config) -> float:
+        return self.duty_rates.get(category, config.DEFAULT_ADDITIONAL_COSTS_PERCENT)
+
+    def calculate(
+        self,
+        product: Product,
+        origins: List[str],
+        price_usd: np.ndarray,
+        destination: Optional[str] = None,
+        config=Config
+    ) -> Dict[str, np.ndarray]:
+        destination = destination or config.DESTINATION_COUNTRY
+        weight = chargeable_weight_kg(product.weight_kg, product.dimensions_cm, config.VOLUMETRIC_DIVISOR)
+
+        rates = self.freight_rates(origins, destination)
+        fallback = price_usd * (config.DEFAULT_DELIVERY_PERCENT / 100)
+        freight_usd = np.where(np.isnan(rates), fallback, rates * weight)
+
+        duty_percent = np.full(len(origins), self.duty_percent(product.category, config))
+        duty_usd = (price_usd + freight_usd) * (duty_percent / 100)
+
+        return {
+            "chargeable_weight_kg": weight,
+            "freight_usd": freight_usd,
+            "duty_percent": duty_percent,
+            "duty_usd": duty_usd
+        }
+
+
+landed_cost_model = LandedCostModel()
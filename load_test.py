@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from config import Config
+
+DONE_MARKER = "Анализ завершен"
+ERROR_MARKER = "❌ Ошибка"
+REPLY_METHODS = ("sendMessage", "editMessageText")
+LOAD_TEST_TOKEN = "123456:load-test"
+SAMPLE_INTERVAL_SECONDS = 0.05
+POLL_INTERVAL_SECONDS = 0.01
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize_latency(seconds: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(seconds),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(seconds, 50) * 1000, 1),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 1),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 1),
+        "max_ms": round(max(seconds, default=0.0) * 1000, 1)
+    }
+
+
+def summarize_depth(samples: List[int]) -> Dict[str, float]:
+    return {
+        "mean": round(sum(samples) / len(samples), 2) if samples else 0.0,
+        "p95": percentile(samples, 95),
+        "max": max(samples, default=0)
+    }
+
+
+def random_basket(rng: random.Random, products: List[Dict[str, Any]], max_items: int) -> str:
+    picked = rng.sample(products, rng.randint(1, min(max_items, len(products))))
+    return ", ".join(
+        rng.choice([product["name"], product["name"].lower(), " ".join(product["full_name"].split()[:3])])
+        for product in picked
+    )
+
+
+def search_update(update_id: int, user_id: int, text: str) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "text": text
+        }
+    }
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.stage_errors: Dict[str, int] = defaultdict(int)
+        self.depths: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.completed = 0
+
+    def observe_stage(self, stage: str, seconds: float, failed: bool, queue_depth: int):
+        self.latencies[stage].append(seconds)
+        self.depths[f"{stage}_queue"].append(queue_depth)
+        if failed:
+            self.stage_errors[stage] += 1
+
+
+@contextmanager
+def isolated_state(state_dir: str, groq_base_url: str, telegram_base_url: str):
+    import analysis_cache
+    import groq_analyzer
+    import job_store
+    import price_history
+    import user_settings
+    from groq import AsyncGroq
+    from model_router import ModelRouter
+
+    state_path = os.path.join(state_dir, "state.sqlite3")
+    saved_config = {name: getattr(Config, name) for name in ("TELEGRAM_TOKEN", "TELEGRAM_BASE_URL")}
+    saved = [
+        (job_store, "_job_store", job_store.JobStore(state_path)),
+        (analysis_cache, "_analysis_cache", analysis_cache.AnalysisCache()),
+        (analysis_cache, "_request_tracker", analysis_cache.RequestTracker(state_path)),
+        (user_settings, "_user_settings_store", user_settings.UserSettingsStore(state_path)),
+        (price_history, "_price_history_writer", price_history.PriceHistoryWriter(
+            price_history.PriceHistoryStore(os.path.join(state_dir, "history.sqlite3"))
+        )),
+        (groq_analyzer, "_groq_analyzer", groq_analyzer.GroqAnalyzer(ModelRouter(
+            client=AsyncGroq(api_key="load-test", base_url=groq_base_url, max_retries=0)
+        )))
+    ]
+    previous = [(module, name, getattr(module, name)) for module, name, _ in saved]
+
+    Config.TELEGRAM_TOKEN = LOAD_TEST_TOKEN
+    Config.TELEGRAM_BASE_URL = telegram_base_url
+    for module, name, value in saved:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved_config.items():
+            setattr(Config, name, value)
+        for module, name, value in previous:
+            setattr(module, name, value)
+
+
+class LoadTest:
+    def __init__(
+        self,
+        users: int = 10,
+        searches_per_user: int = 2,
+        think_time: float = 0.5,
+        max_basket: int = 3,
+        groq_latency: float = 0.2,
+        groq_rate_limit: float = 0.0,
+        telegram_latency: float = 0.01,
+        telegram_rate_limit: float = 0.0,
+        search_timeout: float = 120.0,
+        seed: int = 0
+    ):
+        self.users = users
+        self.searches_per_user = searches_per_user
+        self.think_time = think_time
+        self.max_basket = max_basket
+        self.groq_latency = groq_latency
+        self.groq_rate_limit = groq_rate_limit
+        self.telegram_latency = telegram_latency
+        self.telegram_rate_limit = telegram_rate_limit
+        self.search_timeout = search_timeout
+        self.seed = seed
+        self.stats = LoadStats()
+        self._in_flight = 0
+        self._update_id = 0
+
+    async def _wait_for_reply(self, telegram, chat_id: int, answered: int) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + self.search_timeout
+        while time.monotonic() < deadline:
+            replies = [
+                call for call in telegram.calls_for(chat_id)
+                if call["status"] == 200 and call["method"] in REPLY_METHODS
+                and (DONE_MARKER in call["text"] or ERROR_MARKER in call["text"])
+            ]
+            if len(replies) > answered:
+                return replies[answered]
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        return None
+
+    async def _simulate_user(self, application, telegram, user_id: int, rng: random.Random):
+        from database import ProductDatabase
+        from telegram import Update
+
+        for answered in range(self.searches_per_user):
+            if self.think_time:
+                await asyncio.sleep(rng.expovariate(1 / self.think_time))
+
+            self._update_id += 1
+            text = random_basket(rng, ProductDatabase.PRODUCTS_DATA, self.max_basket)
+            started = time.monotonic()
+            self._in_flight += 1
+            await application.update_queue.put(
+                Update.de_json(search_update(self._update_id, user_id, text), application.bot)
+            )
+
+            reply = await self._wait_for_reply(telegram, user_id, answered)
+            self._in_flight -= 1
+            if reply is None:
+                self.stats.errors["timeout"] += 1
+                return
+            if ERROR_MARKER in reply["text"]:
+                self.stats.errors["failed"] += 1
+                continue
+            self.stats.completed += 1
+            self.stats.latencies["end_to_end"].append(reply["time"] - started)
+
+    async def _sample(self, application):
+        while True:
+            self.stats.depths["updates"].append(application.update_queue.qsize())
+            self.stats.depths["searches_in_flight"].append(self._in_flight)
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    async def _drive(self, telegram) -> float:
+        import user_settings
+        from cancellation import active_searches
+        from job_store import STAGE_FAILED, get_job_store
+        from main import build_application
+        from pipeline import observe_stages
+        from price_history import get_price_history_writer
+
+        rng = random.Random(self.seed)
+        user_ids = [100_000 + index for index in range(self.users)]
+        for user_id in user_ids:
+            user_settings.get_user_settings_store().update(user_id, daily_requests=self.searches_per_user)
+
+        application = build_application(0)
+        async with application:
+            await application.start()
+            sampler = asyncio.create_task(self._sample(application))
+            started = time.monotonic()
+            try:
+                with observe_stages(self.stats.observe_stage):
+                    await asyncio.gather(*(
+                        self._simulate_user(application, telegram, user_id, random.Random(rng.random()))
+                        for user_id in user_ids
+                    ))
+            finally:
+                duration = time.monotonic() - started
+                sampler.cancel()
+                # jobs keep cleaning up after the final reply; stopping the bot under them fails their requests
+                if not await active_searches.drain(self.search_timeout):
+                    self.stats.errors["not_drained"] += len(active_searches)
+                await active_searches.cancel_all()
+                await application.stop()
+        failed_jobs = get_job_store().stage_counts().get(STAGE_FAILED, 0)
+        if failed_jobs:
+            self.stats.errors["job_failed"] += failed_jobs
+        await get_price_history_writer().close()
+        return duration
+
+    def run(self) -> Dict[str, Any]:
+        from fake_groq_server import FakeGroqServer
+        from fake_telegram_server import FakeTelegramServer
+
+        with tempfile.TemporaryDirectory() as state_dir, \
+                FakeTelegramServer(self.telegram_latency, self.telegram_rate_limit, seed=self.seed) as telegram, \
+                FakeGroqServer(self.groq_latency, rate_limit_ratio=self.groq_rate_limit, seed=self.seed) as groq, \
+                isolated_state(state_dir, groq.base_url, telegram.base_url):
+            duration = asyncio.run(self._drive(telegram))
+            return self.report(duration, telegram, groq)
+
+    def report(self, duration: float, telegram, groq) -> Dict[str, Any]:
+        searches = self.users * self.searches_per_user
+        errors = sum(self.stats.errors.values())
+        return {
+            "users": self.users,
+            "searches": searches,
+            "completed": self.stats.completed,
+            "errors": dict(self.stats.errors),
+            "error_rate": round(errors / searches, 4) if searches else 0.0,
+            "duration_seconds": round(duration, 3),
+            "throughput_per_second": round(self.stats.completed / duration, 3) if duration else 0.0,
+            "latency": {stage: summarize_latency(values) for stage, values in self.stats.latencies.items()},
+            "stage_errors": dict(self.stats.stage_errors),
+            "queue_depth": {name: summarize_depth(samples) for name, samples in self.stats.depths.items()},
+            "telegram": {
+                "calls": len(telegram.calls),
+                "rate_limited": sum(call["status"] == 429 for call in telegram.calls)
+            },
+            "groq": {
+                "calls": len(groq.requests),
+                "rate_limited": sum(request["status"] == 429 for request in groq.requests)
+            }
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Users: {report['users']}, searches: {report['searches']}, completed: {report['completed']}",
+        f"Duration: {report['duration_seconds']:.1f}s, throughput: {report['throughput_per_second']:.2f} searches/s",
+        f"Error rate: {report['error_rate']:.2%} {report['errors'] or ''}".rstrip(),
+        "",
+        f"{'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    ]
+    for stage, summary in report["latency"].items():
+        lines.append(
+            f"{stage:<14}{summary['count']:>7}{summary['p50_ms']:>10.1f}{summary['p95_ms']:>10.1f}"
+            f"{summary['p99_ms']:>10.1f}{summary['max_ms']:>10.1f}"
+        )
+    lines += ["", f"{'queue':<20}{'mean':>8}{'p95':>8}{'max':>8}"]
+    for name, summary in report["queue_depth"].items():
+        lines.append(f"{name:<20}{summary['mean']:>8}{summary['p95']:>8}{summary['max']:>8}")
+    if report["stage_errors"]:
+        lines.append(f"\nStage errors: {report['stage_errors']}")
+    lines.append(
+        f"\nTelegram calls: {report['telegram']['calls']} (429: {report['telegram']['rate_limited']}), "
+        f"Groq calls: {report['groq']['calls']} (429: {report['groq']['rate_limited']})"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота на локальных fake Telegram и Groq")
+    parser.add_argument("--users", type=int, default=10, help="Число одновременных пользователей")
+    parser.add_argument("--searches", type=int, default=2, help="Поисков на пользователя")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Средняя пауза между поисками, с")
+    parser.add_argument("--max-basket", type=int, default=3, help="Максимум товаров в одном запросе")
+    parser.add_argument("--groq-latency", type=float, default=0.2, help="Задержка fake Groq, с")
+    parser.add_argument("--groq-429", type=float, default=0.0, help="Доля ответов 429 от Groq")
+    parser.add_argument("--telegram-latency", type=float, default=0.01, help="Задержка fake Telegram, с")
+    parser.add_argument("--telegram-429", type=float, default=0.0, help="Доля ответов 429 от Telegram")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Таймаут одного поиска, с")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Вывести отчет в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = LoadTest(
+        users=args.users,
+        searches_per_user=args.searches,
+        think_time=args.think_time,
+        max_basket=args.max_basket,
+        groq_latency=args.groq_latency,
+        groq_rate_limit=args.groq_429,
+        telegram_latency=args.telegram_latency,
+        telegram_rate_limit=args.telegram_429,
+        search_timeout=args.timeout,
+        seed=args.seed
+    ).run()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2) if args.json else format_report(report))
+    return 0 if report["completed"] == report["searches"] and not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
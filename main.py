@@ -1,7 +1,10 @@
-import os
 import asyncio
+import os
+import signal
+import time
 import logging
 from pathlib import Path
+from typing import Optional
 
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
@@ -9,8 +12,6 @@ from telegram.constants import ParseMode
 
 from config import Config
 from database import product_db, Product
-from excel_generator import report_generator
-from groq_analyzer import groq_analyzer
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -57,12 +58,16 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 /start - Приветственное сообщение и инструкции
 /help - Это справочное сообщение
 /examples - Примеры продуктов
+/history <товар> - История цен за 30 дней
+/category <категория> - Товары категории
+/suppliers <фильтры> - Поставщики, например `/suppliers Premium EU`
+/settings - Валюта, число поставщиков, формат отчета и лимиты
 
 **Как искать:**
 • Отправьте названия товаров, разделенные запятыми
 • Используйте распространенные названия товаров
 • Будьте конкретны, когда нужно
-• Максимум 5 продуктов за запрос
+• Максимум 10 продуктов за запрос, повторы считаются один раз
 
 **Примеры поиска:**
 • `беспроводные наушники, смарт-часы`
@@ -121,6 +126,155 @@ async def examples_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(examples_text, parse_mode=ParseMode.MARKDOWN)
 
 
+async def category_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from facets import product_facets
+
+    index = product_facets()
+    category = " ".join(context.args or []).strip()
+    mask = index.select(category=category) if category else 0
+
+    if not mask:
+        categories = "\n".join(
+            f"• {name} ({count})" for name, count in sorted(index.counts("category").items())
+        )
+        await update.message.reply_text(
+            f"📂 **Категории товаров:**\n{categories}\n\nПример: `/category Электроника`",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        return
+
+    products = [Product(record) for record in index.records_for(mask)]
+    product_lines = "\n".join(f"• {product.name} — от ${product.base_price_usd:.2f}" for product in products)
+    await update.message.reply_text(
+        f"📂 **{products[0].category}** ({len(products)})\n\n{product_lines}\n\n"
+        "Отправьте названия товаров через запятую, чтобы начать анализ.",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+async def suppliers_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from facets import supplier_facets
+
+    index = supplier_facets()
+    facet_filters, unknown = index.parse_filters(context.args or [])
+    mask = index.select(**facet_filters)
+    suppliers = index.records_for(mask)
+
+    lines = [
+        f"• {supplier['name']} — {supplier['country']}, {supplier['status']}, ⭐ {supplier['rating']}"
+        for supplier in sorted(suppliers, key=lambda supplier: -supplier["rating"])
+    ]
+    markets = ", ".join(f"{market}: {count}" for market, count in sorted(index.counts("market", mask).items()))
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(index.counts("status", mask).items()))
+
+    text = f"🏭 Поставщики ({len(suppliers)})\n\n" + ("\n".join(lines) or "Ничего не найдено.")
+    if suppliers:
+        text += f"\n\n📊 Рынки: {markets}\n📊 Статусы: {statuses}"
+    if unknown:
+        text += f"\n\n❓ Неизвестные фильтры: {', '.join(unknown)}"
+    text += (
+        f"\n\nФильтры: {', '.join(index.values('status'))}, "
+        f"{', '.join(index.values('market'))}, страны, рейтинг {', '.join(index.values('rating'))}"
+    )
+
+    await update.message.reply_text(text)
+
+
+async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from price_history import get_price_history_writer
+
+    product_name = " ".join(context.args or []).strip()
+    if not product_name:
+        await update.message.reply_text(
+            "Укажите товар: `/history рюкзак`",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        return
+
+    product = product_db.find_product_by_name(product_name)
+    if not product:
+        await update.message.reply_text(
+            "❌ Продукт не найден. Попробуйте другие поисковые термины.",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        return
+
+    writer = get_price_history_writer()
+    await writer.flush()
+    series = await asyncio.to_thread(writer.store.daily_series, product.id, Config.PRICE_HISTORY_DAYS)
+    best = await asyncio.to_thread(writer.store.min_over, product.id, Config.PRICE_HISTORY_DAYS)
+
+    await update.message.reply_text(
+        _format_price_history(product, series, best),
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+def _format_price_history(product: Product, series: list, best: Optional[dict]) -> str:
+    from price_history import moving_average, sparkline
+
+    if not series or not best:
+        return (
+            f"📉 История цен для *{product.name}* пока пуста.\n"
+            "Отправьте название товара, чтобы получить первые котировки."
+        )
+
+    daily_min = [day["min_price_usd"] for day in series]
+    average = moving_average(daily_min, Config.PRICE_HISTORY_MA_DAYS)[-1]
+    best_date = time.strftime("%d.%m.%Y", time.localtime(best["ts"]))
+
+    return (
+        f"📈 **История цен: {product.name}** ({Config.PRICE_HISTORY_DAYS} дн.)\n\n"
+        f"Минимальная цена по дням (USD):\n`{sparkline(daily_min)}`\n\n"
+        f"• Последняя лучшая цена: ${daily_min[-1]:.2f}\n"
+        f"• Скользящее среднее ({Config.PRICE_HISTORY_MA_DAYS} дн.): ${average:.2f}\n"
+        f"• Минимум за период: ${best['final_price_usd']:.2f} ({best['supplier_name']}, {best_date})\n"
+        f"• Диапазон: ${min(day['min_price_usd'] for day in series):.2f} – "
+        f"${max(day['max_price_usd'] for day in series):.2f}\n"
+        f"• Котировок: {sum(day['quotes'] for day in series)}"
+    )
+
+
+USER_SETTING_NAMES = {
+    "currency": "currency",
+    "suppliers": "max_suppliers",
+    "format": "report_format"
+}
+
+
+async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    from user_settings import get_user_settings_store, parse_setting
+
+    store = get_user_settings_store()
+    user_id = update.effective_user.id
+    args = context.args or []
+
+    if len(args) >= 2:
+        field = USER_SETTING_NAMES.get(args[0].lower())
+        try:
+            if field is None:
+                raise ValueError(f"Неизвестная настройка: {args[0]}")
+            await asyncio.to_thread(store.update, user_id, **{field: parse_setting(field, args[1])})
+        except ValueError as e:
+            await update.message.reply_text(f"❌ {e}")
+            return
+
+    settings = await asyncio.to_thread(store.get, user_id)
+    usage = await asyncio.to_thread(store.usage, user_id)
+    await update.message.reply_text(
+        "⚙️ **Ваши настройки:**\n"
+        f"• Валюта отчета: {settings.currency}\n"
+        f"• Поставщиков на товар: {settings.max_suppliers}\n"
+        f"• Формат отчета: {settings.report_format}\n\n"
+        "📊 **Лимиты на сегодня:**\n"
+        f"• Запросы: {usage['requests']}/{settings.daily_requests}\n"
+        f"• AI токены: {usage['tokens']}/{settings.daily_tokens}\n\n"
+        f"Изменить: `/settings currency USD`, `/settings suppliers 3`, "
+        f"`/settings format {'|'.join(Config.REPORT_FORMATS)}`",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
 async def handle_product_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     search_text = update.message.text.strip()
@@ -137,17 +291,18 @@ async def handle_product_search(update: Update, context: ContextTypes.DEFAULT_TY
         parse_mode=ParseMode.MARKDOWN
     )
 
-    product_names = [name.strip() for name in search_text.split(',')]
-    product_names = [name for name in product_names if len(name) > 0][:Config.MAX_PRODUCTS_PER_REQUEST]
+    from query_planner import plan_query
+
+    plan = plan_query(search_text)
 
-    if not product_names:
+    if not plan.terms:
         await update.message.reply_text(
             "❌ Не найдены допустимые названия продуктов. Попробуйте еще раз.",
             parse_mode=ParseMode.MARKDOWN
         )
         return
 
-    found_products, not_found_products = _search_products(product_names)
+    found_products = plan.products
 
     if not found_products:
         await update.message.reply_text(
@@ -156,105 +311,327 @@ async def handle_product_search(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return
 
-    status_text = _format_search_status(found_products, not_found_products)
+    from user_settings import get_user_settings_store
+
+    if not await asyncio.to_thread(get_user_settings_store().consume_request, user.id if user else None):
+        await update.message.reply_text(
+            "⛔ Дневной лимит запросов исчерпан. Попробуйте завтра, лимиты: /settings",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        return
+
+    from cancellation import active_searches
+
+    chat_id = update.effective_chat.id
+    if active_searches.cancel(chat_id):
+        await update.message.reply_text("⏹ Предыдущий запрос отменен, обрабатываем новый.")
+
+    status_text = _format_search_status(plan)
     status_msg = await update.message.reply_text(status_text, parse_mode=ParseMode.MARKDOWN)
 
-    try:
-        products_data = await _process_products(found_products)
+    from analysis_cache import get_request_tracker
+    from job_store import get_job_store
 
-        await status_msg.edit_text("📊 Генерация отчета Excel...")
-        report_path = report_generator.generate_supplier_analysis_report(products_data)
+    await asyncio.to_thread(get_request_tracker().record, [product.id for product in found_products])
 
-        await status_msg.edit_text("🤖 Анализ поставщиков с помощью AI...")
-        analyses = await groq_analyzer.analyze_multiple_products(products_data)
+    job_id = await asyncio.to_thread(
+        get_job_store().create_job,
+        chat_id,
+        user.id if user else None,
+        search_text,
+        [product.id for product in found_products]
+    )
+    active_searches.start(
+        chat_id,
+        lambda: _run_search_job(context.bot, chat_id, job_id, status_msg),
+        Config.SEARCH_DEADLINE_SECONDS
+    )
 
-        await send_analysis_results(update, analyses, report_path)
-        await status_msg.delete()
 
-    except Exception as e:
-        logger.error(f"Error processing search: {e}")
-        await status_msg.edit_text(
-            "❌ Ошибка обработки вашего запроса. Попробуйте еще раз позже.",
-            parse_mode=ParseMode.MARKDOWN
+async def _run_search_job(bot, chat_id: int, job_id: int, status_msg=None):
+    from cancellation import REASON_SUPERSEDED, SearchCancelled, current_scope
+    from config_reload import pinned_snapshot
+    from job_store import get_job_store
+    from profiling import profiler
+
+    job_store = get_job_store()
+    job = await asyncio.to_thread(job_store.get_job, job_id)
+
+    if await asyncio.to_thread(job_store.start_attempt, job_id) > Config.JOB_MAX_ATTEMPTS:
+        await asyncio.to_thread(job_store.fail, job_id, "too many attempts")
+        return
+
+    with profiler.request(f"job_{job_id}"), pinned_snapshot():
+        try:
+            report_path = job["report_path"]
+            if report_path and not os.path.exists(report_path):
+                report_path = None
+
+            analyses = job["analyses"]
+            if analyses is None:
+                await _update_status(status_msg, "🤖 Анализ поставщиков с помощью AI...")
+                report_path = await _stream_search_job(bot, chat_id, job, report_path)
+            else:
+                settings = await asyncio.to_thread(_user_settings, job)
+                if report_path is None and settings.report_format == "excel":
+                    from excel_generator import get_report_generator
+
+                    await _update_status(status_msg, "📊 Генерация отчета Excel...")
+                    report_path = await asyncio.to_thread(
+                        get_report_generator().generate_supplier_analysis_report,
+                        job["products_data"],
+                        settings.currency,
+                        settings.max_suppliers,
+                        analyses
+                    )
+                    await asyncio.to_thread(job_store.save_report, job_id, report_path)
+
+                await send_analysis_results(bot, chat_id, analyses, report_path)
+
+            await asyncio.to_thread(job_store.complete, job_id)
+
+            if status_msg:
+                try:
+                    await status_msg.delete()
+                except Exception as delete_error:
+                    logger.warning(f"Could not delete search status: {delete_error}")
+
+        except (asyncio.CancelledError, SearchCancelled) as e:
+            scope = current_scope()
+            if scope is None or scope.reason != REASON_SUPERSEDED:
+                raise
+            logger.info("Job %s cancelled: %s", job_id, scope.reason)
+            await asyncio.to_thread(job_store.fail, job_id, scope.reason)
+
+            if status_msg:
+                try:
+                    await status_msg.edit_text("⏹ Запрос отменен.")
+                except Exception as edit_error:
+                    logger.warning(f"Could not update cancelled status: {edit_error}")
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+        except Exception as e:
+            logger.error(f"Error processing search: {e}")
+            await asyncio.to_thread(job_store.fail, job_id, str(e))
+
+            error_text = "❌ Ошибка обработки вашего запроса. Попробуйте еще раз позже."
+            try:
+                if status_msg:
+                    await status_msg.edit_text(error_text, parse_mode=ParseMode.MARKDOWN)
+                else:
+                    await bot.send_message(chat_id=chat_id, text=error_text, parse_mode=ParseMode.MARKDOWN)
+            except Exception as send_error:
+                logger.warning(f"Could not report search error: {send_error}")
+
+
+async def _stream_search_job(bot, chat_id: int, job: dict, report_path: Optional[str]) -> str:
+    from excel_generator import get_report_generator
+    from groq_analyzer import get_groq_analyzer
+    from job_store import get_job_store
+    from model_router import track_token_usage
+    from outbound import outbound_queue
+    from pipeline import Pipeline, price_product, search_stages
+    from user_settings import get_user_settings_store
+
+    job_store = get_job_store()
+    settings_store = get_user_settings_store()
+    settings = await asyncio.to_thread(settings_store.get, job["user_id"])
+    saved = {product_data["product"].id: product_data for product_data in job["products_data"] or []}
+    products = [product_db.get_product_by_id(product_id) for product_id in job["product_ids"]]
+    products = [product for product in products if product]
+    report = None
+    if not report_path and settings.report_format == "excel":
+        report = get_report_generator().start_report(settings.currency, settings.max_suppliers)
+    analyze = await asyncio.to_thread(settings_store.tokens_left, job["user_id"], settings) > 0
+    priced = []
+
+    async def price(product: Product) -> dict:
+        product_data = saved.get(product.id) or await price_product(product)
+        priced.append(product_data)
+        if not saved and len(priced) == len(products):
+            await asyncio.to_thread(job_store.save_priced, job["id"], priced)
+        return product_data
+
+    async with outbound_queue.stream(bot, chat_id, ParseMode.MARKDOWN, plain_text_fallback=True) as messages:
+        async def send(product_data: dict, analysis: Optional[dict]):
+            messages.add(
+                get_groq_analyzer().format_analysis_for_telegram(analysis or _skipped_analysis(product_data, analyze))
+            )
+
+        messages.add(ANALYSIS_HEADER)
+        with track_token_usage() as usage:
+            pipeline = Pipeline(search_stages(price, report, analyze=analyze, emit=send))
+            analyses = [
+                analysis or _skipped_analysis(product_data, analyze)
+                async for product_data, analysis in pipeline.run(products)
+            ]
+    await asyncio.to_thread(settings_store.add_tokens, job["user_id"], usage.total)
+
+    if report:
+        report_path = await asyncio.to_thread(
+            report.finish, [analysis for analysis in analyses if analysis.get("model") or analysis.get("fallback")]
         )
+        await asyncio.to_thread(job_store.save_report, job["id"], report_path)
+    await asyncio.to_thread(job_store.save_analyses, job["id"], analyses)
+
+    await _send_results(bot, chat_id, [REPORT_NOTICE] if report_path else [], report_path)
+    return report_path
+
+
+def _user_settings(job: dict):
+    from user_settings import get_user_settings_store
+
+    return get_user_settings_store().get(job["user_id"])
+
+
+def _skipped_analysis(product_data: dict, analyze: bool) -> dict:
+    return {
+        "product_name": product_data["product"].name,
+        "analysis": (
+            "AI анализ не успел к сроку, отправляем расчеты без него."
+            if analyze else
+            "AI анализ пропущен: дневной лимит токенов исчерпан."
+        ),
+        "statistics": product_data.get("statistics") or {},
+        "top_suppliers": []
+    }
 
 
-def _search_products(product_names: list) -> tuple:
-    found_products = []
-    not_found_products = []
+async def _update_status(status_msg, text: str):
+    if status_msg:
+        await status_msg.edit_text(text)
 
-    for name in product_names:
-        product = product_db.find_product_by_name(name)
-        if product:
-            found_products.append(product)
-        else:
-            not_found_products.append(name)
 
-    return found_products, not_found_products
+async def resume_unfinished_jobs(application: Application):
+    from cancellation import active_searches
+    from job_store import get_job_store
+    from webhook_dispatcher import worker_for_chat
 
+    job_store = get_job_store()
+    job_store.purge_finished(Config.JOB_MAX_AGE_SECONDS)
+    worker_index = application.bot_data.get("worker_index")
 
-def _format_search_status(found_products: list, not_found_products: list) -> str:
+    for job in job_store.unfinished_jobs():
+        if worker_index is not None and worker_for_chat(job["chat_id"], Config.WORKER_PROCESSES) != worker_index:
+            continue
+
+        if time.time() - job["created_at"] > Config.JOB_MAX_AGE_SECONDS:
+            job_store.fail(job["id"], "expired")
+            continue
+
+        logger.info("Resuming job %s from stage %s", job["id"], job["stage"])
+        await application.bot.send_message(
+            chat_id=job["chat_id"],
+            text=f"♻️ Продолжаем обработку запроса: *{job['query']}*",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        active_searches.start(
+            job["chat_id"],
+            lambda job=job: _run_search_job(application.bot, job["chat_id"], job["id"]),
+            Config.SEARCH_DEADLINE_SECONDS
+        )
+
+
+def _format_search_status(plan) -> str:
     status_text = (
         f"\n📊 **Результаты поиска:**\n"
-        f"• Найдено: {len(found_products)} продукт(ов)\n"
-        f"• Не найдено: {len(not_found_products)} продукт(ов)\n\n"
-        "Анализируем международных поставщиков...\n"
+        f"• Найдено: {len(plan.products)} продукт(ов)\n"
+        f"• Не найдено: {len(plan.not_found)} продукт(ов)\n"
+    )
+
+    for product in plan.products:
+        arrow = "≈" if any(term in plan.semantic for term in plan.terms_for(product.id)) else "→"
+        status_text += f"• {', '.join(plan.terms_for(product.id))} {arrow} {product.name}\n"
+
+    status_text += (
+        "\nАнализируем международных поставщиков...\n"
         "Это может занять некоторое время ⏳"
     )
 
-    if not_found_products:
-        status_text += f"\n❌ Не найдено: {', '.join(not_found_products)}"
+    if plan.not_found:
+        status_text += f"\n❌ Не найдено: {', '.join(plan.not_found)}"
+
+    if plan.skipped:
+        status_text += (
+            f"\n⚠️ Максимум {Config.MAX_PRODUCTS_PER_REQUEST} продуктов за запрос, "
+            f"пропущено: {', '.join(plan.skipped)}"
+        )
 
     return status_text
 
 
-async def _process_products(found_products: list) -> list:
-    products_data = []
+async def _process_products(found_products: list, use_cache: bool = True) -> list:
+    from pipeline import price_product
 
-    for product in found_products:
-        suppliers = product_db.generate_supplier_prices(product, Config)
-        sorted_suppliers = sorted(suppliers, key=lambda x: x["final_price_usd"])
-        products_data.append({
-            "product": product,
-            "suppliers": sorted_suppliers
-        })
+    return [await price_product(product, use_cache) for product in found_products]
 
-    return products_data
 
+async def _analyze_products(products_data: list, use_cache: bool = True) -> list:
+    from pipeline import analyze_product
 
-async def send_analysis_results(update: Update, analyses: list, report_path: str):
-    try:
-        analysis_header = """
+    return list(await asyncio.gather(
+        *(analyze_product(product_data, use_cache) for product_data in products_data)
+    ))
+
+
+async def warm_up_analysis_cache(context: ContextTypes.DEFAULT_TYPE):
+    from analysis_cache import get_analysis_cache, get_request_tracker
+
+    analysis_cache = get_analysis_cache()
+    analysis_cache.evict_expired()
+
+    products = [
+        product_db.get_product_by_id(product_id)
+        for product_id in get_request_tracker().top(Config.WARMUP_TOP_PRODUCTS)
+        if analysis_cache.needs_refresh(product_id, Config.WARMUP_REFRESH_MARGIN_SECONDS)
+    ]
+    products = [product for product in products if product]
+    if not products:
+        return
+
+    logger.info("Warming analysis cache for: %s", ", ".join(product.name for product in products))
+    products_data = await _process_products(products, use_cache=False)
+    await _analyze_products(products_data, use_cache=False)
+
+
+ANALYSIS_HEADER = """
 📈 **РЕЗУЛЬТАТЫ АНАЛИЗА ПОСТАВЩИКОВ**
 ────────────────────────────
-        """
+"""
 
-        await update.message.reply_text(analysis_header, parse_mode=ParseMode.MARKDOWN)
+REPORT_NOTICE = "📊 **Генерация подробного отчета Excel...**"
 
-        for analysis in analyses:
-            formatted_analysis = groq_analyzer.format_analysis_for_telegram(analysis)
 
-            if len(formatted_analysis) > 4000:
-                parts = [formatted_analysis[i:i+4000] for i in range(0, len(formatted_analysis), 4000)]
-                for part in parts:
-                    await update.message.reply_text(part, parse_mode=ParseMode.MARKDOWN)
-                    await asyncio.sleep(0.3)
-            else:
-                await update.message.reply_text(formatted_analysis, parse_mode=ParseMode.MARKDOWN)
+async def send_analysis_results(bot, chat_id: int, analyses: list, report_path: str):
+    from groq_analyzer import get_groq_analyzer
 
-            await asyncio.sleep(0.5)
+    groq_analyzer = get_groq_analyzer()
 
-        await update.message.reply_text(
-            "📊 **Генерация подробного отчета Excel...**",
-            parse_mode=ParseMode.MARKDOWN
-        )
+    messages = [ANALYSIS_HEADER]
+    for analysis in analyses:
+        messages.append(groq_analyzer.format_analysis_for_telegram(analysis))
+    if report_path:
+        messages.append(REPORT_NOTICE)
 
-        with open(report_path, 'rb') as report_file:
-            await update.message.reply_document(
-                document=report_file,
-                filename=f"анализ_поставщиков.xlsx",
-                caption="📈 Полный отчет анализа поставщиков"
-            )
+    await _send_results(bot, chat_id, messages, report_path)
+
+
+async def _send_results(bot, chat_id: int, messages: list, report_path: str):
+    from outbound import outbound_queue
+
+    try:
+        await outbound_queue.send_messages(bot, chat_id, messages, parse_mode=ParseMode.MARKDOWN)
+
+        if report_path:
+            with open(report_path, 'rb') as report_file:
+                await outbound_queue.send_document(
+                    bot,
+                    chat_id,
+                    document=report_file,
+                    filename=f"анализ_поставщиков.xlsx",
+                    caption="📈 Полный отчет анализа поставщиков"
+                )
 
         final_text = """
 ✅ **Анализ завершен!**
@@ -269,7 +646,7 @@ async def send_analysis_results(update: Update, analyses: list, report_path: str
 Просто отправьте названия товаров!
         """
 
-        await update.message.reply_text(final_text, parse_mode=ParseMode.MARKDOWN)
+        await outbound_queue.send_message(bot, chat_id, final_text, parse_mode=ParseMode.MARKDOWN)
 
         try:
             os.remove(report_path)
@@ -278,36 +655,169 @@ async def send_analysis_results(update: Update, analyses: list, report_path: str
 
     except Exception as e:
         logger.error(f"Error sending results: {e}")
-        await update.message.reply_text(
+        await outbound_queue.send_message(
+            bot,
+            chat_id,
             "✅ Анализ завершен! Проверьте свои файлы.",
             parse_mode=ParseMode.MARKDOWN
         )
 
 
-def main():
-    config_errors = Config.validate()
-    if config_errors:
-        logger.error("❌ Configuration errors: %s", ", ".join(config_errors))
-        return
+async def flush_price_history(application: Application):
+    from price_history import get_price_history_writer
+
+    await get_price_history_writer().close()
 
-    Path(Config.TEMP_DIR).mkdir(exist_ok=True)
 
-    application = Application.builder().token(Config.TELEGRAM_TOKEN).build()
+async def on_startup(application: Application):
+    await resume_unfinished_jobs(application)
+
+    if Config.CONFIG_FILE:
+        from config_reload import get_config_reloader
+
+        application.bot_data["config_watcher"] = asyncio.create_task(get_config_reloader().watch())
+
+
+async def on_shutdown(application: Application):
+    from cancellation import active_searches
+
+    watcher = application.bot_data.pop("config_watcher", None)
+    if watcher:
+        watcher.cancel()
+    await active_searches.cancel_all()
+    await flush_price_history(application)
+
+
+def build_application(worker_index: Optional[int] = None) -> Application:
+    builder = Application.builder().token(Config.TELEGRAM_TOKEN)
+    if Config.TELEGRAM_BASE_URL:
+        builder = builder.base_url(Config.TELEGRAM_BASE_URL)
+    builder = builder.post_shutdown(on_shutdown)
+    if worker_index is None:
+        builder = builder.post_init(on_startup)
+    else:
+        from webhook_dispatcher import ChatOrderedUpdateProcessor
+        builder = builder.updater(None).concurrent_updates(
+            ChatOrderedUpdateProcessor(Config.MAX_CONCURRENT_UPDATES)
+        )
+
+    application = builder.build()
+    application.bot_data["worker_index"] = worker_index
+
+    if not application.job_queue:
+        logger.warning("JobQueue is not available, analysis warm-up is disabled")
+    elif worker_index in (None, 0):
+        application.job_queue.run_repeating(
+            warm_up_analysis_cache,
+            interval=Config.WARMUP_INTERVAL_SECONDS,
+            first=10,
+            name="analysis_warmup"
+        )
 
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("examples", examples_command))
+    application.add_handler(CommandHandler("history", history_command))
+    application.add_handler(CommandHandler("category", category_command))
+    application.add_handler(CommandHandler("suppliers", suppliers_command))
+    application.add_handler(CommandHandler("settings", settings_command))
 
     application.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND,
         handle_product_search
     ))
 
+    return application
+
+
+async def _serve_worker(application: Application, updates):
+    loop = asyncio.get_running_loop()
+
+    async with application:
+        await application.start()
+        await on_startup(application)
+
+        while True:
+            data = await loop.run_in_executor(None, updates.get)
+            if data is None:
+                break
+            await application.update_queue.put(Update.de_json(data, application.bot))
+
+        await application.stop()
+        await on_shutdown(application)
+
+
+def run_worker(worker_index: int, updates):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logger.info("Worker %s started", worker_index)
+    asyncio.run(_serve_worker(build_application(worker_index), updates))
+
+
+async def _set_webhook():
+    from telegram import Bot
+
+    async with Bot(Config.TELEGRAM_TOKEN) as bot:
+        await bot.set_webhook(
+            url=Config.WEBHOOK_URL,
+            secret_token=Config.WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+
+
+def run_webhook():
+    import multiprocessing
+    from webhook_dispatcher import WebhookDispatcher
+
+    asyncio.run(_set_webhook())
+
+    queues = [multiprocessing.Queue() for _ in range(Config.WORKER_PROCESSES)]
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(index, queue), name=f"bot-worker-{index}")
+        for index, queue in enumerate(queues)
+    ]
+    for worker in workers:
+        worker.start()
+
+    dispatcher = WebhookDispatcher(
+        queues,
+        Config.WEBHOOK_PATH,
+        Config.WEBHOOK_SECRET,
+        Config.WEBHOOK_LISTEN,
+        Config.WEBHOOK_PORT
+    )
+    try:
+        dispatcher.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispatcher.stop()
+        for queue in queues:
+            queue.put(None)
+        for worker in workers:
+            worker.join(timeout=30)
+
+
+def main():
+    if Config.CONFIG_FILE:
+        from config_reload import get_config_reloader
+
+        get_config_reloader().check()
+
+    config_errors = Config.validate()
+    if config_errors:
+        logger.error("❌ Configuration errors: %s", ", ".join(config_errors))
+        return
+
+    Path(Config.TEMP_DIR).mkdir(exist_ok=True)
+
     logger.info("🤖 Бот Анализа Рынка Поставщиков запущен...")
     logger.info("Готов анализировать поставщиков!")
 
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if Config.BOT_MODE == "webhook":
+        run_webhook()
+    else:
+        build_application().run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,125 @@
+import unicodedata
+from itertools import accumulate
+from typing import List, Optional
+from config import Config
+
+CODE_BLOCK = "```"
+INLINE_CODE = "`"
+BOLD = "**"
+ENTITY_CLOSERS_RESERVE = len(CODE_BLOCK) + len(BOLD) + len(INLINE_CODE)
+ZERO_WIDTH_JOINER = "\u200d"
+
+
+def utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def open_entities(text: str) -> List[str]:
+    stack = []
+    i = 0
+    while i < len(text):
+        in_code = stack and stack[-1] in (CODE_BLOCK, INLINE_CODE)
+
+        if text.startswith(CODE_BLOCK, i) and (not in_code or stack[-1] == CODE_BLOCK):
+            marker = CODE_BLOCK
+        elif text[i] == INLINE_CODE and (not in_code or stack[-1] == INLINE_CODE):
+            marker = INLINE_CODE
+        elif not in_code and text.startswith(BOLD, i):
+            marker = BOLD
+        else:
+            i += 1
+            continue
+
+        if stack and stack[-1] == marker:
+            stack.pop()
+        elif marker in stack:
+            stack.remove(marker)
+        else:
+            stack.append(marker)
+        i += len(marker)
+
+    return stack
+
+
+def _is_grapheme_extension(char: str) -> bool:
+    code_point = ord(char)
+    return (
+        char == ZERO_WIDTH_JOINER
+        or 0xFE00 <= code_point <= 0xFE0F
+        or 0x1F3FB <= code_point <= 0x1F3FF
+        or unicodedata.combining(char) != 0
+    )
+
+
+def _safe_hard_cut(text: str, cut: int) -> int:
+    while cut > 1 and (
+        _is_grapheme_extension(text[cut])
+        or text[cut - 1] == ZERO_WIDTH_JOINER
+        or text[cut - 1] == "*" and text[cut] == "*"
+        or text[cut - 1] == INLINE_CODE and text[cut] == INLINE_CODE
+    ):
+        cut -= 1
+    return cut
+
+
+def _find_cut(text: str, budget: int) -> int:
+    widths = accumulate(2 if ord(char) > 0xFFFF else 1 for char in text)
+    hard_cut = 0
+    for width in widths:
+        if width > budget:
+            break
+        hard_cut += 1
+
+    if hard_cut >= len(text):
+        return len(text)
+
+    for separator in ("\n\n", "\n", " "):
+        boundary = text.rfind(separator, 0, hard_cut)
+        if boundary > hard_cut // 2:
+            return boundary + len(separator)
+
+    return _safe_hard_cut(text, max(hard_cut, 1))
+
+
+def split_message(text: str, limit: Optional[int] = None) -> List[str]:
+    limit = limit or Config.MAX_MESSAGE_LENGTH
+    chunks = []
+    prefix = ""
+    remaining = text.strip()
+
+    while remaining:
+        candidate = prefix + remaining
+        if utf16_length(candidate) <= limit and not open_entities(candidate):
+            chunks.append(candidate)
+            break
+
+        budget = limit - utf16_length(prefix) - ENTITY_CLOSERS_RESERVE
+        cut = _find_cut(remaining, budget)
+
+        chunk = (prefix + remaining[:cut]).rstrip()
+        entities = open_entities(chunk)
+        chunks.append(chunk + "".join(reversed(entities)))
+
+        prefix = "".join(entities)
+        remaining = remaining[cut:].lstrip()
+
+    return chunks
+
+
+def pack_messages(texts: List[str], limit: Optional[int] = None, separator: str = "\n\n") -> List[str]:
+    limit = limit or Config.MAX_MESSAGE_LENGTH
+    packed = []
+    current = ""
+
+    for text in texts:
+        for chunk in split_message(text, limit):
+            if current and utf16_length(current) + utf16_length(separator) + utf16_length(chunk) <= limit:
+                current = f"{current}{separator}{chunk}"
+            else:
+                if current:
+                    packed.append(current)
+                current = chunk
+
+    if current:
+        packed.append(current)
+    return packed
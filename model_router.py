@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Callable, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+LATENCY_EWMA_ALPHA = 0.2
+DEFAULT_COOLDOWN_SECONDS = 5.0
+
+
+class ModelUnavailableError(Exception):
+    pass
+
+
+class TokenUsage:
+    def __init__(self):
+        self.total = 0
+
+
+_token_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_token_usage():
+    usage = TokenUsage()
+    token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+
+class ModelRoute:
+    def __init__(self, name: str, tier: str, max_concurrency: int):
+        self.name = name
+        self.tier = tier
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.latency_ewma: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def record_latency(self, latency: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.latency_ewma
+
+    def is_cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tier": self.tier,
+            "latency_ewma": self.latency_ewma,
+            "requests": self.requests,
+            "failures": self.failures,
+            "cooling_down": self.is_cooling_down()
+        }
+
+
+def is_retryable_error(error: Exception) -> bool:
+    import groq
+
+    if isinstance(error, (groq.APIConnectionError, groq.APITimeoutError)):
+        return True
+
+    status_code = getattr(error, "status_code", None)
+    return status_code == 429 or (status_code is not None and status_code >= 500)
+
+
+def retry_after_seconds(error: Exception) -> float:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return DEFAULT_COOLDOWN_SECONDS
+
+
+class ModelRouter:
+    def __init__(self, models: Optional[Dict[str, Dict[str, Any]]] = None, client=None):
+        models = models or Config.GROQ_MODELS
+        self.routes = {
+            name: ModelRoute(name, spec["tier"], spec["max_concurrency"])
+            for name, spec in models.items()
+        }
+        self.client = client
+
+    def resize(self, models: Dict[str, Dict[str, Any]]):
+        for name, spec in models.items():
+            route = self.routes.get(name)
+            if route is None:
+                self.routes[name] = ModelRoute(name, spec["tier"], spec["max_concurrency"])
+                continue
+            route.tier = spec["tier"]
+            if route.max_concurrency != spec["max_concurrency"]:
+                # in-flight calls release the old semaphore, new calls queue on the resized one
+                route.max_concurrency = spec["max_concurrency"]
+                route.semaphore = asyncio.Semaphore(spec["max_concurrency"])
+        for name in set(self.routes) - set(models):
+            del self.routes[name]
+
+    def get_client(self):
+        if self.client is None:
+            from groq import AsyncGroq
+            self.client = AsyncGroq(
+                api_key=Config.GROQ_API_KEY,
+                base_url=Config.GROQ_BASE_URL,
+                timeout=Config.GROQ_TIMEOUT_SECONDS,
+                max_retries=0
+            )
+        return self.client
+
+    def preferred_tier(self, small_prompt: Dict[str, Any]) -> str:
+        if small_prompt.get("truncated") or small_prompt["prompt_tokens"] > Config.GROQ_SMALL_REQUEST_TOKENS:
+            return TIER_LARGE
+        return TIER_SMALL
+
+    def candidates(self, tier: str) -> List[ModelRoute]:
+        def order(route: ModelRoute):
+            latency = route.latency_ewma if route.latency_ewma is not None else 0.0
+            return route.tier != tier, route.is_cooling_down(), latency
+
+        return sorted(self.routes.values(), key=order)
+
+    async def complete(
+        self,
+        build_prompt: Callable[[str], Dict[str, Any]],
+        temperature: float,
+        tier: Optional[str] = None
+    ) -> Dict[str, Any]:
+        prompts = {}
+
+        def prompt_for(model: str) -> Dict[str, Any]:
+            if model not in prompts:
+                prompts[model] = build_prompt(model)
+            return prompts[model]
+
+        if tier is None:
+            tier = self.preferred_tier(prompt_for(self.candidates(TIER_SMALL)[0].name))
+
+        last_error = None
+        for route in self.candidates(tier):
+            prompt = prompt_for(route.name)
+
+            async with route.semaphore:
+                route.requests += 1
+                started = time.monotonic()
+                try:
+                    response = await self.get_client().chat.completions.create(
+                        model=route.name,
+                        messages=prompt["messages"],
+                        temperature=temperature,
+                        max_tokens=prompt["max_tokens"],
+                        **({"response_format": prompt["response_format"]} if "response_format" in prompt else {})
+                    )
+                except Exception as e:
+                    route.failures += 1
+                    if not is_retryable_error(e):
+                        raise
+                    route.cooldown_until = time.monotonic() + retry_after_seconds(e)
+                    logger.warning("Model %s failed (%s), failing over", route.name, e)
+                    last_error = e
+                    continue
+
+            route.record_latency(time.monotonic() - started)
+            tokens = getattr(getattr(response, "usage", None), "total_tokens", 0) or 0
+            usage = _token_usage.get()
+            if usage is not None:
+                usage.total += tokens
+
+            content = (response.choices[0].message.content or "").strip()
+            if not content and route.tier == TIER_SMALL:
+                logger.warning("Model %s returned an empty answer, escalating", route.name)
+                last_error = ValueError("empty completion")
+                continue
+
+            return {
+                "model": route.name,
+                "content": content,
+                "prompt": prompt,
+                "tokens": tokens
+            }
+
+        raise ModelUnavailableError(f"All models failed: {last_error}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: route.stats() for name, route in self.routes.items()}
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import List, Optional, Callable
+from config import Config
+from config_reload import on_config_change
+from message_chunker import pack_messages
+
+logger = logging.getLogger(__name__)
+
+CHAT_SWEEP_MIN = 1024
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= tokens
+
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def is_full(self) -> bool:
+        return self.tokens + (self.clock() - self.updated_at) * self.rate >= self.capacity
+
+    async def acquire(self, tokens: float = 1.0):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SharedTokenBucket(TokenBucket):
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        from job_store import connect
+
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._connection = connect(path or Config.STATE_DB_PATH)
+        self._lock = threading.Lock()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets "
+            "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        from job_store import immediate_transaction
+
+        with self._lock, immediate_transaction(self._connection):
+            now = self.clock()
+            row = self._connection.execute(
+                "SELECT tokens, updated_at FROM rate_buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            available = self.capacity
+            if row:
+                available = min(self.capacity, row["tokens"] + max(0.0, now - row["updated_at"]) * self.rate)
+            available -= tokens
+            self._connection.execute(
+                "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, available, now)
+            )
+
+        if available >= 0:
+            return 0.0
+        return -available / self.rate
+
+    async def acquire(self, tokens: float = 1.0):
+        # the reservation is a SQLite write transaction that can wait on other workers' locks
+        delay = await asyncio.to_thread(self.reserve, tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class MessageStream:
+    def __init__(self, queue: "OutboundMessageQueue", bot, chat_id: int, **send_options):
+        self.queue = queue
+        self.bot = bot
+        self.chat_id = chat_id
+        self.send_options = send_options
+        self._texts: List[str] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    def add(self, text: str):
+        if self._flusher is not None and self._flusher.done():
+            self._flusher.result()
+            self._flusher = None
+        self._texts.append(text)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        # texts added while a send waits on the rate limit go out packed into the next one
+        while self._texts:
+            texts, self._texts = self._texts, []
+            await self.queue.send_messages(self.bot, self.chat_id, texts, **self.send_options)
+
+    async def close(self):
+        if self._flusher is not None:
+            await self._flusher
+
+    def cancel(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+
+
+class OutboundMessageQueue:
+    def __init__(
+        self,
+        global_rate: Optional[float] = None,
+        chat_rate: Optional[float] = None,
+        chat_burst: Optional[float] = None,
+        max_retries: int = 3,
+        global_bucket: Optional[TokenBucket] = None
+    ):
+        self.global_bucket = global_bucket or TokenBucket(
+            global_rate or Config.TELEGRAM_GLOBAL_RATE,
+            global_rate or Config.TELEGRAM_GLOBAL_RATE
+        )
+        self.chat_rate = chat_rate or Config.TELEGRAM_CHAT_RATE
+        self.chat_burst = chat_burst or Config.TELEGRAM_CHAT_BURST
+        self.max_retries = max_retries
+        self._chat_buckets = {}
+        self._chat_locks = defaultdict(asyncio.Lock)
+        self._pending = defaultdict(int)
+        self._sweep_at = CHAT_SWEEP_MIN
+
+    def set_rates(self, global_rate: float, chat_rate: float, chat_burst: float):
+        self.global_bucket.rate = self.global_bucket.capacity = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        for bucket in self._chat_buckets.values():
+            bucket.rate = chat_rate
+            bucket.capacity = chat_burst
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self._sweep_at:
+                self._evict_idle_chats()
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _evict_idle_chats(self):
+        # a refilled bucket is the same as a new one, so dropping it loses no rate-limit state
+        for chat_id in [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.is_full()]:
+            del self._chat_buckets[chat_id]
+        self._sweep_at = max(CHAT_SWEEP_MIN, 2 * len(self._chat_buckets))
+
+    @asynccontextmanager
+    async def _chat_lock(self, chat_id: int):
+        self._pending[chat_id] += 1
+        try:
+            async with self._chat_locks[chat_id]:
+                yield
+        finally:
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                del self._pending[chat_id]
+                del self._chat_locks[chat_id]
+
+    async def _call(self, chat_id: int, method, **kwargs):
+        from telegram.error import RetryAfter
+
+        for attempt in range(self.max_retries + 1):
+            await self._chat_bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+
+            try:
+                return await method(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = float(e.retry_after)
+                logger.warning("Telegram flood control for chat %s, retrying in %ss", chat_id, retry_after)
+                await asyncio.sleep(retry_after)
+
+    async def send_message(self, bot, chat_id: int, text: str, parse_mode: Optional[str] = None):
+        async with self._chat_lock(chat_id):
+            return await self._call(chat_id, bot.send_message, text=text, parse_mode=parse_mode)
+
+    async def send_messages(
+        self,
+        bot,
+        chat_id: int,
+        texts: List[str],
+        parse_mode: Optional[str] = None,
+        plain_text_fallback: bool = False
+    ) -> list:
+        sent = []
+        async with self._chat_lock(chat_id):
+            for text in pack_messages(texts):
+                sent.append(await self._send_text(bot, chat_id, text, parse_mode, plain_text_fallback))
+        return sent
+
+    @asynccontextmanager
+    async def stream(self, bot, chat_id: int, parse_mode: Optional[str] = None, plain_text_fallback: bool = False):
+        stream = MessageStream(self, bot, chat_id, parse_mode=parse_mode, plain_text_fallback=plain_text_fallback)
+        try:
+            yield stream
+        except BaseException:
+            stream.cancel()
+            raise
+        await stream.close()
+
+    async def _send_text(self, bot, chat_id: int, text: str, parse_mode: Optional[str], plain_text_fallback: bool):
+        from telegram.error import TelegramError
+
+        try:
+            return await self._call(chat_id, bot.send_message, text=text, parse_mode=parse_mode)
+        except TelegramError as e:
+            if not plain_text_fallback or parse_mode is None:
+                raise
+            logger.warning("Chat %s rejected a message (%s), resending as plain text", chat_id, e)
+
+        try:
+            return await self._call(chat_id, bot.send_message, text=text, parse_mode=None)
+        except TelegramError as e:
+            logger.error("Dropped a message for chat %s after the plain text retry: %s", chat_id, e)
+            return None
+
+    async def send_document(self, bot, chat_id: int, document, filename: str, caption: Optional[str] = None):
+        async def send(**kwargs):
+            if hasattr(document, "seek"):
+                document.seek(0)
+            return await bot.send_document(document=document, **kwargs)
+
+        async with self._chat_lock(chat_id):
+            return await self._call(chat_id, send, filename=filename, caption=caption)
+
+
+def create_outbound_queue() -> OutboundMessageQueue:
+    if Config.BOT_MODE == "webhook":
+        return OutboundMessageQueue(global_bucket=SharedTokenBucket(
+            "telegram_global",
+            Config.TELEGRAM_GLOBAL_RATE,
+            Config.TELEGRAM_GLOBAL_RATE
+        ))
+    return OutboundMessageQueue()
+
+
+outbound_queue = create_outbound_queue()
+
+
+@on_config_change("TELEGRAM_GLOBAL_RATE", "TELEGRAM_CHAT_RATE", "TELEGRAM_CHAT_BURST")
+def _reload_rates(changed):
+    outbound_queue.set_rates(Config.TELEGRAM_GLOBAL_RATE, Config.TELEGRAM_CHAT_RATE, Config.TELEGRAM_CHAT_BURST)
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Awaitable, AsyncIterator, Iterable, Optional
+from config import Config
+from cancellation import check_cancelled, current_scope
+from config_reload import current_snapshot
+from job_store import CACHED_ANALYSIS
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+StageObserver = Callable[[str, float, bool, int], None]
+_stage_observers: List[StageObserver] = []
+
+
+@contextmanager
+def observe_stages(observer: StageObserver):
+    _stage_observers.append(observer)
+    try:
+        yield
+    finally:
+        _stage_observers.remove(observer)
+
+
+class _Failure:
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+        timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, name: str, handler: Callable[[Any], Awaitable[Any]]) -> "Stage":
+        settings = Config.PIPELINE_STAGES.get(name, {})
+        return cls(name, handler, settings.get("concurrency", 1), settings.get("timeout"))
+
+    async def process(self, item: Any) -> Any:
+        if self.timeout is None:
+            return await self.handler(item)
+        return await asyncio.wait_for(self.handler(item), self.timeout)
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], queue_size: Optional[int] = None):
+        self.stages = stages
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+
+    async def run(self, items: Iterable[Any]) -> AsyncIterator[Any]:
+        queues = [asyncio.Queue(self.queue_size) for _ in self.stages] + [asyncio.Queue()]
+        results = queues[-1]
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            await queues[0].put(_DONE)
+
+        async def work(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    await inbox.put(_DONE)
+                    return
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = await stage.process(item)
+                    failed = False
+                finally:
+                    for observer in _stage_observers:
+                        observer(stage.name, time.perf_counter() - started, failed, inbox.qsize())
+                await outbox.put(result)
+
+        async def run_stage(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+            workers = [asyncio.create_task(work(stage, inbox, outbox)) for _ in range(stage.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            except Exception as e:
+                for worker in workers:
+                    worker.cancel()
+                results.put_nowait(_Failure(stage.name, e))
+                return
+            await outbox.put(_DONE)
+
+        tasks = [asyncio.create_task(feed())] + [
+            asyncio.create_task(run_stage(stage, queues[index], queues[index + 1]))
+            for index, stage in enumerate(self.stages)
+        ]
+
+        try:
+            while True:
+                result = await results.get()
+                if result is _DONE:
+                    return
+                if isinstance(result, _Failure):
+                    logger.error("Pipeline stage %s failed: %s", result.stage, result.error)
+                    raise result.error
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def collect(self, items: Iterable[Any]) -> List[Any]:
+        return [result async for result in self.run(items)]
+
+
+async def price_product(product, use_cache: bool = True) -> Dict[str, Any]:
+    from analysis_cache import get_analysis_cache
+    from database import product_db
+    from price_history import get_price_history_writer
+    from profiling import profiler
+    from supplier_stats import statistics_engine
+    from supplier_ranking import supplier_ranker
+
+    check_cancelled()
+    cached = get_analysis_cache().get(product.id) if use_cache else None
+    if cached:
+        return {**cached["product_data"], CACHED_ANALYSIS: cached["analysis"]}
+
+    config = current_snapshot()
+    with profiler.stage("pricing"):
+        suppliers = product_db.generate_supplier_prices(product, config)
+        product_data = {
+            "product": product,
+            "suppliers": suppliers,
+            "top_suppliers": supplier_ranker.top_k(suppliers, config.MAX_SUPPLIERS_PER_PRODUCT),
+            "statistics": statistics_engine.calculate(suppliers)
+        }
+    get_price_history_writer().submit(product.id, suppliers)
+    if use_cache:
+        # the miss is remembered too, so analyze_product does not look the product up again
+        product_data[CACHED_ANALYSIS] = None
+    return product_data
+
+
+async def analyze_product(
+    product_data: Dict[str, Any],
+    use_cache: bool = True,
+    timeout: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    from analysis_cache import get_analysis_cache
+    from groq_analyzer import get_groq_analyzer
+
+    analysis_cache = get_analysis_cache()
+    product = product_data["product"]
+
+    if not use_cache:
+        cached = None
+    elif CACHED_ANALYSIS in product_data:
+        cached = product_data[CACHED_ANALYSIS]
+    else:
+        entry = analysis_cache.get(product.id)
+        cached = entry["analysis"] if entry else None
+    if cached:
+        return cached
+
+    scope = current_scope()
+    if scope is not None and scope.expired:
+        return None
+    limits = [limit for limit in (timeout, scope.remaining() if scope is not None else None) if limit is not None]
+
+    try:
+        analysis = await asyncio.wait_for(
+            get_groq_analyzer().analyze_product_suppliers(
+                product,
+                product_data["suppliers"],
+                product_data.get("statistics"),
+                product_data.get("top_suppliers")
+            ),
+            min(limits, default=None)
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Analysis of %s timed out, continuing without it", product.name)
+        return None
+    if analysis.get("model"):
+        priced = {key: value for key, value in product_data.items() if key != CACHED_ANALYSIS}
+        analysis_cache.put(product.id, priced, analysis)
+    return analysis
+
+
+def search_stages(
+    price: Callable[[Any], Awaitable[Dict[str, Any]]] = price_product,
+    report=None,
+    analyze: bool = True,
+    emit: Optional[Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Awaitable[Any]]] = None
+) -> List[Stage]:
+    stages = [Stage.from_config("price", price)]
+
+    if report is not None:
+        async def add_rows(product_data: Dict[str, Any]) -> Dict[str, Any]:
+            await asyncio.to_thread(report.add_product, product_data)
+            return product_data
+
+        stages.append(Stage.from_config("report", add_rows))
+
+    analyze_settings = Config.PIPELINE_STAGES.get("analyze", {})
+    if analyze:
+        async def add_analysis(product_data: Dict[str, Any]):
+            return product_data, await analyze_product(product_data, timeout=analyze_settings.get("timeout"))
+    else:
+        async def add_analysis(product_data: Dict[str, Any]):
+            return product_data, None
+
+    # the analyze timeout skips the analysis inside analyze_product instead of failing the whole run
+    stages.append(Stage("analyze", add_analysis, analyze_settings.get("concurrency", 1)))
+
+    if emit is not None:
+        async def emit_result(result):
+            await emit(*result)
+            return result
+
+        stages.append(Stage.from_config("send", emit_result))
+
+    return stages
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from config import Config
+from config_reload import on_config_change
+from job_store import connect, immediate_transaction
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+SPARKLINE_BLOCKS = "▁▂▃▄▅▆▇█"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_quotes (
+    product_id TEXT NOT NULL,
+    supplier_id TEXT NOT NULL,
+    supplier_name TEXT NOT NULL,
+    ts REAL NOT NULL,
+    currency TEXT NOT NULL,
+    price_local REAL NOT NULL,
+    price_usd REAL NOT NULL,
+    final_price_usd REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_quotes_supplier ON price_quotes (product_id, supplier_id, ts);
+CREATE INDEX IF NOT EXISTS idx_price_quotes_product ON price_quotes (product_id, ts);
+"""
+
+QuoteRow = Tuple[str, str, str, float, str, float, float, float]
+
+
+def quote_rows(product_id: str, suppliers: List[Dict[str, Any]], ts: float) -> List[QuoteRow]:
+    return [
+        (
+            product_id,
+            supplier["id"],
+            supplier["name"],
+            ts,
+            supplier["currency"],
+            supplier["price_local"],
+            supplier["price_usd"],
+            supplier["final_price_usd"]
+        )
+        for supplier in suppliers
+    ]
+
+
+def moving_average(values: List[float], window: int) -> List[float]:
+    averages = []
+    total = 0.0
+    for index, value in enumerate(values):
+        total += value
+        if index >= window:
+            total -= values[index - window]
+        averages.append(total / min(index + 1, window))
+    return averages
+
+
+def sparkline(values: List[float]) -> str:
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARKLINE_BLOCKS[0] * len(values)
+    scale = (len(SPARKLINE_BLOCKS) - 1) / (high - low)
+    return "".join(SPARKLINE_BLOCKS[round((value - low) * scale)] for value in values)
+
+
+class PriceHistoryStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.PRICE_HISTORY_DB_PATH
+        self._connection = connect(self.path)
+        self._lock = threading.Lock()
+        self._connection.executescript(SCHEMA)
+
+    def append(self, rows: List[QuoteRow]):
+        with self._lock, immediate_transaction(self._connection):
+            self._connection.executemany(
+                "INSERT INTO price_quotes "
+                "(product_id, supplier_id, supplier_name, ts, currency, price_local, price_usd, final_price_usd) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def quotes(
+        self,
+        product_id: str,
+        since: float,
+        until: Optional[float] = None,
+        supplier_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM price_quotes WHERE product_id = ?"
+        params: list = [product_id]
+        if supplier_id is not None:
+            query += " AND supplier_id = ?"
+            params.append(supplier_id)
+        query += " AND ts >= ? AND ts < ? ORDER BY ts"
+        params += [since, until if until is not None else float("inf")]
+
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def daily_series(self, product_id: str, days: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = now if now is not None else time.time()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT CAST(ts / ? AS INTEGER) AS day, MIN(final_price_usd) AS min_price_usd, "
+                "AVG(final_price_usd) AS avg_price_usd, MAX(final_price_usd) AS max_price_usd, "
+                "COUNT(*) AS quotes "
+                "FROM price_quotes WHERE product_id = ? AND ts >= ? "
+                "GROUP BY day ORDER BY day",
+                (DAY_SECONDS, product_id, now - days * DAY_SECONDS)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def min_over(self, product_id: str, days: int, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        now = now if now is not None else time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT supplier_id, supplier_name, MIN(final_price_usd) AS final_price_usd, ts "
+                "FROM price_quotes WHERE product_id = ? AND ts >= ?",
+                (product_id, now - days * DAY_SECONDS)
+            ).fetchone()
+        return dict(row) if row and row["supplier_id"] is not None else None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class PriceHistoryWriter:
+    def __init__(
+        self,
+        store: Optional[PriceHistoryStore] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        self._store = store
+        self.batch_size = batch_size or Config.PRICE_HISTORY_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.PRICE_HISTORY_FLUSH_SECONDS
+        self._pending: List[QuoteRow] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+
+    @property
+    def store(self) -> PriceHistoryStore:
+        if self._store is None:
+            self._store = PriceHistoryStore()
+        return self._store
+
+    def submit(self, product_id: str, suppliers: List[Dict[str, Any]], ts: Optional[float] = None):
+        self._pending.extend(quote_rows(product_id, suppliers, ts if ts is not None else time.time()))
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_requested = asyncio.Event()
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later(self._flush_requested))
+        if len(self._pending) >= self.batch_size:
+            self._flush_requested.set()
+
+    async def _flush_later(self, flush_requested: asyncio.Event):
+        try:
+            await asyncio.wait_for(flush_requested.wait(), self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        await self.flush()
+
+    async def flush(self):
+        while self._pending:
+            rows, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self.store.append, rows)
+            except Exception as e:
+                logger.error("Failed to write %s price quotes: %s", len(rows), e)
+                return
+
+    async def close(self):
+        task = self._flush_task
+        if task and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self._flush_requested.set()
+            await task
+        await self.flush()
+
+
+_price_history_writer: Optional[PriceHistoryWriter] = None
+
+
+def get_price_history_writer() -> PriceHistoryWriter:
+    global _price_history_writer
+    if _price_history_writer is None:
+        _price_history_writer = PriceHistoryWriter()
+    return _price_history_writer
+
+
+@on_config_change("PRICE_HISTORY_BATCH_SIZE", "PRICE_HISTORY_FLUSH_SECONDS")
+def _reload_writer(changed):
+    if _price_history_writer is not None:
+        _price_history_writer.batch_size = Config.PRICE_HISTORY_BATCH_SIZE
+        _price_history_writer.flush_interval = Config.PRICE_HISTORY_FLUSH_SECONDS
@@ -0,0 +1,71 @@
+from typing import List, Dict, Any
+import numpy as np
+from config import Config
+from database import Product
+from fx import fx_table
+from landed_cost import landed_cost_model
+
+DUTY_COSTS_NAME = "Таможенная пошлина"
+
+_rng = np.random.default_rng()
+
+
+def price_suppliers(product: Product, suppliers: List[Dict[str, Any]], config: Config) -> List[Dict[str, Any]]:
+    count = len(suppliers)
+    if count == 0:
+        return []
+
+    native_rates = fx_table.rate_vector([supplier["currency"] for supplier in suppliers])
+    rub_rate = fx_table.rate("RUB")
+
+    price_variation = 0.85 + _rng.random(count) * 0.35
+    price_local = np.round(product.base_price_usd * price_variation * native_rates, 2)
+    price_usd = np.round(price_local / native_rates, 2)
+    price_rub = price_local / native_rates * rub_rate
+
+    landed_cost = landed_cost_model.calculate(
+        product,
+        [supplier["country"] for supplier in suppliers],
+        price_usd,
+        config.DESTINATION_COUNTRY,
+        config
+    )
+
+    delivery_cost_rub = landed_cost["freight_usd"] * rub_rate
+    delivery_cost_percent = delivery_cost_rub / price_rub * 100
+    storage_cost_percent = config.DEFAULT_STORAGE_PERCENT
+    storage_cost_rub = price_rub * (storage_cost_percent / 100)
+    additional_costs_percent = landed_cost["duty_percent"]
+    additional_costs_rub = landed_cost["duty_usd"] * rub_rate
+
+    final_price_rub = price_rub + delivery_cost_rub + storage_cost_rub + additional_costs_rub
+    final_price_usd = final_price_rub / rub_rate
+
+    columns = {
+        "price_local": price_local,
+        "price_usd": price_usd,
+        "price_rub": price_rub,
+        "delivery_cost_percent": delivery_cost_percent,
+        "delivery_cost_rub": delivery_cost_rub,
+        "storage_cost_rub": storage_cost_rub,
+        "additional_costs_percent": additional_costs_percent,
+        "additional_costs_rub": additional_costs_rub,
+        "final_price_rub": final_price_rub,
+        "final_price_usd": final_price_usd
+    }
+    rows = np.round(np.column_stack(list(columns.values())), 2).tolist()
+
+    suppliers_with_prices = []
+    for supplier, row in zip(suppliers, rows):
+        supplier_data = dict(supplier)
+        supplier_data.update(zip(columns, row))
+        supplier_data.update({
+            "storage_cost_percent": storage_cost_percent,
+            "additional_costs_name": DUTY_COSTS_NAME,
+            "moq": supplier["min_order_value"],
+            "lead_time": supplier["delivery_time"],
+            "chargeable_weight_kg": landed_cost["chargeable_weight_kg"]
+        })
+        suppliers_with_prices.append(supplier_data)
+
+    return suppliers_with_prices
@@ -0,0 +1,181 @@
+import cProfile
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional
+from config import Config
+from config_reload import on_config_change
+
+logger = logging.getLogger(__name__)
+
+KB = 1024.0
+
+
+class RequestProfile:
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.peak_kb = 0.0
+        self.stages: List[Dict[str, Any]] = []
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.open_stages = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "seconds": round(self.seconds, 4),
+            "peak_kb": round(self.peak_kb, 1) if self.cprofile else None,
+            "cprofile": self.cprofile is not None,
+            "stages": self.stages
+        }
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class Profiler:
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        output_dir: Optional[str] = None,
+        slowest_requests: Optional[int] = None,
+        top_allocations: Optional[int] = None
+    ):
+        self.enabled = Config.PROFILING_ENABLED if enabled is None else enabled
+        self.output_dir = output_dir or Config.PROFILING_DIR
+        self.slowest_requests = slowest_requests or Config.PROFILING_SLOWEST_REQUESTS
+        self.top_allocations = top_allocations or Config.PROFILING_TOP_ALLOCATIONS
+        self._slowest: List[tuple] = []
+        self._cprofile_active = False
+        self._lock = threading.Lock()
+
+    def _start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(Config.PROFILING_TRACEMALLOC_FRAMES)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ))
+
+    @contextmanager
+    def stage(self, name: str):
+        profile = _current_profile.get()
+        if not self.enabled or profile is None:
+            yield
+            return
+
+        if profile.cprofile is None:
+            # tracemalloc counters are process-wide, so only the request holding the cProfile slot reads them
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                profile.stages.append({"name": name, "seconds": round(time.perf_counter() - started, 4)})
+            return
+
+        before = self._snapshot()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        if not profile.open_stages:
+            tracemalloc.reset_peak()
+        profile.open_stages += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            profile.open_stages -= 1
+            memory_after, peak = tracemalloc.get_traced_memory()
+            top = self._snapshot().compare_to(before, "lineno")[:self.top_allocations]
+
+            peak_kb = (peak - memory_before) / KB
+            profile.peak_kb = max(profile.peak_kb, peak_kb)
+            profile.stages.append({
+                "name": name,
+                "seconds": round(seconds, 4),
+                "allocated_kb": round((memory_after - memory_before) / KB, 1),
+                "peak_kb": round(peak_kb, 1),
+                "top_allocations": [str(stat) for stat in top]
+            })
+
+    @contextmanager
+    def request(self, label: str):
+        if not self.enabled:
+            yield None
+            return
+
+        self._start_tracing()
+        profile = RequestProfile(label)
+        token = _current_profile.set(profile)
+
+        with self._lock:
+            if not self._cprofile_active:
+                self._cprofile_active = True
+                profile.cprofile = cProfile.Profile()
+        if profile.cprofile:
+            profile.cprofile.enable()
+
+        started = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            profile.seconds = time.perf_counter() - started
+            if profile.cprofile:
+                profile.cprofile.disable()
+                with self._lock:
+                    self._cprofile_active = False
+            _current_profile.reset(token)
+            self._record(profile)
+
+    def _record(self, profile: RequestProfile):
+        try:
+            with open(os.path.join(self.output_dir, "requests.jsonl"), "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(profile.summary(), ensure_ascii=False) + "\n")
+
+            if profile.cprofile:
+                self._keep_if_slow(profile)
+        except OSError as e:
+            logger.error("Failed to write profile for %s: %s", profile.label, e)
+
+    def _keep_if_slow(self, profile: RequestProfile):
+        path = os.path.join(
+            self.output_dir,
+            f"{profile.label}_{int(profile.started_at)}_{profile.seconds * 1000:.0f}ms.prof"
+        )
+        with self._lock:
+            if len(self._slowest) >= self.slowest_requests:
+                if profile.seconds <= self._slowest[0][0]:
+                    return
+                _, evicted = heapq.heapreplace(self._slowest, (profile.seconds, path))
+            else:
+                evicted = None
+                heapq.heappush(self._slowest, (profile.seconds, path))
+
+        profile.cprofile.dump_stats(path)
+        if evicted and os.path.exists(evicted):
+            os.remove(evicted)
+
+    def slowest(self) -> List[str]:
+        with self._lock:
+            return [path for _, path in sorted(self._slowest, reverse=True)]
+
+
+profiler = Profiler()
+
+
+@on_config_change("PROFILING_ENABLED", "PROFILING_SLOWEST_REQUESTS", "PROFILING_TOP_ALLOCATIONS")
+def _reload_profiler(changed):
+    profiler.enabled = Config.PROFILING_ENABLED
+    profiler.slowest_requests = Config.PROFILING_SLOWEST_REQUESTS
+    profiler.top_allocations = Config.PROFILING_TOP_ALLOCATIONS
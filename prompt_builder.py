@@ -0,0 +1,104 @@
+import csv
+import io
+import math
+import re
+from typing import List, Dict, Any, Callable, Optional
+from config import Config
+from config_reload import on_config_change
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+INLINE_WHITESPACE_PATTERN = re.compile(r"[ \t]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+SUPPLIER_TABLE_HEADER = ["id", "поставщик", "страна", "цена_usd", "рейтинг", "срок_дн", "moq_usd"]
+
+
+def estimate_tokens(text: str) -> int:
+    tokens = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        word = match.group()
+        chars_per_token = 4 if word.isascii() else 2.5
+        tokens += max(1, math.ceil(len(word) / chars_per_token))
+    return tokens
+
+
+def compact_whitespace(text: str) -> str:
+    lines = [INLINE_WHITESPACE_PATTERN.sub(" ", line).strip() for line in text.strip().splitlines()]
+    return BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines))
+
+
+def _encode_rows(rows: List[List[Any]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().rstrip("\n")
+
+
+def encode_supplier_row(supplier: Dict[str, Any]) -> List[Any]:
+    lead_time = supplier["lead_time"].replace(" days", "").replace(" ", "")
+    return [
+        supplier["id"],
+        supplier["name"],
+        supplier["country"],
+        f"{supplier['final_price_usd']:.2f}",
+        supplier["rating"],
+        lead_time,
+        f"{supplier['moq']:g}"
+    ]
+
+
+def encode_supplier_table(suppliers: List[Dict[str, Any]]) -> str:
+    return _encode_rows([SUPPLIER_TABLE_HEADER] + [encode_supplier_row(s) for s in suppliers])
+
+
+class PromptBuilder:
+    def __init__(self, token_budgets: Optional[Dict[str, Dict[str, int]]] = None):
+        self.token_budgets = token_budgets or Config.GROQ_TOKEN_BUDGETS
+
+    def budget_for(self, model: str) -> Dict[str, int]:
+        return self.token_budgets.get(model, self.token_budgets["default"])
+
+    def build(
+        self,
+        model: str,
+        system_prompt: str,
+        render_user_prompt: Callable[[str], str],
+        suppliers: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        budget = self.budget_for(model)
+        system_prompt = compact_whitespace(system_prompt)
+
+        base_tokens = (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(compact_whitespace(render_user_prompt(encode_supplier_table([]))))
+        )
+
+        prompt_tokens = base_tokens
+        supplier_count = 0
+        for supplier in suppliers:
+            row_tokens = estimate_tokens(_encode_rows([encode_supplier_row(supplier)]))
+            if supplier_count > 0 and prompt_tokens + row_tokens > budget["prompt"]:
+                break
+            prompt_tokens += row_tokens
+            supplier_count += 1
+
+        user_prompt = compact_whitespace(render_user_prompt(encode_supplier_table(suppliers[:supplier_count])))
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": budget["completion"],
+            "supplier_count": supplier_count,
+            "truncated": supplier_count < len(suppliers),
+            "prompt_tokens": prompt_tokens
+        }
+
+
+prompt_builder = PromptBuilder()
+
+
+@on_config_change("GROQ_TOKEN_BUDGETS")
+def _reload_token_budgets(changed):
+    prompt_builder.token_budgets = Config.GROQ_TOKEN_BUDGETS
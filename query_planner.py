@@ -0,0 +1,123 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional
+from config import Config
+
+TERM_SEPARATORS = re.compile(r"[,;\n]+")
+WHITESPACE = re.compile(r"\s+")
+NGRAM_SIZE = 3
+
+
+def normalize_term(term: str) -> str:
+    return WHITESPACE.sub(" ", term.casefold().replace("ё", "е")).strip(" .!?\"'«»")
+
+
+def split_terms(text: str) -> List[str]:
+    return [term.strip() for term in TERM_SEPARATORS.split(text) if term.strip()]
+
+
+def _ngrams(text: str) -> set:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class ProductNameIndex:
+    def __init__(self, products_data: Iterable[Dict[str, Any]]):
+        self.products = list(products_data)
+        self.all_bits = (1 << len(self.products)) - 1
+        self._haystacks = []
+        self._ngrams: Dict[str, int] = {}
+
+        for position, product in enumerate(self.products):
+            names = (normalize_term(product["name"]), normalize_term(product["full_name"]))
+            self._haystacks.append(names)
+            for ngram in _ngrams(names[0]) | _ngrams(names[1]):
+                self._ngrams[ngram] = self._ngrams.get(ngram, 0) | (1 << position)
+
+    def candidates(self, term: str) -> int:
+        mask = self.all_bits
+        for ngram in _ngrams(term):
+            mask &= self._ngrams.get(ngram, 0)
+            if not mask:
+                break
+        return mask
+
+    def lookup(self, term: str) -> Optional[Dict[str, Any]]:
+        mask = self.candidates(term)
+        while mask:
+            lowest = mask & -mask
+            position = lowest.bit_length() - 1
+            if any(term in haystack for haystack in self._haystacks[position]):
+                return self.products[position]
+            mask ^= lowest
+        return None
+
+    def lookup_many(self, terms: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return {term: self.lookup(term) for term in dict.fromkeys(terms)}
+
+
+@lru_cache(maxsize=1)
+def product_name_index() -> ProductNameIndex:
+    from database import ProductDatabase
+
+    return ProductNameIndex(ProductDatabase.PRODUCTS_DATA)
+
+
+class QueryPlan:
+    def __init__(self, terms: List[str]):
+        self.terms = terms
+        self.products: list = []
+        self.term_products: Dict[str, Optional[str]] = {}
+        self.not_found: List[str] = []
+        self.skipped: List[str] = []
+        self.semantic: Dict[str, float] = {}
+
+    def terms_for(self, product_id: str) -> List[str]:
+        return [term for term, matched_id in self.term_products.items() if matched_id == product_id]
+
+
+def plan_query(
+    text: str,
+    max_products: Optional[int] = None,
+    max_terms: Optional[int] = None,
+    index: Optional[ProductNameIndex] = None,
+    semantic: Optional[bool] = None
+) -> QueryPlan:
+    from database import Product
+
+    max_products = max_products or Config.MAX_PRODUCTS_PER_REQUEST
+    index = index or product_name_index()
+    semantic = Config.SEMANTIC_SEARCH_ENABLED if semantic is None else semantic
+
+    terms = split_terms(text)[:max_terms or Config.MAX_QUERY_TERMS]
+    plan = QueryPlan(terms)
+
+    normalized = {term: normalize_term(term) for term in terms}
+    matches = index.lookup_many(value for value in normalized.values() if value)
+    scores: Dict[str, float] = {}
+
+    if semantic:
+        from semantic_index import semantic_index
+
+        for value, match in matches.items():
+            if match is None:
+                matches[value], scores[value] = semantic_index().match(value) or (None, 0.0)
+
+    seen = set()
+
+    for term in terms:
+        match = matches.get(normalized[term])
+        plan.term_products[term] = match["id"] if match else None
+
+        if match is None:
+            plan.not_found.append(term)
+            continue
+        if scores.get(normalized[term]):
+            plan.semantic[term] = scores[normalized[term]]
+        if match["id"] not in seen:
+            seen.add(match["id"])
+            if len(plan.products) < max_products:
+                plan.products.append(Product(match))
+            else:
+                plan.skipped.append(term)
+
+    return plan
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import zlib
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from config import Config
+from config_reload import on_config_change
+from query_planner import normalize_term
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZES = (2, 3, 4)
+WORD_WEIGHT = 2.0
+MATCH_CANDIDATES = 3
+STEM_MIN_PREFIX = 4
+MODIFIER_WORDS = frozenset({"для", "с", "под", "от", "из", "на", "for", "with"})
+
+
+def product_texts(product: Dict[str, Any]) -> List[str]:
+    return [product["name"], product["full_name"], *product.get("aliases", [])]
+
+
+def _head_and_tail(text: str) -> Tuple[List[str], List[str]]:
+    words = normalize_term(text).replace("-", " ").split()
+    for position, word in enumerate(words):
+        if word in MODIFIER_WORDS:
+            return words[:position], words[position + 1:]
+    return words, []
+
+
+def _same_stem(first: str, second: str) -> bool:
+    if first == second:
+        return True
+    prefix = len(os.path.commonprefix([first, second]))
+    return prefix >= max(STEM_MIN_PREFIX, min(len(first), len(second)) - 2)
+
+
+def _overlaps(first: List[str], second: List[str]) -> bool:
+    return any(_same_stem(a, b) for a in first for b in second)
+
+
+def shares_stem(query: str, product: Dict[str, Any]) -> bool:
+    # "ноутбук" only names what "рюкзак для ноутбука" is for, so a match needs the heads
+    # to agree, or both tails when the query has a modifier of its own
+    query_head, query_tail = _head_and_tail(query)
+    for text in product_texts(product):
+        head, tail = _head_and_tail(text)
+        if _overlaps(query_head, head) or (query_tail and _overlaps(query_tail, tail)):
+            return True
+    return False
+
+
+def _features(text: str) -> Dict[int, float]:
+    features: Dict[int, float] = {}
+    for word in normalize_term(text).split():
+        key = zlib.crc32(word.encode("utf-8"))
+        features[key] = features.get(key, 0.0) + WORD_WEIGHT
+
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for i in range(len(padded) - size + 1):
+                key = zlib.crc32(padded[i:i + size].encode("utf-8"))
+                features[key] = features.get(key, 0.0) + 1.0
+    return features
+
+
+def embed(texts: Iterable[str], dimensions: int):
+    import numpy as np
+
+    rows, keys, weights = [], [], []
+    row_count = 0
+    for row_count, text in enumerate(texts, 1):
+        features = _features(text)
+        rows.extend([row_count - 1] * len(features))
+        keys.extend(features)
+        weights.extend(features.values())
+
+    keys = np.array(keys, dtype=np.uint32)
+    signs = np.where(keys & 0x80000000, -1.0, 1.0).astype(np.float32)
+    vectors = np.zeros((row_count, dimensions), dtype=np.float32)
+    np.add.at(vectors, (np.array(rows, dtype=np.int64), keys % dimensions), signs * np.array(weights, dtype=np.float32))
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _fingerprint(products: List[Dict[str, Any]], dimensions: int) -> str:
+    digest = zlib.crc32(str(dimensions).encode("utf-8"))
+    for product in products:
+        for text in [product["id"], *product_texts(product)]:
+            digest = zlib.crc32(text.encode("utf-8"), digest)
+    return f"{digest:08x}"
+
+
+class SemanticIndex:
+    def __init__(
+        self,
+        products: Iterable[Dict[str, Any]],
+        path: Optional[str] = None,
+        dimensions: Optional[int] = None
+    ):
+        import numpy as np
+
+        self.products = list(products)
+        self.dimensions = dimensions or Config.SEMANTIC_DIMENSIONS
+        self.path = path
+        self.fingerprint = _fingerprint(self.products, self.dimensions)
+        self.row_products = np.array([
+            position
+            for position, product in enumerate(self.products)
+            for _ in product_texts(product)
+        ], dtype=np.int64)
+        self.vectors = self._load() if path else None
+        if self.vectors is None:
+            self.vectors = self._build()
+
+    def _meta_path(self) -> str:
+        return f"{self.path}.json"
+
+    def _load(self):
+        import numpy as np
+
+        try:
+            with open(self._meta_path(), encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            if meta.get("fingerprint") != self.fingerprint:
+                return None
+            vectors = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.info("Rebuilding semantic index %s: %s", self.path, e)
+            return None
+
+        if vectors.shape != (len(self.row_products), self.dimensions):
+            return None
+        return vectors
+
+    def _build(self):
+        import numpy as np
+
+        vectors = embed(
+            (text for product in self.products for text in product_texts(product)),
+            self.dimensions
+        )
+        if not self.path:
+            return vectors
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        matrix = np.lib.format.open_memmap(self.path, mode="w+", dtype=np.float32, shape=vectors.shape)
+        matrix[:] = vectors
+        matrix.flush()
+        with open(self._meta_path(), "w", encoding="utf-8") as meta_file:
+            json.dump({"fingerprint": self.fingerprint, "rows": len(self.row_products)}, meta_file)
+        return np.load(self.path, mmap_mode="r")
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        import numpy as np
+
+        if not len(self.row_products):
+            return []
+
+        scores = self.vectors @ embed([query], self.dimensions)[0]
+
+        # several rows can point at one product, so over-fetch before deduplicating
+        fetch = min(len(scores), k * 4)
+        top = np.argpartition(-scores, fetch - 1)[:fetch]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        seen = set()
+        for row in top:
+            position = int(self.row_products[row])
+            if position not in seen:
+                seen.add(position)
+                results.append((self.products[position], float(scores[row])))
+                if len(results) == k:
+                    break
+        return results
+
+    def match(self, query: str, min_score: Optional[float] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        min_score = Config.SEMANTIC_MIN_SCORE if min_score is None else min_score
+        for product, score in self.search(query, k=MATCH_CANDIDATES):
+            if score < min_score:
+                break
+            if shares_stem(query, product):
+                return product, score
+        return None
+
+
+@lru_cache(maxsize=1)
+def semantic_index() -> SemanticIndex:
+    from database import ProductDatabase
+
+    return SemanticIndex(ProductDatabase.PRODUCTS_DATA, Config.SEMANTIC_INDEX_PATH)
+
+
+@on_config_change("SEMANTIC_DIMENSIONS")
+def _reload_index(changed):
+    semantic_index.cache_clear()
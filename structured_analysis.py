@@ -0,0 +1,265 @@
+import json
+import re
+from typing import List, Dict, Any, Callable, Optional
+
+PICK_SECTIONS = ("best_pick", "budget", "premium")
+MAX_RISKS = 5
+
+_PICK_SCHEMA = {
+    "type": "object",
+    "required": ["supplier_id", "reason"],
+    "properties": {
+        "supplier_id": {"type": "string"},
+        "reason": {"type": "string"}
+    }
+}
+
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "required": ["best_pick", "budget", "premium", "risks", "recommendation"],
+    "properties": {
+        "best_pick": _PICK_SCHEMA,
+        "budget": _PICK_SCHEMA,
+        "premium": _PICK_SCHEMA,
+        "risks": {"type": "array", "items": {"type": "string"}, "maxItems": MAX_RISKS},
+        "recommendation": {
+            "type": "object",
+            "required": ["supplier_id", "text"],
+            "properties": {
+                "supplier_id": {"type": "string"},
+                "text": {"type": "string"}
+            }
+        }
+    }
+}
+
+JSON_INSTRUCTIONS = (
+    "Ответьте только JSON-объектом без пояснений:\n"
+    '{"best_pick": {"supplier_id": "...", "reason": "..."}, '
+    '"budget": {"supplier_id": "...", "reason": "..."}, '
+    '"premium": {"supplier_id": "...", "reason": "..."}, '
+    '"risks": ["..."], '
+    '"recommendation": {"supplier_id": "...", "text": "..."}}\n'
+    f"supplier_id - значение из колонки id таблицы, risks - до {MAX_RISKS} коротких пунктов."
+)
+
+LABELS = {
+    "ru": {
+        "best_pick": "🏆 Лучший выбор",
+        "budget": "💰 Бюджетный вариант",
+        "premium": "💎 Премиум вариант",
+        "risks": "⚠️ Риски",
+        "recommendation": "✅ Рекомендация",
+        "no_risks": "не выявлены",
+        "sheet_risks": "Риски",
+        "sheet_recommendation": "Рекомендация"
+    },
+    "en": {
+        "best_pick": "🏆 Best pick",
+        "budget": "💰 Budget option",
+        "premium": "💎 Premium option",
+        "risks": "⚠️ Risks",
+        "recommendation": "✅ Recommendation",
+        "no_risks": "none found",
+        "sheet_risks": "Risks",
+        "sheet_recommendation": "Recommendation"
+    }
+}
+
+SHEET_HEADER = ["Товар", "Раздел", "Поставщик", "Страна", "Цена с доставкой (USD)", "Рейтинг", "Комментарий"]
+
+_TYPES = {"object": dict, "array": list, "string": str}
+_MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+class AnalysisFormatError(ValueError):
+    pass
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$"):
+    expected = _TYPES[schema["type"]]
+    if not isinstance(value, expected):
+        raise AnalysisFormatError(f"{path} must be {schema['type']}")
+
+    if expected is str and not value.strip():
+        raise AnalysisFormatError(f"{path} must not be empty")
+
+    if expected is dict:
+        for name in schema.get("required", ()):
+            if name not in value:
+                raise AnalysisFormatError(f"{path}.{name} is required")
+        for name, property_schema in schema.get("properties", {}).items():
+            if name in value:
+                validate(value[name], property_schema, f"{path}.{name}")
+
+    if expected is list:
+        if len(value) > schema.get("maxItems", len(value)):
+            raise AnalysisFormatError(f"{path} has more than {schema['maxItems']} items")
+        for index, item in enumerate(value):
+            validate(item, schema["items"], f"{path}[{index}]")
+
+
+def _extract_json(content: str) -> Any:
+    start, end = content.find("{"), content.rfind("}")
+    if start < 0 or end < start:
+        raise AnalysisFormatError("no JSON object in completion")
+    try:
+        return json.loads(content[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise AnalysisFormatError(f"invalid JSON: {e}") from None
+
+
+def _supplier_ref(suppliers_by_id: Dict[str, Dict[str, Any]], supplier_id: str, path: str) -> Dict[str, Any]:
+    supplier = suppliers_by_id.get(supplier_id.strip())
+    if supplier is None:
+        raise AnalysisFormatError(f"{path}.supplier_id {supplier_id!r} is not in the supplier table")
+    return _supplier_snapshot(supplier)
+
+
+def _supplier_snapshot(supplier: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "supplier_id": supplier["id"],
+        "supplier": supplier["name"],
+        "country": supplier["country"],
+        "price_usd": supplier["final_price_usd"],
+        "rating": supplier["rating"]
+    }
+
+
+def parse_analysis(content: str, suppliers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    data = _extract_json(content)
+    validate(data, ANALYSIS_SCHEMA)
+
+    suppliers_by_id = {supplier["id"]: supplier for supplier in suppliers}
+    structured = {
+        section: {
+            **_supplier_ref(suppliers_by_id, data[section]["supplier_id"], f"$.{section}"),
+            "reason": data[section]["reason"].strip()
+        }
+        for section in PICK_SECTIONS
+    }
+    structured["risks"] = [risk.strip() for risk in data["risks"]]
+    structured["recommendation"] = {
+        **_supplier_ref(suppliers_by_id, data["recommendation"]["supplier_id"], "$.recommendation"),
+        "text": data["recommendation"]["text"].strip()
+    }
+    return structured
+
+
+def rule_based_analysis(
+    suppliers: List[Dict[str, Any]],
+    statistics: Dict[str, Any],
+    top_suppliers: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    if not suppliers or not statistics.get("total_suppliers_analyzed"):
+        return None
+
+    best_value = suppliers[statistics["best_value_supplier_index"]]
+    cheapest = suppliers[statistics["best_supplier_index"]]
+    candidates = top_suppliers or suppliers
+    premium = max(candidates, key=lambda supplier: (supplier["rating"], -supplier["final_price_usd"]))
+    recommended = top_suppliers[0] if top_suppliers else best_value
+
+    risks = [
+        f"{supplier['name']}: рейтинг {supplier['rating']}"
+        for supplier in {s["id"]: s for s in (best_value, cheapest, recommended)}.values()
+        if supplier["rating"] < 4.0
+    ]
+    if statistics.get("max_lead_time_days", 0) > 21:
+        risks.append(f"Доставка у части поставщиков до {statistics['max_lead_time_days']:.0f} дн.")
+    if statistics["max_price_usd"] > 2 * statistics["min_price_usd"]:
+        risks.append(f"Большой разброс цен: {statistics['price_range_usd']}")
+
+    return {
+        "best_pick": {
+            **_supplier_snapshot(best_value),
+            "reason": "Лучшее соотношение рейтинга и цены"
+        },
+        "budget": {
+            **_supplier_snapshot(cheapest),
+            "reason": "Минимальная цена с доставкой и пошлиной"
+        },
+        "premium": {
+            **_supplier_snapshot(premium),
+            "reason": "Самый высокий рейтинг среди лучших поставщиков"
+        },
+        "risks": risks[:MAX_RISKS],
+        "recommendation": {
+            **_supplier_snapshot(recommended),
+            "text": "Первый в общем рейтинге по цене, надежности, сроку и MOQ"
+        }
+    }
+
+
+def escape_markdown(text: str) -> str:
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", str(text))
+
+
+def _plain(text: str) -> str:
+    return text
+
+
+def _supplier_line(pick: Dict[str, Any], escape: Callable[[str], str]) -> str:
+    return f"{escape(pick['supplier'])} ({escape(pick['country'])}, ${pick['price_usd']:.2f}, ★{pick['rating']})"
+
+
+def _render(structured: Dict[str, Any], language: str, bold: str, escape: Callable[[str], str]) -> str:
+    labels = LABELS[language]
+    lines = []
+    for section in PICK_SECTIONS:
+        pick = structured[section]
+        lines.append(f"{bold}{labels[section]}:{bold} {_supplier_line(pick, escape)}")
+        lines.append(f"  {escape(pick['reason'])}")
+
+    risks = structured["risks"]
+    lines.append(f"{bold}{labels['risks']}:{bold}" + ("" if risks else f" {labels['no_risks']}"))
+    lines.extend(f"• {escape(risk)}" for risk in risks)
+
+    recommendation = structured["recommendation"]
+    lines.append(f"{bold}{labels['recommendation']}:{bold} {escape(recommendation['supplier'])}")
+    lines.append(f"  {escape(recommendation['text'])}")
+    return "\n".join(lines)
+
+
+def render_markdown(structured: Dict[str, Any], language: str = "ru") -> str:
+    return _render(structured, language, "**", escape_markdown)
+
+
+def render_text(structured: Dict[str, Any], language: str = "ru") -> str:
+    return _render(structured, language, "", _plain)
+
+
+def sheet_rows(analysis: Dict[str, Any], language: str = "ru") -> List[List[Any]]:
+    product_name = analysis["product_name"]
+    structured: Optional[Dict[str, Any]] = analysis.get("structured")
+    if not structured:
+        return [[product_name, "", "", "", None, None, analysis.get("analysis", "")]]
+
+    labels = LABELS[language]
+    rows = [
+        [
+            product_name,
+            labels[section].split(" ", 1)[1],
+            structured[section]["supplier"],
+            structured[section]["country"],
+            structured[section]["price_usd"],
+            structured[section]["rating"],
+            structured[section]["reason"]
+        ]
+        for section in PICK_SECTIONS
+    ]
+    rows.extend(
+        [product_name, labels["sheet_risks"], "", "", None, None, risk]
+        for risk in structured["risks"]
+    )
+    recommendation = structured["recommendation"]
+    rows.append([
+        product_name,
+        labels["sheet_recommendation"],
+        recommendation["supplier"],
+        recommendation["country"],
+        recommendation["price_usd"],
+        recommendation["rating"],
+        recommendation["text"]
+    ])
+    return rows
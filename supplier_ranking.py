@@ -0,0 +1,80 @@
+from typing import List, Dict, Any, Optional
+import numpy as np
+from config import Config
+from config_reload import on_config_change
+from supplier_stats import parse_lead_time_days
+
+SCORE_CRITERIA = ("price", "rating", "lead_time", "moq")
+
+
+def select_top_k(values: np.ndarray, k: int, largest: bool = False) -> np.ndarray:
+    count = len(values)
+    k = min(k, count)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    keys = -values if largest else values
+    if k < count:
+        indices = np.argpartition(keys, k - 1)[:k]
+    else:
+        indices = np.arange(count)
+
+    return indices[np.argsort(keys[indices], kind="stable")]
+
+
+class SupplierRanker:
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.set_weights(weights or Config.SUPPLIER_SCORE_WEIGHTS)
+
+    def set_weights(self, weights: Dict[str, float]):
+        total = sum(weights.get(name, 0.0) for name in SCORE_CRITERIA)
+        self.weights = {name: weights.get(name, 0.0) / total for name in SCORE_CRITERIA}
+
+    def score(self, suppliers: List[Dict[str, Any]]) -> np.ndarray:
+        count = len(suppliers)
+        if count == 0:
+            return np.empty(0)
+
+        prices = np.fromiter((s["final_price_usd"] for s in suppliers), dtype=float, count=count)
+        ratings = np.fromiter((s["rating"] for s in suppliers), dtype=float, count=count)
+        moqs = np.fromiter((s["moq"] for s in suppliers), dtype=float, count=count)
+        lead_times = np.fromiter(
+            (sum(parse_lead_time_days(s["lead_time"])) / 2 for s in suppliers),
+            dtype=float,
+            count=count
+        )
+
+        return (
+            self.weights["price"] * (1.0 - self._normalize(prices))
+            + self.weights["rating"] * self._normalize(ratings)
+            + self.weights["lead_time"] * (1.0 - self._normalize(lead_times))
+            + self.weights["moq"] * (1.0 - self._normalize(moqs))
+        )
+
+    def top_k(self, suppliers: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        scores = self.score(suppliers)
+        top = []
+        for idx in select_top_k(scores, k, largest=True):
+            supplier = dict(suppliers[idx])
+            supplier["score"] = round(float(scores[idx]) * 100, 1)
+            top.append(supplier)
+        return top
+
+    @staticmethod
+    def _normalize(values: np.ndarray) -> np.ndarray:
+        if np.isnan(values).all():
+            return np.full(len(values), 0.5)
+
+        values = np.nan_to_num(values, nan=np.nanmax(values))
+        spread = values.max() - values.min()
+        if spread == 0:
+            return np.full(len(values), 0.5)
+        return (values - values.min()) / spread
+
+
+supplier_ranker = SupplierRanker()
+
+
+@on_config_change("SUPPLIER_SCORE_WEIGHTS")
+def _reload_weights(changed):
+    supplier_ranker.set_weights(Config.SUPPLIER_SCORE_WEIGHTS)
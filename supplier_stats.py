@@ -0,0 +1,88 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from config import Config
+from config_reload import on_config_change
+
+PRICE_PERCENTILES = (10, 25, 50, 75, 90)
+LEAD_TIME_PATTERN = re.compile(r"(\d+)(?:\s*-\s*(\d+))?")
+
+
+@lru_cache(maxsize=256)
+def parse_lead_time_days(lead_time: str) -> Tuple[float, float]:
+    match = LEAD_TIME_PATTERN.search(lead_time or "")
+    if not match:
+        return float("nan"), float("nan")
+
+    min_days = float(match.group(1))
+    max_days = float(match.group(2)) if match.group(2) else min_days
+    return min_days, max_days
+
+
+class SupplierStatisticsEngine:
+    def __init__(self, top_n: Optional[int] = None):
+        self.top_n = top_n or Config.MAX_SUPPLIERS_PER_PRODUCT
+
+    def calculate(self, suppliers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        count = len(suppliers)
+        if count == 0:
+            return {"total_suppliers_analyzed": 0}
+
+        prices = np.fromiter((s["final_price_usd"] for s in suppliers), dtype=float, count=count)
+        ratings = np.fromiter((s["rating"] for s in suppliers), dtype=float, count=count)
+        lead_times = np.array([parse_lead_time_days(s["lead_time"]) for s in suppliers], dtype=float)
+
+        best_idx = int(np.argmin(prices))
+        worst_idx = int(np.argmax(prices))
+        value_idx = int(np.argmax(ratings / prices))
+
+        top_n = min(self.top_n, count)
+        top_idx = np.argpartition(prices, top_n - 1)[:top_n] if top_n < count else np.arange(count)
+
+        percentiles = np.percentile(prices, PRICE_PERCENTILES)
+        lead_mid = lead_times.mean(axis=1)
+        has_lead_time = not np.isnan(lead_mid).all()
+
+        stats = {
+            "total_suppliers_analyzed": count,
+            "price_range_usd": f"${prices[best_idx]:.2f} - ${prices[worst_idx]:.2f}",
+            "min_price_usd": round(float(prices[best_idx]), 2),
+            "max_price_usd": round(float(prices[worst_idx]), 2),
+            "mean_price_usd": round(float(prices.mean()), 2),
+            "median_price_usd": round(float(percentiles[PRICE_PERCENTILES.index(50)]), 2),
+            "price_percentiles_usd": {
+                p: round(float(v), 2) for p, v in zip(PRICE_PERCENTILES, percentiles)
+            },
+            "rating_weighted_price_usd": round(float(np.average(prices, weights=ratings)), 2),
+            "average_rating": round(float(ratings[top_idx].mean()), 2),
+            "overall_average_rating": round(float(ratings.mean()), 2),
+            "best_supplier": suppliers[best_idx]["name"],
+            "best_supplier_index": best_idx,
+            "best_price_usd": float(prices[best_idx]),
+            "worst_supplier": suppliers[worst_idx]["name"],
+            "worst_supplier_index": worst_idx,
+            "worst_price_usd": float(prices[worst_idx]),
+            "best_value_supplier": suppliers[value_idx]["name"],
+            "best_value_supplier_index": value_idx,
+        }
+
+        if has_lead_time:
+            fastest_idx = int(np.nanargmin(lead_mid))
+            stats.update({
+                "min_lead_time_days": float(np.nanmin(lead_times[:, 0])),
+                "max_lead_time_days": float(np.nanmax(lead_times[:, 1])),
+                "mean_lead_time_days": round(float(np.nanmean(lead_mid)), 1),
+                "fastest_supplier": suppliers[fastest_idx]["name"],
+                "fastest_supplier_index": fastest_idx,
+            })
+
+        return stats
+
+
+statistics_engine = SupplierStatisticsEngine()
+
+
+@on_config_change("MAX_SUPPLIERS_PER_PRODUCT")
+def _reload_top_n(changed):
+    statistics_engine.top_n = Config.MAX_SUPPLIERS_PER_PRODUCT
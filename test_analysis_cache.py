@@ -0,0 +1,106 @@
+import os
+import tempfile
+import pytest
+from analysis_cache import AnalysisCache, SharedAnalysisCache, RequestTracker
+from database import ProductDatabase
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestAnalysisCache:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.cache = AnalysisCache(ttl_seconds=100, clock=self.clock)
+
+    def test_hit_and_expiry(self):
+        self.cache.put("PROD001", {"suppliers": []}, {"analysis": "ok"})
+
+        assert self.cache.get("PROD001")["analysis"] == {"analysis": "ok"}
+
+        self.clock.now += 100
+        assert self.cache.get("PROD001") is None
+        assert self.cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+        assert self.cache.evict_expired() == 1
+        assert self.cache.stats()["entries"] == 0
+
+    def test_needs_refresh_before_expiry(self):
+        assert self.cache.needs_refresh("PROD001", 30)
+
+        self.cache.put("PROD001", {}, {})
+        assert not self.cache.needs_refresh("PROD001", 30)
+
+        self.clock.now += 70
+        assert self.cache.needs_refresh("PROD001", 30)
+        assert self.cache.get("PROD001") is not None
+
+
+class TestSharedAnalysisCache:
+    def test_entries_are_shared_between_instances(self):
+        path = os.path.join(tempfile.mkdtemp(), "state.sqlite3")
+        clock = FakeClock()
+        writer = SharedAnalysisCache(path, ttl_seconds=100, clock=clock)
+        reader = SharedAnalysisCache(path, ttl_seconds=100, clock=clock)
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+
+        assert reader.get(product.id) is None
+        writer.put(product.id, {"product": product, "suppliers": []}, {"analysis": "ok"})
+
+        entry = reader.get(product.id)
+        assert entry["product_data"]["product"].id == product.id
+        assert entry["analysis"] == {"analysis": "ok"}
+        assert not reader.needs_refresh(product.id, 30)
+
+        clock.now += 100
+        assert reader.get(product.id) is None
+        assert reader.evict_expired() == 1
+        assert writer.stats()["entries"] == 0
+
+        writer.close()
+        reader.close()
+
+
+class TestRequestTracker:
+    def setup_method(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "state.sqlite3")
+        self.clock = FakeClock()
+        self.tracker = RequestTracker(self.path, half_life_seconds=100, clock=self.clock)
+
+    def teardown_method(self):
+        self.tracker.close()
+
+    def test_top_products_by_frequency(self):
+        self.tracker.record(["PROD001", "PROD002"])
+        self.tracker.record(["PROD002", "PROD002"])
+        self.tracker.record(["PROD003"])
+
+        assert self.tracker.scores()["PROD002"] == pytest.approx(2.0)
+        assert self.tracker.top(2) == ["PROD002", "PROD001"]
+
+    def test_old_requests_decay(self):
+        for _ in range(3):
+            self.tracker.record(["PROD001"])
+
+        self.clock.now += 200
+        self.tracker.record(["PROD002"])
+        self.tracker.record(["PROD002"])
+
+        assert self.tracker.scores()["PROD001"] == pytest.approx(0.75)
+        assert self.tracker.top(1) == ["PROD002"]
+
+    def test_counts_persist(self):
+        self.tracker.record(["PROD004"])
+        reopened = RequestTracker(self.path, half_life_seconds=100, clock=self.clock)
+
+        assert reopened.top(5) == ["PROD004"]
+        reopened.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from cancellation import (
+    ActiveSearches,
+    CancelScope,
+    SearchCancelled,
+    REASON_SHUTDOWN,
+    cancel_scope,
+    check_cancelled,
+    current_scope
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCancelScope:
+    def test_deadline(self):
+        clock = FakeClock()
+        scope = CancelScope(10.0, clock=clock)
+
+        assert scope.remaining() == 10.0
+        assert not scope.expired
+        clock.now += 12
+        assert scope.remaining() == 0.0
+        assert scope.expired
+
+    def test_without_deadline(self):
+        scope = CancelScope()
+
+        assert scope.remaining() is None
+        assert not scope.expired
+
+    def test_check_raises_after_cancel(self):
+        scope = CancelScope()
+        scope.check()
+        scope.cancel()
+        scope.cancel(REASON_SHUTDOWN)
+
+        assert scope.reason == "superseded"
+        with pytest.raises(SearchCancelled):
+            scope.check()
+
+    def test_scope_reaches_worker_threads(self):
+        scope = CancelScope()
+
+        async def run():
+            with cancel_scope(scope):
+                scope.cancel()
+                await asyncio.to_thread(check_cancelled)
+
+        with pytest.raises(SearchCancelled):
+            asyncio.run(run())
+        assert current_scope() is None
+
+
+class TestActiveSearches:
+    def test_new_search_supersedes_running_one(self):
+        searches = ActiveSearches()
+        seen = []
+
+        async def search(name, delay):
+            seen.append((name, current_scope().remaining() is not None))
+            await asyncio.sleep(delay)
+            return name
+
+        async def run():
+            first = searches.start(1, lambda: search("first", 10), timeout=60)
+            await asyncio.sleep(0)
+            second = searches.start(1, lambda: search("second", 0), timeout=60)
+            other = searches.start(2, lambda: search("other", 0))
+            results = await asyncio.gather(first, second, other, return_exceptions=True)
+            return results
+
+        first, second, other = asyncio.run(run())
+        assert isinstance(first, asyncio.CancelledError)
+        assert (second, other) == ("second", "other")
+        assert seen == [("first", True), ("second", True), ("other", False)]
+        assert len(searches) == 0
+
+    def test_drain_waits_for_running_searches(self):
+        searches = ActiveSearches()
+
+        async def run():
+            quick = searches.start(1, lambda: asyncio.sleep(0.01))
+            assert await searches.drain(timeout=1.0)
+            slow = searches.start(2, lambda: asyncio.sleep(10))
+            assert not await searches.drain(timeout=0.01)
+            await searches.cancel_all()
+            return quick
+
+        assert asyncio.run(run()).done()
+        assert len(searches) == 0
+
+    def test_cancel_all(self):
+        searches = ActiveSearches()
+
+        async def run():
+            task = searches.start(1, lambda: asyncio.sleep(10))
+            await asyncio.sleep(0)
+            await searches.cancel_all()
+            return task
+
+        task = asyncio.run(run())
+        assert task.cancelled()
+        assert 1 not in searches
+        assert not searches.cancel(1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,87 @@
+import pytest
+from circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test", window=4, min_calls=2, failure_ratio=0.5, slow_call_seconds=1.0, open_seconds=10.0, clock=clock
+    )
+
+
+class TestCircuitBreaker:
+    def test_opens_on_error_ratio(self):
+        breaker = _breaker(FakeClock())
+        breaker.record(True, 0.1)
+        assert breaker.allow()
+
+        breaker.record(False, 0.1)
+        assert breaker.state == STATE_OPEN
+        assert not breaker.allow()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = _breaker(FakeClock())
+        breaker.record(True, 2.0)
+        breaker.record(True, 2.0)
+
+        assert breaker.state == STATE_OPEN
+
+    def test_needs_minimum_calls(self):
+        breaker = _breaker(FakeClock())
+        breaker.record(False, 0.1)
+
+        assert breaker.state == STATE_CLOSED
+
+    def test_old_outcomes_leave_the_window(self):
+        breaker = _breaker(FakeClock())
+        for success in (True, True, True, False):
+            breaker.record(success, 0.1)
+        assert breaker.stats()["recent_failures"] == 1
+
+        for _ in range(4):
+            breaker.record(True, 0.1)
+        assert breaker.stats()["recent_failures"] == 0
+        assert breaker.state == STATE_CLOSED
+
+    def test_half_open_probe(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        breaker.trip()
+
+        assert not breaker.ready_to_probe()
+        clock.now = 10.0
+        assert breaker.ready_to_probe()
+        assert breaker.state == STATE_HALF_OPEN
+        assert not breaker.allow()
+        assert not breaker.ready_to_probe()
+
+        breaker.probe_result(False)
+        assert breaker.state == STATE_OPEN
+        assert breaker.trips == 2
+
+        clock.now = 20.0
+        assert breaker.ready_to_probe()
+        breaker.probe_result(True)
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow()
+
+    def test_configure_keeps_recent_outcomes(self):
+        breaker = _breaker(FakeClock())
+        breaker.record(False, 0.1)
+        breaker.configure(window=10, min_calls=3, failure_ratio=0.9, slow_call_seconds=5.0, open_seconds=1.0)
+        breaker.record(False, 0.1)
+
+        assert breaker.stats()["recent_failures"] == 2
+        assert breaker.state == STATE_CLOSED
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import tempfile
+import pytest
+import analysis_cache
+import config_reload
+import groq_analyzer
+from config import Config
+from config_reload import ConfigReloader, current_snapshot, on_config_change, pinned_snapshot, _listeners
+from database import ProductDatabase
+from fx import fx_table
+from landed_cost import chargeable_weight_kg
+from model_router import ModelRouter
+from outbound import OutboundMessageQueue
+from supplier_ranking import supplier_ranker
+
+
+class TestConfigReloader:
+    def setup_method(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "config.json")
+        self.reloader = ConfigReloader(self.path)
+        self.mtime = 1_000_000_000
+
+    def teardown_method(self):
+        self.reloader.apply(self.reloader.defaults)
+
+    def write(self, overrides):
+        with open(self.path, "w", encoding="utf-8") as config_file:
+            json.dump(overrides, config_file)
+        self.mtime += 1
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    def test_applies_overrides_and_bumps_version(self):
+        self.write({"USD_TO_RUB_EXCHANGE_RATE": 95, "MAX_PRODUCTS_PER_REQUEST": 7})
+
+        assert self.reloader.check() == {"USD_TO_RUB_EXCHANGE_RATE", "MAX_PRODUCTS_PER_REQUEST"}
+        assert Config.USD_TO_RUB_EXCHANGE_RATE == 95.0
+        assert isinstance(Config.USD_TO_RUB_EXCHANGE_RATE, float)
+        assert self.reloader.snapshot.version == 1
+        assert self.reloader.snapshot.MAX_PRODUCTS_PER_REQUEST == 7
+
+        assert self.reloader.check() == set()
+        assert self.reloader.snapshot.version == 1
+
+    def test_snapshot_is_frozen(self):
+        snapshot = self.reloader.snapshot
+
+        with pytest.raises(TypeError):
+            snapshot.values["MAX_PRODUCTS_PER_REQUEST"] = 1
+        with pytest.raises(AttributeError):
+            snapshot.UNKNOWN_SETTING
+
+    def test_removed_keys_revert_to_defaults(self):
+        default = Config.MAX_PRODUCTS_PER_REQUEST
+        self.write({"MAX_PRODUCTS_PER_REQUEST": default + 1})
+        self.reloader.check()
+
+        self.write({})
+        assert self.reloader.check() == {"MAX_PRODUCTS_PER_REQUEST"}
+        assert Config.MAX_PRODUCTS_PER_REQUEST == default
+
+    @pytest.mark.parametrize("overrides", [
+        {"NOT_A_SETTING": 1},
+        {"STATE_DB_PATH": "other.sqlite3"},
+        {"MAX_PRODUCTS_PER_REQUEST": "10"},
+        {"MAX_PRODUCTS_PER_REQUEST": 0},
+        {"TELEGRAM_CHAT_BURST": 0.5},
+        {"GROQ_MODEL": "mixtral-8x7b-32768"},
+        ["not", "an", "object"]
+    ])
+    def test_invalid_files_keep_current_config(self, overrides):
+        before = dict(self.reloader.snapshot.values)
+        self.write(overrides)
+
+        assert self.reloader.check() == set()
+        assert self.reloader.errors == 1
+        assert dict(self.reloader.snapshot.values) == before
+
+    def test_broken_json_is_rejected(self):
+        with open(self.path, "w", encoding="utf-8") as config_file:
+            config_file.write("{broken")
+
+        assert self.reloader.check() == set()
+        assert self.reloader.errors == 1
+
+    def test_listeners_only_see_their_keys(self):
+        calls = []
+        callback = on_config_change("MAX_QUERY_TERMS")(lambda changed: calls.append(changed))
+        try:
+            self.write({"MAX_PRODUCTS_PER_REQUEST": 9})
+            self.reloader.check()
+            self.write({"MAX_PRODUCTS_PER_REQUEST": 9, "MAX_QUERY_TERMS": 40})
+            self.reloader.check()
+        finally:
+            _listeners.remove((frozenset({"MAX_QUERY_TERMS"}), callback))
+
+        assert calls == [{"MAX_QUERY_TERMS"}]
+
+    def test_watch_polls_file(self):
+        async def run():
+            watcher = asyncio.create_task(self.reloader.watch(interval=0.01))
+            self.write({"MAX_QUERY_TERMS": 45})
+            await asyncio.sleep(0.05)
+            watcher.cancel()
+
+        asyncio.run(run())
+        assert Config.MAX_QUERY_TERMS == 45
+
+
+class TestLiveReconfiguration:
+    def setup_method(self):
+        self.reloader = ConfigReloader(os.path.join(tempfile.mkdtemp(), "config.json"))
+
+    def teardown_method(self):
+        self.reloader.apply(self.reloader.defaults)
+        analysis_cache._analysis_cache = None
+        groq_analyzer._groq_analyzer = None
+
+    def test_exchange_rate_invalidates_fx_table(self):
+        fx_table.rate("RUB")
+        self.reloader.apply(self.reloader.prepare({"USD_TO_RUB_EXCHANGE_RATE": 95.0}))
+
+        assert fx_table.rate("RUB") == 95.0
+
+    def test_pricing_change_clears_analysis_cache(self):
+        cache = analysis_cache.AnalysisCache()
+        analysis_cache._analysis_cache = cache
+        cache.put("PROD001", {}, {"analysis": "old"})
+
+        self.reloader.apply(self.reloader.prepare({"ANALYSIS_CACHE_TTL_SECONDS": 7200}))
+        assert cache.ttl_seconds == 7200
+        assert cache.get("PROD001") is not None
+
+        self.reloader.apply(self.reloader.prepare({"DEFAULT_DELIVERY_PERCENT": 4.0}))
+        assert cache.get("PROD001") is None
+
+    def test_volumetric_divisor_follows_the_snapshot(self):
+        assert chargeable_weight_kg(0.1, "30x30x45", self.reloader.snapshot.VOLUMETRIC_DIVISOR) == 8.1
+
+        self.reloader.apply(self.reloader.prepare({"VOLUMETRIC_DIVISOR": 10000.0}))
+
+        assert chargeable_weight_kg(0.1, "30x30x45", self.reloader.snapshot.VOLUMETRIC_DIVISOR) == 4.05
+
+    def test_pinned_job_keeps_its_config_version(self, monkeypatch):
+        monkeypatch.setattr(config_reload, "_config_reloader", self.reloader)
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+
+        async def price_in_worker_thread():
+            return await asyncio.to_thread(ProductDatabase.generate_supplier_prices, product, current_snapshot())
+
+        with pinned_snapshot(self.reloader.snapshot) as snapshot:
+            self.reloader.apply(self.reloader.prepare({"DEFAULT_STORAGE_PERCENT": 4.0}))
+            suppliers = asyncio.run(price_in_worker_thread())
+
+            assert current_snapshot() is snapshot
+        assert current_snapshot().DEFAULT_STORAGE_PERCENT == 4.0
+        for supplier in suppliers:
+            assert supplier["storage_cost_rub"] == pytest.approx(supplier["price_rub"] * 0.02, abs=0.01)
+
+    def test_supplier_weights_are_swapped(self):
+        self.reloader.apply(self.reloader.prepare({
+            "SUPPLIER_SCORE_WEIGHTS": {"price": 1.0, "rating": 0.0, "lead_time": 0.0, "moq": 0.0}
+        }))
+
+        assert supplier_ranker.weights["price"] == 1.0
+
+    def test_model_pools_are_resized(self):
+        analyzer = groq_analyzer.GroqAnalyzer(ModelRouter(client=object()))
+        groq_analyzer._groq_analyzer = analyzer
+        models = {
+            Config.GROQ_SMALL_MODEL: {"tier": "small", "max_concurrency": 2},
+            Config.GROQ_MODEL: {"tier": "large", "max_concurrency": 6}
+        }
+
+        self.reloader.apply(self.reloader.prepare({"GROQ_MODELS": models, "GROQ_TEMPERATURE": 0.2}))
+
+        assert analyzer.temperature == 0.2
+        assert set(analyzer.router.routes) == set(models)
+        assert analyzer.router.routes[Config.GROQ_MODEL].max_concurrency == 6
+        assert analyzer.router.routes[Config.GROQ_MODEL].semaphore._value == 6
+
+    def test_model_rename_moves_routes_and_budgets(self):
+        from prompt_builder import prompt_builder
+        analyzer = groq_analyzer.GroqAnalyzer(ModelRouter(client=object()))
+        groq_analyzer._groq_analyzer = analyzer
+        old_name = Config.GROQ_MODEL
+
+        changed = self.reloader.apply(self.reloader.prepare({"GROQ_MODEL": "llama-3.3-70b-versatile"}))
+
+        assert changed == {"GROQ_MODEL", "GROQ_MODELS", "GROQ_TOKEN_BUDGETS"}
+        assert "llama-3.3-70b-versatile" in analyzer.router.routes
+        assert old_name not in analyzer.router.routes
+        assert analyzer.router.routes["llama-3.3-70b-versatile"].tier == "large"
+        assert prompt_builder.token_budgets["llama-3.3-70b-versatile"] == {"prompt": 1200, "completion": 600}
+
+    def test_outbound_rates_are_updated(self):
+        queue = OutboundMessageQueue()
+        bucket = queue._chat_bucket(1)
+        queue.set_rates(10.0, 2.0, 5.0)
+
+        assert (queue.global_bucket.rate, queue.global_bucket.capacity) == (10.0, 10.0)
+        assert (bucket.rate, bucket.capacity) == (2.0, 5.0)
+        assert queue._chat_bucket(2).capacity == 5.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -53,6 +53,9 @@ class TestProductDatabase:
             assert supplier["additional_costs_percent"] >= 0
             assert supplier["additional_costs_rub"] >= 0
 
+            assert isinstance(supplier["currency"], str)
+            assert supplier["price_local"] > 0
+
     def test_generate_product_code(self):
         product = ProductDatabase.find_product_by_name("Беспроводные наушники")
         assert product is not None
@@ -93,6 +96,7 @@ class TestSupplierDatabase:
         assert hasattr(first_supplier, "rating")
         assert hasattr(first_supplier, "delivery_time")
         assert hasattr(first_supplier, "min_order_value")
+        assert hasattr(first_supplier, "currency")
 
 
 class TestConfig:
@@ -1,6 +1,5 @@
 import os
 import tempfile
-import time
 import pytest
 from openpyxl import load_workbook
 from excel_generator import ExcelReportGenerator
@@ -105,6 +104,36 @@ class TestExcelGenerator:
             actual_col = ws_analysis.cell(row=header_row, column=col_idx).value
             assert actual_col == expected_col, f"Column {col_idx} mismatch"
 
+    def test_report_in_target_currency(self):
+        report_path = self.generator.generate_supplier_analysis_report(
+            self.test_data, currency="EUR"
+        )
+
+        wb = load_workbook(report_path)
+        ws_analysis = wb["Анализ поставщиков"]
+        assert ws_analysis.cell(row=3, column=35).value == "Конечная цена (EUR)"
+
+        final_usd = ws_analysis.cell(row=4, column=22).value
+        final_eur = ws_analysis.cell(row=4, column=35).value
+        assert 0 < final_eur < final_usd
+
+        ws_summary = wb["Сводка"]
+        assert ws_summary.cell(row=3, column=6).value == "Лучшая цена (EUR)"
+        assert ws_summary.cell(row=4, column=6).value > 0
+
+    @pytest.mark.parametrize("max_suppliers", [2, 8])
+    def test_report_respects_supplier_count(self, max_suppliers):
+        report_path = self.generator.generate_supplier_analysis_report(
+            self.test_data, max_suppliers=max_suppliers
+        )
+
+        ws_analysis = load_workbook(report_path)["Анализ поставщиков"]
+        supplier_rows = [
+            row for row in range(4, ws_analysis.max_row + 1)
+            if ws_analysis.cell(row=row, column=9).value
+        ]
+        assert len(supplier_rows) == min(max_suppliers, len(self.test_suppliers))
+
     def test_report_generation_with_multiple_products(self):
         products_data = []
         product1 = ProductDatabase.find_product_by_name("Беспроводные наушники")
@@ -138,6 +167,42 @@ class TestExcelGenerator:
         assert "Анализ поставщиков" in wb.sheetnames
         assert "Сводка" in wb.sheetnames
 
+    def test_analysis_sheet_is_added_for_analyses(self):
+        top = self.test_suppliers[0]
+        pick = {
+            "supplier_id": top["id"],
+            "supplier": top["name"],
+            "country": top["country"],
+            "price_usd": top["final_price_usd"],
+            "rating": top["rating"],
+            "reason": "Лучшая цена"
+        }
+        analyses = [{
+            "product_name": self.test_product.name,
+            "analysis": "",
+            "structured": {
+                "best_pick": pick,
+                "budget": pick,
+                "premium": pick,
+                "risks": ["Долгая доставка"],
+                "recommendation": {**pick, "text": "Заказать образцы"}
+            }
+        }]
+
+        report_path = self.generator.generate_supplier_analysis_report(self.test_data, analyses=analyses)
+
+        wb = load_workbook(report_path)
+        assert wb.sheetnames == ["Анализ поставщиков", "Сводка", "AI рекомендации"]
+        ws = wb["AI рекомендации"]
+        rows = list(ws.iter_rows(min_row=4, values_only=True))
+        assert rows[0][:3] == (self.test_product.name, "Лучший выбор", top["name"])
+        assert rows[-1][6] == "Заказать образцы"
+
+    def test_analysis_sheet_is_skipped_without_analyses(self):
+        report_path = self.generator.generate_supplier_analysis_report(self.test_data)
+
+        assert "AI рекомендации" not in load_workbook(report_path).sheetnames
+
     def test_report_file_name_format(self):
         report_path = self.generator.generate_supplier_analysis_report(
             self.test_data
@@ -147,7 +212,18 @@ class TestExcelGenerator:
         assert filename.startswith("анализ_поставщиков_")
         assert filename.endswith(".xlsx")
 
-    @pytest.mark.xfail(reason="Timing issue with identical filenames due to very fast execution")
+    def test_concurrent_reports_get_distinct_files(self):
+        reports = [self.generator.start_report() for _ in range(2)]
+        for report in reports:
+            report.add_product(self.test_data[0])
+
+        paths = [report.finish() for report in reports]
+
+        assert paths[0] != paths[1]
+        assert all(os.path.exists(path) for path in paths)
+        for path in paths:
+            os.remove(path)
+
     def test_multiple_report_generations(self):
         import os
         reports = []
@@ -164,7 +240,6 @@ class TestExcelGenerator:
                 os.remove(report_path)
             except Exception as e:
                 pass
-            time.sleep(0.1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from database import ProductDatabase, SupplierDatabase
+from facets import FacetIndex, product_facets, supplier_facets, rating_bucket
+
+RECORDS = [
+    {"id": "A", "color": "red", "size": "S"},
+    {"id": "B", "color": "Blue", "size": "M"},
+    {"id": "C", "color": "red", "size": "M"},
+    {"id": "D", "color": "green", "size": "L"}
+]
+
+
+def _index() -> FacetIndex:
+    return FacetIndex(RECORDS, {"color": lambda r: r["color"], "size": lambda r: r["size"]})
+
+
+def _ids(index: FacetIndex, mask: int) -> list:
+    return [record["id"] for record in index.records_for(mask)]
+
+
+class TestFacetIndex:
+    def test_select_intersects_facets(self):
+        index = _index()
+
+        assert _ids(index, index.select(color="red")) == ["A", "C"]
+        assert _ids(index, index.select(color="red", size="M")) == ["C"]
+        assert _ids(index, index.select(color=["blue", "green"])) == ["B", "D"]
+        assert _ids(index, index.select()) == ["A", "B", "C", "D"]
+        assert index.select(color="purple") == 0
+
+    def test_counts(self):
+        index = _index()
+
+        assert index.counts("color") == {"red": 2, "Blue": 1, "green": 1}
+        assert index.counts("size", index.select(color="red")) == {"S": 1, "M": 1}
+
+    def test_parse_filters(self):
+        filters, unknown = _index().parse_filters(["RED", "m", "xl"])
+
+        assert filters == {"color": ["red"], "size": ["M"]}
+        assert unknown == ["xl"]
+
+
+class TestCatalogFacets:
+    def test_category_index_matches_scan(self):
+        index = product_facets()
+        for category, count in index.counts("category").items():
+            expected = [p["id"] for p in ProductDatabase.PRODUCTS_DATA if p["category"] == category]
+            assert _ids(index, index.select(category=category)) == expected
+            assert count == len(expected)
+
+    def test_premium_suppliers_from_eu(self):
+        index = supplier_facets()
+        filters, unknown = index.parse_filters(["premium", "EU"])
+        suppliers = index.records_for(index.select(**filters))
+
+        assert unknown == []
+        assert [supplier["country"] for supplier in suppliers] == ["Germany"]
+        assert all(supplier["status"] == "Premium" for supplier in suppliers)
+
+    def test_rating_buckets(self):
+        assert rating_bucket(4.9) == "4.5+"
+        assert rating_bucket(4.2) == "4.0-4.4"
+        assert rating_bucket(3.1) == "<4.0"
+
+        index = supplier_facets()
+        assert sum(index.counts("rating").values()) == len(SupplierDatabase.SUPPLIERS_DATA)
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, parse_mode=None):
+        self.replies.append(text)
+
+
+class TestFacetCommands:
+    def _run(self, command, *args) -> str:
+        message = FakeMessage()
+        update = SimpleNamespace(message=message)
+        asyncio.run(command(update, SimpleNamespace(args=list(args))))
+        return message.replies[-1]
+
+    def test_category_command(self):
+        import main
+
+        text = self._run(main.category_command, "электроника")
+        assert "Беспроводные наушники" in text
+        assert "Рюкзак" not in text
+
+        assert "Категории товаров" in self._run(main.category_command)
+
+    def test_suppliers_command(self):
+        import main
+
+        text = self._run(main.suppliers_command, "Premium", "EU", "марс")
+        assert "EuroQuality Goods" in text
+        assert "China Direct Trading" not in text
+        assert "Неизвестные фильтры: марс" in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
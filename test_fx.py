@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import numpy as np
+import pytest
+from fx import FxRateTable, StaticRateProvider, FileRateProvider
+from config import Config
+
+
+class CountingProvider:
+    def __init__(self, rates: dict):
+        self.rates = rates
+        self.calls = 0
+        self.fail = False
+
+    def fetch_rates(self) -> dict:
+        self.calls += 1
+        if self.fail:
+            raise IOError("provider unavailable")
+        return dict(self.rates)
+
+
+class TestRateProviders:
+    def test_static_provider_uses_configured_rub_rate(self):
+        rates = StaticRateProvider().fetch_rates()
+        assert rates["USD"] == 1.0
+        assert rates["RUB"] == Config.USD_TO_RUB_EXCHANGE_RATE
+        for currency in ["CNY", "EUR", "TRY", "INR"]:
+            assert rates[currency] > 0
+
+    def test_file_provider_rebases_to_usd(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as rates_file:
+            json.dump({"base": "EUR", "rates": {"EUR": 1.0, "usd": 1.25, "RUB": 100.0}}, rates_file)
+
+        try:
+            rates = FileRateProvider(path).fetch_rates()
+        finally:
+            os.remove(path)
+
+        assert rates["USD"] == pytest.approx(1.0)
+        assert rates["EUR"] == pytest.approx(0.8)
+        assert rates["RUB"] == pytest.approx(80.0)
+
+
+class TestFxRateTable:
+    def test_rates_are_cached_within_ttl(self):
+        provider = CountingProvider({"USD": 1.0, "EUR": 0.5})
+        table = FxRateTable(provider, ttl_seconds=60)
+
+        table.rate("EUR")
+        table.rate("USD")
+        table.convert([1.0, 2.0], "USD", "EUR")
+        assert provider.calls == 1
+
+    def test_expired_rates_are_refreshed(self):
+        provider = CountingProvider({"USD": 1.0})
+        table = FxRateTable(provider, ttl_seconds=1e-9)
+
+        table.rate("USD")
+        table.rate("USD")
+        assert provider.calls == 2
+
+    def test_stale_rates_kept_on_provider_failure(self):
+        provider = CountingProvider({"USD": 1.0, "EUR": 0.5})
+        table = FxRateTable(provider, ttl_seconds=1e-9)
+        table.rate("EUR")
+
+        provider.fail = True
+        assert table.rate("EUR") == 0.5
+
+    def test_unknown_currency(self):
+        table = FxRateTable(StaticRateProvider({"USD": 1.0}))
+        with pytest.raises(ValueError):
+            table.rate("XYZ")
+
+    def test_convert_single_currency(self):
+        table = FxRateTable(StaticRateProvider({"USD": 1.0, "RUB": 90.0}))
+        converted = table.convert([1.0, 2.0], "USD", "RUB")
+        assert np.allclose(converted, [90.0, 180.0])
+
+    def test_convert_mixed_currencies(self):
+        table = FxRateTable(StaticRateProvider({"USD": 1.0, "EUR": 0.5, "CNY": 7.0}))
+        converted = table.convert([0.5, 7.0, 3.0], ["EUR", "CNY", "USD"], "USD")
+        assert np.allclose(converted, [1.0, 1.0, 3.0])
+
+        back = table.convert([1.0, 1.0], "USD", ["CNY", "EUR"])
+        assert np.allclose(back, [7.0, 0.5])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,164 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from database import ProductDatabase
+from circuit_breaker import CircuitBreaker
+from groq_analyzer import GroqAnalyzer
+from model_router import ModelRouter
+from supplier_stats import statistics_engine
+from config import Config
+
+
+class FakeCompletions:
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FlakyCompletions:
+    def __init__(self):
+        self.healthy = False
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if not self.healthy:
+            raise ConnectionError("groq is down")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Анализ"))])
+
+
+def _make_analyzer(content: str = "Анализ") -> GroqAnalyzer:
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(content)))
+    return GroqAnalyzer(ModelRouter(client=client))
+
+
+class TestGroqAnalyzer:
+    def setup_method(self):
+        self.product = ProductDatabase.find_product_by_name("Беспроводные наушники")
+        self.suppliers = ProductDatabase.generate_supplier_prices(self.product, Config)
+        self.statistics = statistics_engine.calculate(self.suppliers)
+
+    def test_analyze_product_suppliers_uses_precomputed_statistics(self):
+        analyzer = _make_analyzer("Лучший выбор")
+        result = asyncio.run(analyzer.analyze_product_suppliers(
+            self.product, self.suppliers, self.statistics
+        ))
+
+        assert result["product_name"] == self.product.name
+        assert result["analysis"] == "Лучший выбор"
+        assert result["statistics"] is self.statistics
+        assert len(result["top_suppliers"]) == 3
+
+        user_prompt = analyzer.router.client.chat.completions.calls[0]["messages"][1]["content"]
+        assert self.statistics["price_range_usd"] in user_prompt
+
+    def test_structured_answer_is_parsed(self):
+        top = self.suppliers[:3]
+        pick = {"supplier_id": top[0]["id"], "reason": "Лучшая цена"}
+        analyzer = _make_analyzer(json.dumps({
+            "best_pick": pick,
+            "budget": pick,
+            "premium": pick,
+            "risks": [],
+            "recommendation": {"supplier_id": top[0]["id"], "text": "Заказать образцы"}
+        }))
+        result = asyncio.run(analyzer.analyze_product_suppliers(
+            self.product, self.suppliers, self.statistics, top
+        ))
+
+        request = analyzer.router.client.chat.completions.calls[0]
+        assert request["response_format"] == {"type": "json_object"}
+        assert result["structured"]["best_pick"]["supplier"] == top[0]["name"]
+        assert "Заказать образцы" in result["analysis"]
+        assert "**✅ Рекомендация:**" in analyzer.format_analysis_for_telegram(result)
+
+    def test_free_text_answer_is_kept(self):
+        analyzer = _make_analyzer("Просто текст")
+        result = asyncio.run(analyzer.analyze_product_suppliers(self.product, self.suppliers, self.statistics))
+
+        assert result["structured"] is None
+        assert "Просто текст" in analyzer.format_analysis_for_telegram(result)
+
+    def test_open_circuit_serves_rule_based_analysis(self):
+        completions = FlakyCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        breaker = CircuitBreaker("groq", window=4, min_calls=2, failure_ratio=0.5, open_seconds=0.05)
+        analyzer = GroqAnalyzer(ModelRouter(client=client), breaker)
+
+        async def analyze():
+            return await analyzer.analyze_product_suppliers(self.product, self.suppliers, self.statistics)
+
+        async def run():
+            results = [await analyze() for _ in range(4)]
+            calls_while_open = len(completions.calls)
+
+            completions.healthy = True
+            await asyncio.sleep(0.06)
+            await analyze()
+            await analyzer._probe_task
+            return results, calls_while_open, await analyze()
+
+        results, calls_while_open, recovered = asyncio.run(run())
+
+        assert breaker.trips == 1
+        assert calls_while_open == 2
+        assert all(result["fallback"] == "rules" and "model" not in result for result in results)
+        best_value = self.suppliers[self.statistics["best_value_supplier_index"]]
+        assert results[-1]["structured"]["best_pick"]["supplier"] == best_value["name"]
+        assert "подборка по правилам" in analyzer.format_analysis_for_telegram(results[-1])
+        assert breaker.state == "closed"
+        assert recovered["model"]
+
+    def test_analyze_multiple_products(self):
+        analyzer = _make_analyzer()
+        products_data = [{
+            "product": self.product,
+            "suppliers": self.suppliers,
+            "statistics": self.statistics
+        }]
+        analyses = asyncio.run(analyzer.analyze_multiple_products(products_data))
+        assert len(analyses) == 1
+        assert analyses[0]["statistics"]["best_supplier"] == self.statistics["best_supplier"]
+
+    def test_format_analysis_without_statistics(self):
+        analyzer = GroqAnalyzer()
+        formatted = analyzer.format_analysis_for_telegram({
+            "product_name": "Товар",
+            "analysis": "Анализ не удался.",
+            "statistics": {},
+            "top_suppliers": []
+        })
+        assert "N/A" in formatted
+
+    def test_format_analysis_with_statistics(self):
+        analyzer = GroqAnalyzer()
+        formatted = analyzer.format_analysis_for_telegram({
+            "product_name": self.product.name,
+            "analysis": "Анализ",
+            "statistics": self.statistics,
+            "top_suppliers": []
+        })
+        assert self.statistics["best_supplier"] in formatted
+
+    def test_format_analysis_escapes_free_text(self):
+        analyzer = GroqAnalyzer()
+        formatted = analyzer.format_analysis_for_telegram({
+            "product_name": "Товар",
+            "analysis": '{"best_pick": {"supplier_id": "SUP001"}}',
+            "statistics": {"best_supplier": "Best_Goods"},
+            "top_suppliers": []
+        })
+
+        assert "best\\_pick" in formatted
+        assert "supplier\\_id" in formatted
+        assert "(Best\\_Goods)" in formatted
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+import pytest
+from database import ProductDatabase
+from job_store import JobStore, STAGE_CREATED, STAGE_PRICED, STAGE_REPORTED, STAGE_ANALYZED, STAGE_DONE
+from config import Config
+
+
+class TestJobStore:
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.temp_dir, "jobs.sqlite3"))
+        self.product = ProductDatabase.find_product_by_name("Смарт-часы")
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_create_job(self):
+        job_id = self.store.create_job(1, 2, "смарт-часы", [self.product.id])
+        job = self.store.get_job(job_id)
+
+        assert job["stage"] == STAGE_CREATED
+        assert job["chat_id"] == 1
+        assert job["product_ids"] == [self.product.id]
+        assert job["products_data"] is None
+        assert job["analyses"] is None
+
+    def test_stage_outputs_round_trip(self):
+        job_id = self.store.create_job(1, 2, "смарт-часы", [self.product.id])
+        suppliers = ProductDatabase.generate_supplier_prices(self.product, Config)
+
+        self.store.save_priced(job_id, [{"product": self.product, "suppliers": suppliers}])
+        job = self.store.get_job(job_id)
+        assert job["stage"] == STAGE_PRICED
+        assert job["products_data"][0]["product"].id == self.product.id
+        assert job["products_data"][0]["suppliers"] == suppliers
+
+        self.store.save_report(job_id, "temp_reports/report.xlsx")
+        assert self.store.get_job(job_id)["stage"] == STAGE_REPORTED
+
+        analyses = [{"product_name": self.product.name, "analysis": "ok", "statistics": {}, "top_suppliers": []}]
+        self.store.save_analyses(job_id, analyses)
+        job = self.store.get_job(job_id)
+        assert job["stage"] == STAGE_ANALYZED
+        assert job["analyses"] == analyses
+        assert job["report_path"] == "temp_reports/report.xlsx"
+
+    def test_unfinished_jobs(self):
+        done_id = self.store.create_job(1, 1, "a", [])
+        failed_id = self.store.create_job(1, 1, "b", [])
+        pending_id = self.store.create_job(1, 1, "c", [])
+
+        self.store.complete(done_id)
+        self.store.fail(failed_id, "boom")
+
+        assert [job["id"] for job in self.store.unfinished_jobs()] == [pending_id]
+        assert self.store.get_job(done_id)["stage"] == STAGE_DONE
+        assert self.store.get_job(failed_id)["error"] == "boom"
+
+    def test_jobs_survive_reopen(self):
+        job_id = self.store.create_job(1, 1, "a", [self.product.id])
+        self.store.close()
+
+        self.store = JobStore(os.path.join(self.temp_dir, "jobs.sqlite3"))
+        assert [job["id"] for job in self.store.unfinished_jobs()] == [job_id]
+
+    def test_attempts_counter(self):
+        job_id = self.store.create_job(1, 1, "a", [])
+        assert self.store.start_attempt(job_id) == 1
+        assert self.store.start_attempt(job_id) == 2
+
+    def test_purge_finished(self):
+        job_id = self.store.create_job(1, 1, "a", [])
+        self.store.complete(job_id)
+        time.sleep(0.01)
+
+        assert self.store.purge_finished(0) == 1
+        assert self.store.get_job(job_id) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
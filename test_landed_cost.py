@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from database import ProductDatabase, Product
+from landed_cost import LandedCostModel, chargeable_weight_kg
+from config import Config
+
+
+def _product(weight_kg: float, dimensions_cm: str, category: str = "Электроника") -> Product:
+    return Product({
+        "id": "TEST",
+        "name": "Тест",
+        "full_name": "Тестовый товар",
+        "category": category,
+        "unit": "шт.",
+        "doc_unit": "шт.",
+        "base_price_usd": 10.0,
+        "weight_kg": weight_kg,
+        "dimensions_cm": dimensions_cm
+    })
+
+
+class TestChargeableWeight:
+    def test_volumetric_weight_wins_for_bulky_items(self):
+        assert chargeable_weight_kg(0.5, "50x40x30", Config.VOLUMETRIC_DIVISOR) == pytest.approx(50 * 40 * 30 / Config.VOLUMETRIC_DIVISOR)
+
+    def test_actual_weight_wins_for_dense_items(self):
+        assert chargeable_weight_kg(2.0, "10x10x10", Config.VOLUMETRIC_DIVISOR) == 2.0
+
+    def test_unparseable_dimensions(self):
+        assert chargeable_weight_kg(1.5, "", Config.VOLUMETRIC_DIVISOR) == 1.5
+
+
+class TestLandedCostModel:
+    def setup_method(self):
+        self.model = LandedCostModel(
+            freight_rates={"China": {"Russia": 4.0}, "Germany": {"Russia": 2.0}},
+            duty_rates={"Электроника": 10.0}
+        )
+
+    def test_freight_rate_matrix_lookup(self):
+        rates = self.model.freight_rates(["Germany", "China", "Mars"], "Russia")
+        assert rates[0] == 2.0
+        assert rates[1] == 4.0
+        assert np.isnan(rates[2])
+
+    def test_unknown_destination(self):
+        assert np.isnan(self.model.freight_rates(["China"], "Atlantis")).all()
+
+    def test_calculate(self):
+        product = _product(1.0, "10x10x10")
+        result = self.model.calculate(
+            product, ["China", "Germany"], np.array([100.0, 100.0]), "Russia"
+        )
+
+        assert np.allclose(result["freight_usd"], [4.0, 2.0])
+        assert np.allclose(result["duty_percent"], [10.0, 10.0])
+        assert np.allclose(result["duty_usd"], [10.4, 10.2])
+
+    def test_unknown_route_falls_back_to_percent(self):
+        product = _product(1.0, "10x10x10")
+        result = self.model.calculate(product, ["Mars"], np.array([100.0]), "Russia")
+        assert result["freight_usd"][0] == pytest.approx(Config.DEFAULT_DELIVERY_PERCENT)
+
+    def test_unknown_category_uses_default_duty(self):
+        assert self.model.duty_percent("Неизвестно") == Config.DEFAULT_ADDITIONAL_COSTS_PERCENT
+
+
+class TestLandedCostPricing:
+    def test_heavier_products_cost_more_to_deliver(self):
+        light = ProductDatabase.find_product_by_name("Фитнес-трекер")
+        heavy = ProductDatabase.find_product_by_name("Рюкзак")
+
+        light_suppliers = ProductDatabase.generate_supplier_prices(light, Config)
+        heavy_suppliers = ProductDatabase.generate_supplier_prices(heavy, Config)
+
+        for light_supplier, heavy_supplier in zip(light_suppliers, heavy_suppliers):
+            assert heavy_supplier["delivery_cost_rub"] > light_supplier["delivery_cost_rub"]
+
+    def test_final_price_includes_all_costs(self):
+        product = ProductDatabase.find_product_by_name("Смарт-часы")
+        for supplier in ProductDatabase.generate_supplier_prices(product, Config):
+            total = (
+                supplier["price_rub"]
+                + supplier["delivery_cost_rub"]
+                + supplier["storage_cost_rub"]
+                + supplier["additional_costs_rub"]
+            )
+            assert supplier["final_price_rub"] == pytest.approx(total, abs=0.05)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+import json
+import random
+import urllib.error
+import urllib.request
+import pytest
+from config import Config
+from database import ProductDatabase
+from fake_telegram_server import FakeTelegramServer, parse_form
+from load_test import LoadTest, percentile, random_basket, summarize_latency, format_report
+
+
+def _post(url: str, params: dict):
+    request = urllib.request.Request(url, data=json.dumps(params).encode("utf-8"))
+    request.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestLoadStatistics:
+    def test_percentile_uses_nearest_rank(self):
+        values = [float(value) for value in range(1, 101)]
+
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 100) == 100.0
+        assert percentile([], 95) == 0.0
+
+    def test_latency_summary_is_in_milliseconds(self):
+        summary = summarize_latency([0.1, 0.2, 0.3])
+
+        assert summary["count"] == 3
+        assert summary["p50_ms"] == 200.0
+        assert summary["max_ms"] == 300.0
+
+    def test_baskets_match_the_catalogue(self):
+        from query_planner import plan_query
+
+        rng = random.Random(1)
+        for _ in range(20):
+            basket = random_basket(rng, ProductDatabase.PRODUCTS_DATA, 3)
+            plan = plan_query(basket)
+            assert 1 <= len(plan.products) <= 3
+            assert not plan.not_found
+
+
+class TestFakeTelegramServer:
+    def test_records_messages_per_chat(self):
+        with FakeTelegramServer() as server:
+            status, payload = _post(f"{server.base_url}token/sendMessage", {"chat_id": 7, "text": "привет"})
+
+        assert status == 200
+        assert payload["result"]["chat"]["id"] == 7
+        assert [call["text"] for call in server.calls_for(7, "sendMessage")] == ["привет"]
+
+    def test_injects_flood_control(self):
+        with FakeTelegramServer(rate_limit_ratio=1.0, retry_after=3) as server:
+            status, payload = _post(f"{server.base_url}token/sendMessage", {"chat_id": 7, "text": "x"})
+
+        assert status == 429
+        assert payload["parameters"]["retry_after"] == 3
+        assert server.calls[0]["status"] == 429
+
+    def test_parses_multipart_uploads(self):
+        body = (
+            b"--b\r\nContent-Disposition: form-data; name=\"chat_id\"\r\n\r\n5\r\n"
+            b"--b\r\nContent-Disposition: form-data; name=\"document\"; filename=\"report.xlsx\"\r\n"
+            b"Content-Type: application/octet-stream\r\n\r\nxlsx\r\n--b--\r\n"
+        )
+
+        assert parse_form("multipart/form-data; boundary=b", body) == {"chat_id": "5", "document": "report.xlsx"}
+
+
+class TestLoadTest:
+    def test_small_run_completes_every_search(self):
+        token, base_url = Config.TELEGRAM_TOKEN, Config.TELEGRAM_BASE_URL
+        report = LoadTest(users=2, searches_per_user=1, think_time=0, groq_latency=0, search_timeout=60).run()
+
+        assert report["completed"] == report["searches"] == 2
+        assert report["error_rate"] == 0.0
+        assert report["errors"] == {}
+        assert report["latency"]["end_to_end"]["count"] == 2
+        assert {"price", "report", "analyze", "send"} <= set(report["latency"])
+        assert report["groq"]["calls"] > 0
+        assert "throughput" in format_report(report)
+        assert (Config.TELEGRAM_TOKEN, Config.TELEGRAM_BASE_URL) == (token, base_url)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
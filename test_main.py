@@ -0,0 +1,366 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+import pytest
+import analysis_cache
+import job_store
+import groq_analyzer
+import user_settings
+from config import Config
+from database import ProductDatabase
+from model_router import ModelRouter
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_TIME_BUDGET_US = 700_000
+HEAVY_MODULES = ["groq", "openpyxl", "pandas", "numpy"]
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.pop("GROQ_API_KEY", None)
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=PROJECT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+
+
+class TestMainImport:
+    def test_import_does_not_load_heavy_modules(self):
+        result = _run_python(
+            "-c",
+            "import sys, main; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ""
+
+    def test_import_without_groq_api_key(self):
+        result = _run_python("-c", "import main, groq_analyzer, excel_generator")
+        assert result.returncode == 0, result.stderr
+
+    def test_import_time_budget(self):
+        result = _run_python("-X", "importtime", "-c", "import main")
+        assert result.returncode == 0, result.stderr
+
+        cumulative_us = None
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative, module = line[len("import time:"):].split("|")
+            if module.strip() == "main":
+                cumulative_us = int(cumulative)
+
+        assert cumulative_us is not None
+        assert cumulative_us < IMPORT_TIME_BUDGET_US, f"import main took {cumulative_us}us"
+
+    def test_singletons_are_lazy(self):
+        result = _run_python(
+            "-c",
+            "import groq_analyzer, excel_generator; "
+            "print(groq_analyzer._groq_analyzer is None, "
+            "excel_generator._report_generator is None)"
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "True True"
+
+
+class TestBuildApplication:
+    def test_worker_application(self, monkeypatch):
+        import main
+        from webhook_dispatcher import ChatOrderedUpdateProcessor
+
+        monkeypatch.setattr(Config, "TELEGRAM_TOKEN", "123456:TEST")
+        application = main.build_application(worker_index=1)
+
+        assert application.updater is None
+        assert application.bot_data["worker_index"] == 1
+        assert isinstance(application.update_processor, ChatOrderedUpdateProcessor)
+        assert sum(len(handlers) for handlers in application.handlers.values()) == 8
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+        self.documents = []
+        self.workbooks = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.messages.append(text)
+
+    async def send_document(self, chat_id, document, filename, caption=None):
+        from openpyxl import load_workbook
+
+        self.documents.append(filename)
+        self.workbooks.append(load_workbook(document))
+
+
+class MarkdownRejectingBot(FakeBot):
+    async def send_message(self, chat_id, text, parse_mode=None):
+        from telegram.error import BadRequest
+
+        if parse_mode and "лимит токенов" in text:
+            raise BadRequest("Can't parse entities")
+        await super().send_message(chat_id, text, parse_mode)
+
+
+class FailingCompletions:
+    async def create(self, **kwargs):
+        raise AssertionError("analysis must not be recomputed")
+
+
+class TestSearchJobResume:
+    def setup_method(self):
+        temp_dir = tempfile.mkdtemp()
+        self.store = job_store.JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        self.settings = user_settings.UserSettingsStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        job_store._job_store = self.store
+        user_settings._user_settings_store = self.settings
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=FailingCompletions()))
+        groq_analyzer._groq_analyzer = groq_analyzer.GroqAnalyzer(ModelRouter(client=client))
+
+    def teardown_method(self):
+        job_store._job_store = None
+        user_settings._user_settings_store = None
+        groq_analyzer._groq_analyzer = None
+        self.settings.close()
+        self.store.close()
+
+    def test_resume_from_completed_analysis_stage(self):
+        import main
+
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        job_id = self.store.create_job(42, 7, "рюкзак", [product.id])
+        self.store.save_priced(job_id, asyncio.run(main._process_products([product])))
+        self.store.save_report(job_id, os.path.join(Config.TEMP_DIR, "missing.xlsx"))
+        self.store.save_analyses(job_id, [{
+            "product_name": product.name,
+            "analysis": "Сохраненный анализ",
+            "statistics": {},
+            "top_suppliers": []
+        }])
+
+        bot = FakeBot()
+        asyncio.run(main._run_search_job(bot, 42, job_id))
+
+        assert self.store.get_job(job_id)["stage"] == job_store.STAGE_DONE
+        assert any("Сохраненный анализ" in message for message in bot.messages)
+        assert len(bot.documents) == 1
+        assert bot.workbooks[0]["AI рекомендации"]["G4"].value == "Сохраненный анализ"
+
+    def test_token_quota_skips_ai_and_text_format_skips_report(self):
+        import main
+
+        self.settings.update(7, daily_tokens=0, report_format="text")
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        job_id = self.store.create_job(42, 7, "рюкзак", [product.id])
+
+        bot = FakeBot()
+        asyncio.run(main._run_search_job(bot, 42, job_id))
+
+        job = self.store.get_job(job_id)
+        assert job["stage"] == job_store.STAGE_DONE
+        assert job["report_path"] is None
+        assert bot.documents == []
+        assert any("лимит токенов" in message for message in bot.messages)
+
+    def test_rejected_product_message_does_not_abort_stream(self):
+        import main
+
+        self.settings.update(7, daily_tokens=0)
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        job_id = self.store.create_job(42, 7, "рюкзак", [product.id])
+
+        bot = MarkdownRejectingBot()
+        asyncio.run(main._run_search_job(bot, 42, job_id))
+
+        assert self.store.get_job(job_id)["stage"] == job_store.STAGE_DONE
+        assert any("лимит токенов" in message for message in bot.messages)
+        assert len(bot.documents) == 1
+
+    def test_error_report_failure_is_not_raised(self, monkeypatch):
+        import main
+
+        async def broken_stream(*args):
+            raise RuntimeError("pipeline broke")
+
+        class OfflineBot(FakeBot):
+            async def send_message(self, chat_id, text, parse_mode=None):
+                from telegram.error import NetworkError
+
+                raise NetworkError("HTTPXRequest is not initialized!")
+
+        monkeypatch.setattr(main, "_stream_search_job", broken_stream)
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        job_id = self.store.create_job(42, 7, "рюкзак", [product.id])
+
+        asyncio.run(main._run_search_job(OfflineBot(), 42, job_id))
+
+        assert self.store.get_job(job_id)["stage"] == job_store.STAGE_FAILED
+
+    def test_status_delete_failure_keeps_job_done(self):
+        import main
+
+        self.settings.update(7, daily_tokens=0, report_format="text")
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        job_id = self.store.create_job(42, 7, "рюкзак", [product.id])
+
+        bot = FakeBot()
+        asyncio.run(main._run_search_job(bot, 42, job_id, UndeletableStatusMessage()))
+
+        assert self.store.get_job(job_id)["stage"] == job_store.STAGE_DONE
+        assert not any("❌" in message for message in bot.messages)
+
+
+class SlowCompletions:
+    async def create(self, **kwargs):
+        await asyncio.sleep(10)
+
+
+class FakeStatusMessage:
+    def __init__(self):
+        self.texts = []
+
+    async def edit_text(self, text, parse_mode=None):
+        self.texts.append(text)
+
+    async def delete(self):
+        self.texts.append(None)
+
+
+class UndeletableStatusMessage(FakeStatusMessage):
+    async def delete(self):
+        from telegram.error import BadRequest
+
+        raise BadRequest("Message to delete not found")
+
+
+class TestSearchCancellation:
+    def setup_method(self):
+        temp_dir = tempfile.mkdtemp()
+        self.store = job_store.JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        self.settings = user_settings.UserSettingsStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        job_store._job_store = self.store
+        user_settings._user_settings_store = self.settings
+        analysis_cache._analysis_cache = analysis_cache.AnalysisCache()
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions()))
+        groq_analyzer._groq_analyzer = groq_analyzer.GroqAnalyzer(ModelRouter(client=client))
+        self.product = ProductDatabase.find_product_by_name("Рюкзак")
+
+    def teardown_method(self):
+        job_store._job_store = None
+        user_settings._user_settings_store = None
+        analysis_cache._analysis_cache = None
+        groq_analyzer._groq_analyzer = None
+        self.settings.close()
+        self.store.close()
+
+    def test_deadline_delivers_report_without_analysis(self):
+        import main
+        from cancellation import ActiveSearches
+
+        job_id = self.store.create_job(42, 7, "рюкзак", [self.product.id])
+        bot = FakeBot()
+
+        async def run():
+            started = time.monotonic()
+            await ActiveSearches().start(42, lambda: main._run_search_job(bot, 42, job_id), timeout=0.2)
+            return time.monotonic() - started
+
+        assert asyncio.run(run()) < 5.0
+        assert self.store.get_job(job_id)["stage"] == job_store.STAGE_DONE
+        assert any("не успел к сроку" in message for message in bot.messages)
+        assert bot.workbooks[0].sheetnames == ["Анализ поставщиков", "Сводка"]
+
+    def test_new_search_cancels_running_job(self):
+        import main
+        from cancellation import ActiveSearches
+
+        searches = ActiveSearches()
+        job_id = self.store.create_job(42, 7, "рюкзак", [self.product.id])
+        status = FakeStatusMessage()
+        bot = FakeBot()
+
+        async def run():
+            task = searches.start(42, lambda: main._run_search_job(bot, 42, job_id, status), timeout=60)
+            await asyncio.sleep(0.2)
+            assert searches.cancel(42)
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+
+        job = self.store.get_job(job_id)
+        assert job["stage"] == job_store.STAGE_FAILED
+        assert job["error"] == "superseded"
+        assert status.texts[-1] == "⏹ Запрос отменен."
+        assert bot.documents == []
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"Анализ {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class TestAnalysisWarmUp:
+    def setup_method(self):
+        temp_dir = tempfile.mkdtemp()
+        self.store = job_store.JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        self.tracker = analysis_cache.RequestTracker(os.path.join(temp_dir, "jobs.sqlite3"))
+        self.settings = user_settings.UserSettingsStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        job_store._job_store = self.store
+        user_settings._user_settings_store = self.settings
+        analysis_cache._request_tracker = self.tracker
+        analysis_cache._analysis_cache = analysis_cache.AnalysisCache()
+
+        self.completions = CountingCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        groq_analyzer._groq_analyzer = groq_analyzer.GroqAnalyzer(ModelRouter(client=client))
+
+    def teardown_method(self):
+        job_store._job_store = None
+        analysis_cache._request_tracker = None
+        analysis_cache._analysis_cache = None
+        user_settings._user_settings_store = None
+        groq_analyzer._groq_analyzer = None
+        self.settings.close()
+        self.tracker.close()
+        self.store.close()
+
+    def test_warm_entries_serve_interactive_requests(self):
+        import main
+
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        self.tracker.record([product.id])
+
+        asyncio.run(main.warm_up_analysis_cache(None))
+        assert self.completions.calls == 1
+
+        asyncio.run(main.warm_up_analysis_cache(None))
+        assert self.completions.calls == 1
+
+        job_id = self.store.create_job(42, 7, "рюкзак", [product.id])
+        bot = FakeBot()
+        asyncio.run(main._run_search_job(bot, 42, job_id))
+
+        assert self.completions.calls == 1
+        assert self.store.get_job(job_id)["stage"] == job_store.STAGE_DONE
+        assert any("Анализ 1" in message for message in bot.messages)
+        assert analysis_cache.get_analysis_cache().stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+import pytest
+from message_chunker import utf16_length, open_entities, split_message, pack_messages
+
+
+class TestUtf16Length:
+    def test_bmp_characters(self):
+        assert utf16_length("привет") == 6
+
+    def test_astral_emoji_counts_double(self):
+        assert utf16_length("📦") == 2
+        assert utf16_length("a📊b") == 4
+
+
+class TestOpenEntities:
+    def test_balanced(self):
+        assert open_entities("**bold** and `code`") == []
+
+    def test_open_bold(self):
+        assert open_entities("**bold and more") == ["**"]
+
+    def test_markers_inside_code_are_ignored(self):
+        assert open_entities("`a ** b`") == []
+        assert open_entities("```\n**\n") == ["```"]
+
+
+class TestSplitMessage:
+    def test_short_message_untouched(self):
+        assert split_message("hello", limit=100) == ["hello"]
+
+    def test_splits_on_paragraph_boundaries(self):
+        text = "\n\n".join(["a" * 40, "b" * 40, "c" * 40])
+        assert split_message(text, limit=90) == ["a" * 40 + "\n\n" + "b" * 40, "c" * 40]
+
+    def test_splits_on_line_boundaries(self):
+        text = "\n".join(["line %02d" % i for i in range(20)])
+        chunks = split_message(text, limit=50)
+        assert all(utf16_length(chunk) <= 50 for chunk in chunks)
+        assert "\n".join(chunks) == text
+
+    def test_respects_utf16_limit_with_emoji(self):
+        text = "📦" * 100
+        chunks = split_message(text, limit=50)
+        assert all(utf16_length(chunk) <= 50 for chunk in chunks)
+        assert "".join(chunks) == text
+
+    def test_does_not_split_zwj_sequences(self):
+        family = "\U0001F468\u200d\U0001F469\u200d\U0001F467"
+        chunks = split_message(family * 20, limit=30)
+        assert all(not chunk.startswith("\u200d") and not chunk.endswith("\u200d") for chunk in chunks)
+        assert "".join(chunks) == family * 20
+
+    def test_bold_entities_balanced_across_chunks(self):
+        text = "**" + " ".join(["слово"] * 60) + "**"
+        chunks = split_message(text, limit=100)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert utf16_length(chunk) <= 100
+            assert open_entities(chunk) == []
+            assert chunk.startswith("**") and chunk.endswith("**")
+
+    def test_code_block_balanced_across_chunks(self):
+        text = "```\n" + "\n".join(["x = %d" % i for i in range(50)]) + "\n```"
+        chunks = split_message(text, limit=80)
+        for chunk in chunks:
+            assert open_entities(chunk) == []
+
+
+class TestPackMessages:
+    def test_short_messages_packed(self):
+        assert pack_messages(["a", "b", "c"], limit=100) == ["a\n\nb\n\nc"]
+
+    def test_limit_respected(self):
+        packed = pack_messages(["a" * 6, "b" * 6, "c" * 6], limit=14)
+        assert packed == ["a" * 6 + "\n\n" + "b" * 6, "c" * 6]
+
+    def test_long_messages_split(self):
+        packed = pack_messages(["short", "\n".join(["x" * 30] * 10)], limit=100)
+        assert all(utf16_length(message) <= 100 for message in packed)
+        assert packed[0].startswith("short")
+
+    def test_blank_messages_dropped(self):
+        assert pack_messages(["  ", "\n", "x"], limit=100) == ["x"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
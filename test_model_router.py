@@ -0,0 +1,127 @@
+import asyncio
+import time
+import pytest
+from groq import AsyncGroq
+from fake_groq_server import FakeGroqServer
+from model_router import ModelRouter, ModelUnavailableError, TIER_LARGE, track_token_usage
+from config import Config
+
+MODELS = {
+    "small-model": {"tier": "small", "max_concurrency": 4},
+    "large-model": {"tier": "large", "max_concurrency": 4},
+    "backup-model": {"tier": "large", "max_concurrency": 4}
+}
+
+
+def _prompt(prompt_tokens: int = 100, truncated: bool = False):
+    def build(model: str) -> dict:
+        return {
+            "messages": [{"role": "user", "content": f"prompt for {model}"}],
+            "max_tokens": 50,
+            "prompt_tokens": prompt_tokens,
+            "truncated": truncated
+        }
+    return build
+
+
+def _router(server: FakeGroqServer, models: dict = None) -> ModelRouter:
+    client = AsyncGroq(api_key="test-key", base_url=server.base_url, max_retries=0)
+    return ModelRouter(models or MODELS, client=client)
+
+
+class TestModelRouter:
+    def test_small_request_goes_to_small_model(self):
+        with FakeGroqServer() as server:
+            result = asyncio.run(_router(server).complete(_prompt(100), 0.5))
+
+        assert result["model"] == "small-model"
+        assert result["content"] == "Анализ от small-model"
+        assert server.models_called() == ["small-model"]
+
+    def test_large_request_escalates(self):
+        with FakeGroqServer() as server:
+            big = asyncio.run(_router(server).complete(_prompt(Config.GROQ_SMALL_REQUEST_TOKENS + 1), 0.5))
+            truncated = asyncio.run(_router(server).complete(_prompt(100, truncated=True), 0.5))
+
+        assert big["model"] in ("large-model", "backup-model")
+        assert truncated["model"] in ("large-model", "backup-model")
+
+    def test_rate_limit_fails_over(self):
+        with FakeGroqServer(failures={"small-model": [429]}) as server:
+            router = _router(server)
+            result = asyncio.run(router.complete(_prompt(100), 0.5))
+
+        assert result["model"] != "small-model"
+        assert server.models_called()[0] == "small-model"
+        assert router.stats()["small-model"]["failures"] == 1
+
+    def test_server_error_fails_over(self):
+        with FakeGroqServer(failures={"large-model": [503], "backup-model": [500]}) as server:
+            result = asyncio.run(_router(server).complete(_prompt(100), 0.5, tier=TIER_LARGE))
+
+        assert result["model"] == "small-model"
+        assert server.models_called()[-1] == "small-model"
+
+    def test_client_error_is_not_retried(self):
+        with FakeGroqServer(failures={"small-model": [400]}) as server:
+            with pytest.raises(Exception):
+                asyncio.run(_router(server).complete(_prompt(100), 0.5))
+
+        assert server.models_called() == ["small-model"]
+
+    def test_all_models_failing(self):
+        failures = {model: [500] for model in MODELS}
+        with FakeGroqServer(failures=failures) as server:
+            with pytest.raises(ModelUnavailableError):
+                asyncio.run(_router(server).complete(_prompt(100), 0.5))
+
+        assert sorted(server.models_called()) == sorted(MODELS)
+
+    def test_routes_to_faster_model_within_tier(self):
+        latency = {"large-model": 0.15, "backup-model": 0.0}
+        with FakeGroqServer(model_latency=latency) as server:
+            router = _router(server)
+
+            async def run():
+                for _ in range(3):
+                    await router.complete(_prompt(100), 0.5, tier=TIER_LARGE)
+            asyncio.run(run())
+
+        assert server.models_called()[-1] == "backup-model"
+        stats = router.stats()
+        assert stats["backup-model"]["latency_ewma"] < 0.15
+
+    def test_per_model_concurrency_limit(self):
+        models = {"small-model": {"tier": "small", "max_concurrency": 1}}
+        with FakeGroqServer(latency=0.1) as server:
+            router = _router(server, models)
+
+            async def run():
+                await asyncio.gather(*(router.complete(_prompt(100), 0.5) for _ in range(3)))
+
+            started = time.monotonic()
+            asyncio.run(run())
+            elapsed = time.monotonic() - started
+
+        assert elapsed >= 0.3
+        times = sorted(entry["time"] for entry in server.requests)
+        assert all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:]))
+
+    def test_token_usage_is_tracked_per_context(self):
+        with FakeGroqServer() as server:
+            router = _router(server)
+
+            async def run():
+                with track_token_usage() as usage:
+                    results = await asyncio.gather(*(router.complete(_prompt(100), 0.5) for _ in range(2)))
+                await router.complete(_prompt(100), 0.5)
+                return usage, results
+
+            usage, results = asyncio.run(run())
+
+        assert results[0]["tokens"] > 0
+        assert usage.total == sum(result["tokens"] for result in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,200 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+import pytest
+from telegram.error import BadRequest, RetryAfter
+import outbound
+from outbound import TokenBucket, SharedTokenBucket, OutboundMessageQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBot:
+    def __init__(self, flood_failures: int = 0):
+        self.messages = []
+        self.documents = []
+        self.flood_failures = flood_failures
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if self.flood_failures:
+            self.flood_failures -= 1
+            raise RetryAfter(0)
+        self.messages.append((chat_id, text, time.monotonic()))
+        return text
+
+    async def send_document(self, chat_id, document, filename, caption=None):
+        self.documents.append((chat_id, document.read(), filename))
+
+
+class MarkdownRejectingBot(FakeBot):
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if parse_mode and "_" in text:
+            raise BadRequest("Can't parse entities")
+        return await super().send_message(chat_id, text, parse_mode)
+
+
+class TestTokenBucket:
+    def test_burst_within_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=3.0, clock=clock)
+        assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.reserve() == pytest.approx(1.0)
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=1.0, clock=clock)
+        bucket.reserve()
+        clock.now = 0.5
+        assert bucket.reserve() == 0.0
+
+    def test_reservations_queue_up(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10.0, capacity=1.0, clock=clock)
+        bucket.reserve()
+        assert bucket.reserve() == pytest.approx(0.1)
+        assert bucket.reserve() == pytest.approx(0.2)
+
+
+class TestSharedTokenBucket:
+    def test_capacity_is_shared_between_instances(self):
+        path = os.path.join(tempfile.mkdtemp(), "state.sqlite3")
+        clock = FakeClock()
+        first = SharedTokenBucket("global", rate=10.0, capacity=2.0, path=path, clock=clock)
+        second = SharedTokenBucket("global", rate=10.0, capacity=2.0, path=path, clock=clock)
+
+        assert first.reserve() == 0.0
+        assert second.reserve() == 0.0
+        assert first.reserve() == pytest.approx(0.1)
+        assert second.reserve() == pytest.approx(0.2)
+
+        clock.now = 1.0
+        assert second.reserve() == 0.0
+
+    def test_acquire_reserves_off_the_event_loop(self, monkeypatch):
+        import threading
+
+        path = os.path.join(tempfile.mkdtemp(), "state.sqlite3")
+        bucket = SharedTokenBucket("global", rate=10.0, capacity=2.0, path=path)
+        reserve = bucket.reserve
+        threads = []
+
+        def recording_reserve(tokens=1.0):
+            threads.append(threading.current_thread())
+            return reserve(tokens)
+
+        monkeypatch.setattr(bucket, "reserve", recording_reserve)
+        asyncio.run(bucket.acquire())
+
+        assert threads and threads[0] is not threading.main_thread()
+
+
+class TestOutboundMessageQueue:
+    def test_sends_immediately_within_budget(self):
+        bot = FakeBot()
+        queue = OutboundMessageQueue(global_rate=30, chat_rate=1, chat_burst=3)
+
+        started = time.monotonic()
+        asyncio.run(queue.send_messages(bot, 1, ["x" * 3000, "y" * 3000, "z" * 3000]))
+        assert time.monotonic() - started < 0.2
+        assert len(bot.messages) == 3
+
+    def test_per_chat_rate_limit(self):
+        bot = FakeBot()
+        queue = OutboundMessageQueue(global_rate=100, chat_rate=20, chat_burst=1)
+
+        async def send():
+            for i in range(3):
+                await queue.send_message(bot, 1, str(i))
+
+        started = time.monotonic()
+        asyncio.run(send())
+        assert time.monotonic() - started >= 0.09
+        assert [m[1] for m in bot.messages] == ["0", "1", "2"]
+
+    def test_chats_do_not_block_each_other(self):
+        bot = FakeBot()
+        queue = OutboundMessageQueue(global_rate=100, chat_rate=1, chat_burst=1)
+
+        async def send():
+            await asyncio.gather(*(queue.send_message(bot, chat_id, "hi") for chat_id in range(5)))
+
+        started = time.monotonic()
+        asyncio.run(send())
+        assert time.monotonic() - started < 0.2
+        assert len(bot.messages) == 5
+
+    def test_retry_after_flood_control(self):
+        bot = FakeBot(flood_failures=1)
+        queue = OutboundMessageQueue(chat_burst=5)
+        asyncio.run(queue.send_message(bot, 1, "hello"))
+        assert [m[1] for m in bot.messages] == ["hello"]
+
+    def test_send_document_rewinds_file(self):
+        bot = FakeBot()
+        queue = OutboundMessageQueue()
+        document = io.BytesIO(b"report")
+        document.read()
+
+        asyncio.run(queue.send_document(bot, 1, document, "report.xlsx"))
+        assert bot.documents == [(1, b"report", "report.xlsx")]
+
+    def test_rejected_markdown_is_resent_as_plain_text(self):
+        bot = MarkdownRejectingBot()
+        queue = OutboundMessageQueue(global_rate=100, chat_rate=100, chat_burst=10)
+
+        sent = asyncio.run(queue.send_messages(bot, 1, ["supplier_name"], "Markdown", plain_text_fallback=True))
+
+        assert sent == ["supplier_name"]
+        with pytest.raises(BadRequest):
+            asyncio.run(queue.send_messages(bot, 1, ["supplier_name"], "Markdown"))
+
+    def test_stream_packs_texts_queued_behind_the_rate_limit(self):
+        bot = FakeBot()
+        queue = OutboundMessageQueue(global_rate=100, chat_rate=20, chat_burst=1)
+
+        async def stream():
+            async with queue.stream(bot, 1) as messages:
+                for i in range(4):
+                    messages.add(str(i))
+                    await asyncio.sleep(0)
+
+        asyncio.run(stream())
+        # "1" waits on the chat bucket while "2" and "3" queue up behind it
+        assert [m[1] for m in bot.messages] == ["0", "1", "2\n\n3"]
+
+    def test_stream_surfaces_send_errors(self):
+        bot = MarkdownRejectingBot()
+        queue = OutboundMessageQueue(global_rate=100, chat_rate=100, chat_burst=10)
+
+        async def stream():
+            async with queue.stream(bot, 1, "Markdown") as messages:
+                messages.add("supplier_name")
+
+        with pytest.raises(BadRequest):
+            asyncio.run(stream())
+
+    def test_idle_chats_are_evicted(self, monkeypatch):
+        monkeypatch.setattr(outbound, "CHAT_SWEEP_MIN", 2)
+        bot = FakeBot()
+        queue = OutboundMessageQueue(global_rate=100, chat_rate=1, chat_burst=1)
+
+        asyncio.run(queue.send_message(bot, 1, "hi"))
+        assert not queue._chat_locks
+        assert not queue._pending
+
+        queue._chat_bucket(2)
+        queue._chat_bucket(3)
+        # chat 1 is still refilling after its message, chat 2 never spent a token
+        assert set(queue._chat_buckets) == {1, 3}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import tempfile
+import time
+import pytest
+import analysis_cache
+import cli
+import groq_analyzer
+import price_history
+from cancellation import CancelScope, cancel_scope
+from config import Config
+from database import ProductDatabase
+from pipeline import Pipeline, Stage, analyze_product, price_product, search_stages
+
+
+def _collect(pipeline: Pipeline, items) -> list:
+    return asyncio.run(pipeline.collect(items))
+
+
+class TestPipeline:
+    def test_stages_run_in_sequence_per_item(self):
+        async def double(value):
+            return value * 2
+
+        async def increment(value):
+            return value + 1
+
+        pipeline = Pipeline([Stage("double", double), Stage("increment", increment)])
+        assert _collect(pipeline, [1, 2, 3]) == [3, 5, 7]
+
+    def test_items_stream_through_stages(self):
+        events = []
+
+        async def first(value):
+            events.append(("first", value))
+            return value
+
+        async def second(value):
+            await asyncio.sleep(0.01)
+            events.append(("second", value))
+            return value
+
+        _collect(Pipeline([Stage("first", first), Stage("second", second)], queue_size=1), range(1, 10))
+
+        assert events.index(("first", 2)) < events.index(("second", 1))
+        assert events.index(("second", 1)) < events.index(("first", 5))
+
+    def test_stage_concurrency(self):
+        async def slow(value):
+            await asyncio.sleep(0.1)
+            return value
+
+        started = time.monotonic()
+        results = _collect(Pipeline([Stage("slow", slow, concurrency=4)]), range(4))
+
+        assert time.monotonic() - started < 0.3
+        assert sorted(results) == [0, 1, 2, 3]
+
+    def test_stage_timeout(self):
+        async def hang(value):
+            await asyncio.sleep(1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            _collect(Pipeline([Stage("hang", hang, timeout=0.05)]), [1])
+
+    def test_failure_stops_pipeline(self):
+        processed = []
+
+        async def fail_on_two(value):
+            if value == 2:
+                raise ValueError("bad item")
+            return value
+
+        async def record(value):
+            processed.append(value)
+            return value
+
+        with pytest.raises(ValueError):
+            _collect(Pipeline([Stage("check", fail_on_two), Stage("record", record)]), range(100))
+
+        assert len(processed) < 100
+
+    def test_consumer_can_stop_early(self):
+        async def identity(value):
+            return value
+
+        async def first_result():
+            async for result in Pipeline([Stage("identity", identity)]).run(range(100)):
+                return result
+
+        assert asyncio.run(first_result()) == 0
+
+
+class TestSearchStages:
+    def setup_method(self, method):
+        analysis_cache._analysis_cache = analysis_cache.AnalysisCache()
+        self.history_store = price_history.PriceHistoryStore(os.path.join(tempfile.mkdtemp(), "history.sqlite3"))
+        price_history._price_history_writer = price_history.PriceHistoryWriter(self.history_store)
+
+    def teardown_method(self, method):
+        analysis_cache._analysis_cache = None
+        price_history._price_history_writer = None
+        self.history_store.close()
+
+    def test_stage_names_follow_options(self):
+        async def emit(product_data, analysis):
+            pass
+
+        names = [stage.name for stage in search_stages(report=object(), emit=emit)]
+        assert names == ["price", "report", "analyze", "send"]
+        assert [stage.name for stage in search_stages(analyze=False)] == ["price", "analyze"]
+
+    def test_cli_batch_without_ai(self, capsys):
+        result = asyncio.run(cli.run_batch(["Рюкзак", "неизвестный товар", "Смарт-часы"], "USD", analyze=False))
+
+        assert os.path.exists(result["report_path"])
+        assert result["not_found"] == ["неизвестный товар"]
+        assert result["analyses"] == []
+        assert capsys.readouterr().out.count("✓") == 2
+        backpack = ProductDatabase.find_product_by_name("Рюкзак")
+        quotes = self.history_store.quotes(backpack.id, since=0)
+        assert len(quotes) == len(ProductDatabase.generate_supplier_prices(backpack, Config))
+        os.remove(result["report_path"])
+
+    def test_analysis_stops_at_deadline(self):
+        class SlowAnalyzer:
+            async def analyze_product_suppliers(self, *args):
+                await asyncio.sleep(10)
+
+        async def run():
+            product_data = await price_product(ProductDatabase.find_product_by_name("Рюкзак"))
+            with cancel_scope(CancelScope(0.05)):
+                started = time.monotonic()
+                analysis = await analyze_product(product_data)
+                return analysis, time.monotonic() - started
+
+        groq_analyzer._groq_analyzer = SlowAnalyzer()
+        try:
+            analysis, elapsed = asyncio.run(run())
+        finally:
+            groq_analyzer._groq_analyzer = None
+
+        assert analysis is None
+        assert elapsed < 1.0
+        assert analysis_cache._analysis_cache.stats()["entries"] == 0
+
+    def test_cache_is_looked_up_once_per_product(self):
+        class ModelAnalyzer:
+            async def analyze_product_suppliers(self, product, *args):
+                return {"product_name": product.name, "analysis": "Анализ", "model": "test"}
+
+        async def search():
+            product_data = await price_product(ProductDatabase.find_product_by_name("Рюкзак"))
+            return await analyze_product(product_data)
+
+        groq_analyzer._groq_analyzer = ModelAnalyzer()
+        try:
+            first, second = asyncio.run(search()), asyncio.run(search())
+        finally:
+            groq_analyzer._groq_analyzer = None
+
+        cache = analysis_cache.get_analysis_cache()
+        assert first == second
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+        assert "cached_analysis" not in cache._entries["PROD010"]["product_data"]
+
+    def test_analyze_stage_timeout_keeps_results(self, monkeypatch):
+        class SlowAnalyzer:
+            async def analyze_product_suppliers(self, *args):
+                await asyncio.sleep(1)
+
+        async def run():
+            products = [ProductDatabase.find_product_by_name("Рюкзак")]
+            with cancel_scope(CancelScope(0.5)):
+                return await Pipeline(search_stages()).collect(products)
+
+        monkeypatch.setitem(Config.PIPELINE_STAGES, "analyze", {"concurrency": 1, "timeout": 0.2})
+        groq_analyzer._groq_analyzer = SlowAnalyzer()
+        try:
+            results = asyncio.run(run())
+        finally:
+            groq_analyzer._groq_analyzer = None
+
+        assert len(results) == 1
+        product_data, analysis = results[0]
+        assert product_data["product"].name == "Рюкзак"
+        assert analysis is None
+
+    def test_read_product_names(self, tmp_path):
+        names_file = tmp_path / "products.txt"
+        names_file.write_text("Рюкзак\n\nСмарт-часы\n", encoding="utf-8")
+
+        args = cli.parse_args(["наушники, коврик", "--file", str(names_file), "--no-ai"])
+        assert cli.read_product_names(args) == ["наушники", "коврик", "Рюкзак", "Смарт-часы"]
+        assert args.no_ai
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
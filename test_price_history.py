@@ -0,0 +1,131 @@
+import asyncio
+import os
+import tempfile
+import pytest
+from database import ProductDatabase
+from config import Config
+from price_history import (
+    PriceHistoryStore, PriceHistoryWriter, DAY_SECONDS, moving_average, sparkline, quote_rows
+)
+
+NOW = 1_800_000_000.0
+
+
+def _suppliers(*prices):
+    return [
+        {
+            "id": f"SUP{index:03d}",
+            "name": f"Supplier {index}",
+            "currency": "USD",
+            "price_local": price,
+            "price_usd": price,
+            "final_price_usd": price * 1.1
+        }
+        for index, price in enumerate(prices, 1)
+    ]
+
+
+class TestTrendHelpers:
+    def test_moving_average(self):
+        assert moving_average([1.0, 2.0, 3.0, 4.0], 2) == [1.0, 1.5, 2.5, 3.5]
+        assert moving_average([], 3) == []
+
+    def test_sparkline(self):
+        assert sparkline([1.0, 5.0, 3.0]) == "▁█▅"
+        assert sparkline([2.0, 2.0]) == "▁▁"
+        assert sparkline([]) == ""
+
+
+class TestPriceHistoryStore:
+    def setup_method(self):
+        self.store = PriceHistoryStore(os.path.join(tempfile.mkdtemp(), "history.sqlite3"))
+        for day, prices in enumerate([(10.0, 12.0), (9.0, 11.0), (11.0, 8.0)]):
+            self.store.append(quote_rows("PROD001", _suppliers(*prices), NOW - (2 - day) * DAY_SECONDS))
+        self.store.append(quote_rows("PROD002", _suppliers(100.0), NOW))
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_range_queries(self):
+        assert len(self.store.quotes("PROD001", since=0)) == 6
+        assert len(self.store.quotes("PROD001", since=NOW - DAY_SECONDS, until=NOW + 1)) == 4
+        assert [q["price_usd"] for q in self.store.quotes("PROD001", 0, supplier_id="SUP002")] == [12.0, 11.0, 8.0]
+
+    def test_daily_series(self):
+        series = self.store.daily_series("PROD001", days=30, now=NOW)
+
+        assert [day["quotes"] for day in series] == [2, 2, 2]
+        assert [day["min_price_usd"] for day in series] == pytest.approx([11.0, 9.9, 8.8])
+        assert series[0]["avg_price_usd"] == pytest.approx(12.1)
+
+    def test_min_over_window(self):
+        best = self.store.min_over("PROD001", days=30, now=NOW)
+        assert best["supplier_id"] == "SUP002"
+        assert best["final_price_usd"] == pytest.approx(8.8)
+
+        assert self.store.min_over("PROD002", days=1, now=NOW)["final_price_usd"] == pytest.approx(110.0)
+        assert self.store.min_over("PROD999", days=30, now=NOW) is None
+
+
+class TestPriceHistoryWriter:
+    def setup_method(self):
+        self.store = PriceHistoryStore(os.path.join(tempfile.mkdtemp(), "history.sqlite3"))
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_writes_are_batched(self):
+        writer = PriceHistoryWriter(self.store, batch_size=100, flush_interval=0.05)
+
+        async def run():
+            writer.submit("PROD001", _suppliers(1.0, 2.0), ts=NOW)
+            writer.submit("PROD001", _suppliers(3.0), ts=NOW)
+            assert self.store.quotes("PROD001", 0) == []
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        assert len(self.store.quotes("PROD001", 0)) == 3
+
+    def test_full_batch_flushes_early(self):
+        writer = PriceHistoryWriter(self.store, batch_size=2, flush_interval=60)
+
+        async def run():
+            writer.submit("PROD001", _suppliers(1.0, 2.0), ts=NOW)
+            await asyncio.sleep(0.1)
+            return len(self.store.quotes("PROD001", 0))
+
+        assert asyncio.run(run()) == 2
+
+    def test_close_flushes_pending(self):
+        writer = PriceHistoryWriter(self.store, batch_size=100, flush_interval=60)
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        suppliers = ProductDatabase.generate_supplier_prices(product, Config)
+
+        async def run():
+            writer.submit(product.id, suppliers)
+            await writer.close()
+
+        asyncio.run(run())
+        assert len(self.store.quotes(product.id, 0)) == len(suppliers)
+
+
+class TestHistoryFormatting:
+    def test_renders_trend(self):
+        import main
+
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        series = [
+            {"min_price_usd": 10.0, "max_price_usd": 14.0, "quotes": 5},
+            {"min_price_usd": 8.0, "max_price_usd": 12.0, "quotes": 5}
+        ]
+        best = {"supplier_name": "China Direct Trading", "final_price_usd": 8.0, "ts": NOW}
+
+        text = main._format_price_history(product, series, best)
+        assert "█▁" in text
+        assert "$8.00 (China Direct Trading" in text
+        assert "Котировок: 10" in text
+        assert "пуста" in main._format_price_history(product, [], None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,98 @@
+import json
+import os
+import pstats
+import tempfile
+import time
+import tracemalloc
+import pytest
+from profiling import Profiler
+
+
+class TestProfiler:
+    def setup_method(self):
+        self.output_dir = os.path.join(tempfile.mkdtemp(), "profiles")
+
+    def teardown_method(self):
+        tracemalloc.stop()
+
+    def test_disabled_profiler_is_a_no_op(self):
+        profiler = Profiler(enabled=False, output_dir=self.output_dir)
+
+        with profiler.request("job_1") as profile:
+            with profiler.stage("pricing"):
+                pass
+
+        assert profile is None
+        assert not os.path.exists(self.output_dir)
+
+    def test_stage_records_allocations(self):
+        profiler = Profiler(enabled=True, output_dir=self.output_dir)
+
+        with profiler.request("job_1") as profile:
+            with profiler.stage("report_rows"):
+                rows = [[index] * 100 for index in range(2000)]
+
+        stage = profile.stages[0]
+        assert stage["name"] == "report_rows"
+        assert stage["peak_kb"] > 500
+        assert stage["allocated_kb"] > 500
+        assert any("test_profiling.py" in line for line in stage["top_allocations"])
+        assert profile.peak_kb == pytest.approx(stage["peak_kb"], abs=0.1)
+        assert len(rows) == 2000
+
+        with open(os.path.join(self.output_dir, "requests.jsonl"), encoding="utf-8") as log_file:
+            summary = json.loads(log_file.readline())
+        assert summary["label"] == "job_1"
+        assert summary["stages"][0]["name"] == "report_rows"
+
+    def test_stage_outside_request_is_ignored(self):
+        profiler = Profiler(enabled=True, output_dir=self.output_dir)
+        with profiler.stage("pricing"):
+            pass
+        assert not tracemalloc.is_tracing()
+
+    def test_keeps_slowest_cprofile_dumps(self):
+        profiler = Profiler(enabled=True, output_dir=self.output_dir, slowest_requests=2)
+
+        for label, delay in [("fast", 0.0), ("slow", 0.05), ("medium", 0.02), ("fastest", 0.0)]:
+            with profiler.request(label):
+                time.sleep(delay)
+
+        slowest = profiler.slowest()
+        assert [os.path.basename(path).split("_")[0] for path in slowest] == ["slow", "medium"]
+        assert sorted(name for name in os.listdir(self.output_dir) if name.endswith(".prof")) == sorted(
+            os.path.basename(path) for path in slowest
+        )
+        assert pstats.Stats(slowest[0]).total_calls > 0
+
+    def test_overlapping_requests_share_one_cprofile(self):
+        profiler = Profiler(enabled=True, output_dir=self.output_dir)
+
+        with profiler.request("outer") as outer:
+            with profiler.request("inner") as inner:
+                with profiler.stage("pricing"):
+                    pass
+
+        assert outer.cprofile is not None
+        assert inner.cprofile is None
+        assert [stage["name"] for stage in inner.stages] == ["pricing"]
+        assert "peak_kb" not in inner.stages[0]
+        assert inner.summary()["peak_kb"] is None
+        assert outer.stages == []
+
+    def test_nested_stage_keeps_the_outer_peak(self):
+        profiler = Profiler(enabled=True, output_dir=self.output_dir)
+
+        with profiler.request("job_1") as profile:
+            with profiler.stage("analyze"):
+                rows = [[index] * 100 for index in range(2000)]
+                del rows
+                with profiler.stage("send"):
+                    pass
+
+        assert [stage["name"] for stage in profile.stages] == ["send", "analyze"]
+        assert profile.stages[1]["peak_kb"] > 500
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
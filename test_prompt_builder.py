@@ -0,0 +1,100 @@
+import pytest
+from prompt_builder import (
+    PromptBuilder, estimate_tokens, compact_whitespace, encode_supplier_table
+)
+
+
+def _supplier(idx: int) -> dict:
+    return {
+        "id": f"SUP{idx:03d}",
+        "name": f"Supplier {idx}",
+        "country": "China",
+        "final_price_usd": 10.0 + idx,
+        "rating": 4.5,
+        "lead_time": "7-14 days",
+        "moq": 500
+    }
+
+
+class TestEstimateTokens:
+    def test_empty(self):
+        assert estimate_tokens("") == 0
+
+    def test_counts_words_and_punctuation(self):
+        assert estimate_tokens("a, b.") == 4
+
+    def test_cyrillic_costs_more_than_latin(self):
+        assert estimate_tokens("поставщики") > estimate_tokens("suppliers")
+
+    def test_grows_with_text(self):
+        assert estimate_tokens("word " * 100) > estimate_tokens("word " * 10)
+
+
+class TestCompactWhitespace:
+    def test_strips_indentation_and_runs(self):
+        text = """
+            Первая   строка
+                Вторая\tстрока
+
+
+
+            Третья
+        """
+        assert compact_whitespace(text) == "Первая строка\nВторая строка\n\nТретья"
+
+
+class TestEncodeSupplierTable:
+    def test_csv_block(self):
+        table = encode_supplier_table([_supplier(1)])
+        assert table == (
+            "id,поставщик,страна,цена_usd,рейтинг,срок_дн,moq_usd\n"
+            "SUP001,Supplier 1,China,11.00,4.5,7-14,500"
+        )
+
+    def test_quotes_commas(self):
+        supplier = _supplier(1)
+        supplier["name"] = "Trading Co., Ltd."
+        assert '"Trading Co., Ltd."' in encode_supplier_table([supplier])
+
+
+class TestPromptBuilder:
+    def _build(self, budgets: dict, suppliers: list) -> dict:
+        builder = PromptBuilder(budgets)
+        return builder.build(
+            "test-model",
+            "  Система  \n   промпт ",
+            lambda table: f"Поставщики:\n{table}\n",
+            suppliers
+        )
+
+    def test_includes_all_suppliers_within_budget(self):
+        prompt = self._build({"default": {"prompt": 10000, "completion": 300}}, [_supplier(i) for i in range(5)])
+        assert prompt["supplier_count"] == 5
+        assert prompt["max_tokens"] == 300
+        assert prompt["messages"][0]["content"] == "Система\nпромпт"
+        assert "SUP004" in prompt["messages"][1]["content"]
+
+    def test_trims_suppliers_to_budget(self):
+        suppliers = [_supplier(i) for i in range(50)]
+        generous = self._build({"default": {"prompt": 10000, "completion": 300}}, suppliers)
+        tight = self._build({"default": {"prompt": 120, "completion": 300}}, suppliers)
+
+        assert 1 <= tight["supplier_count"] < generous["supplier_count"]
+        assert tight["prompt_tokens"] <= 120 + estimate_tokens("id,поставщик")
+        assert f"SUP{tight['supplier_count']:03d}" not in tight["messages"][1]["content"]
+
+    def test_always_includes_at_least_one_supplier(self):
+        prompt = self._build({"default": {"prompt": 1, "completion": 300}}, [_supplier(1), _supplier(2)])
+        assert prompt["supplier_count"] == 1
+
+    def test_per_model_budget(self):
+        builder = PromptBuilder({
+            "default": {"prompt": 1000, "completion": 600},
+            "small": {"prompt": 500, "completion": 200}
+        })
+        assert builder.budget_for("small")["completion"] == 200
+        assert builder.budget_for("unknown")["completion"] == 600
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
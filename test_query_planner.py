@@ -0,0 +1,70 @@
+import pytest
+from database import ProductDatabase
+from query_planner import ProductNameIndex, normalize_term, split_terms, plan_query, product_name_index
+
+
+class TestNormalization:
+    def test_normalize_term(self):
+        assert normalize_term("  Беспроводные   НАУШНИКИ! ") == "беспроводные наушники"
+        assert normalize_term("«Ёлка»") == "елка"
+
+    def test_split_terms(self):
+        assert split_terms("рюкзак, смарт-часы;\nлампа,,") == ["рюкзак", "смарт-часы", "лампа"]
+
+
+class TestProductNameIndex:
+    @pytest.mark.parametrize("term", [
+        "наушники", "часы", "bluetooth", "рюкзак", "коврик", "лампа", "ка", "несуществующий товар"
+    ])
+    def test_lookup_matches_linear_scan(self, term):
+        expected = ProductDatabase.find_product_by_name(term)
+        match = product_name_index().lookup(normalize_term(term))
+
+        assert (match["id"] if match else None) == (expected.id if expected else None)
+
+    def test_every_product_name_resolves(self):
+        index = product_name_index()
+        for product in ProductDatabase.PRODUCTS_DATA:
+            assert index.lookup(normalize_term(product["name"]))["id"] == product["id"]
+
+    def test_candidates_prune_by_ngrams(self):
+        index = ProductNameIndex([
+            {"id": "A", "name": "Лампа", "full_name": "Настольная лампа"},
+            {"id": "B", "name": "Рюкзак", "full_name": "Городской рюкзак"}
+        ])
+        assert index.candidates("рюкз") == 0b10
+        assert index.candidates("zz") == 0b11
+        assert index.lookup("лампа")["id"] == "A"
+
+
+class TestPlanQuery:
+    def test_overlapping_terms_are_deduplicated(self):
+        plan = plan_query("наушники, беспроводные наушники, Наушники")
+
+        assert len(plan.products) == 1
+        product = plan.products[0]
+        assert plan.terms_for(product.id) == ["наушники", "беспроводные наушники", "Наушники"]
+        assert plan.not_found == []
+
+    def test_reports_unknown_terms(self):
+        plan = plan_query("рюкзак, телепорт")
+
+        assert [product.name for product in plan.products] == ["Рюкзак"]
+        assert plan.not_found == ["телепорт"]
+        assert plan.term_products["телепорт"] is None
+
+    def test_limits_unique_products(self):
+        names = [product["name"] for product in ProductDatabase.PRODUCTS_DATA[:4]]
+        plan = plan_query(", ".join(names + names), max_products=3)
+
+        assert [product.name for product in plan.products] == names[:3]
+        assert plan.skipped == [names[3]]
+
+    def test_limits_terms(self):
+        plan = plan_query(", ".join(["рюкзак"] * 50), max_terms=5)
+        assert len(plan.terms) == 5
+        assert len(plan.products) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
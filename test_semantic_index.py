@@ -0,0 +1,142 @@
+import os
+import tempfile
+import time
+import pytest
+import numpy as np
+from database import ProductDatabase
+from query_planner import plan_query
+from config import Config
+from semantic_index import SemanticIndex, embed, product_texts, semantic_index, shares_stem
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SemanticIndex(ProductDatabase.PRODUCTS_DATA)
+
+
+class TestEmbed:
+    def test_vectors_are_normalized(self):
+        vectors = embed(["powerbank", "Портативный аккумулятор", ""], 64)
+
+        assert vectors.shape == (3, 64)
+        assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+        assert np.linalg.norm(vectors[2]) == 0.0
+
+    def test_embedding_is_stable_and_case_insensitive(self):
+        first, second = embed(["Рюкзак для ноутбука", "рюкзак  ДЛЯ ноутбука"], 128)
+
+        assert np.allclose(first, second)
+
+    def test_product_texts_include_aliases(self):
+        texts = product_texts({"name": "A", "full_name": "B", "aliases": ["C"]})
+
+        assert texts == ["A", "B", "C"]
+
+
+class TestSemanticIndex:
+    @pytest.mark.parametrize("query, product_id", [
+        ("powerbank", "PROD006"),
+        ("пауэр банк", "PROD006"),
+        ("коврик для йоги", "PROD003"),
+        ("умные часики", "PROD002"),
+        ("колонка jbl", "PROD008"),
+        ("термос 1л", "PROD005"),
+        ("наушник", "PROD001")
+    ])
+    def test_matches_synonyms(self, index, query, product_id):
+        product, score = index.match(query)
+
+        assert product["id"] == product_id
+        assert score >= Config.SEMANTIC_MIN_SCORE
+
+    @pytest.mark.parametrize("query", ["телепорт", "холодильник", "кофе", "iphone 15", "iphone", "ноутбук"])
+    def test_rejects_unrelated_terms(self, index, query):
+        assert index.match(query) is None
+
+    @pytest.mark.parametrize("query, product_id", [
+        ("чехол", "PROD007"),
+        ("трекер", "PROD009"),
+        ("ноутбук", None),
+        ("iphone", None),
+        ("холодильник", None)
+    ])
+    def test_near_misses_are_settled_by_shared_stems(self, index, query, product_id):
+        product, score = index.search(query, k=1)[0]
+        match = index.match(query)
+
+        assert Config.SEMANTIC_MIN_SCORE <= score < 0.6
+        assert (match[0]["id"] if match else None) == product_id
+
+    def test_modifier_only_matches_need_a_modifier_in_the_query(self):
+        backpack = next(product for product in ProductDatabase.PRODUCTS_DATA if product["id"] == "PROD010")
+
+        assert not shares_stem("ноутбук", backpack)
+        assert shares_stem("сумка для ноутбука", backpack)
+        assert shares_stem("рюкзаки", backpack)
+
+    def test_search_returns_unique_products_by_score(self, index):
+        results = index.search("портативный", k=3)
+        scores = [score for _, score in results]
+
+        assert len({product["id"] for product, _ in results}) == 3
+        assert scores == sorted(scores, reverse=True)
+
+    def test_persists_memory_mapped_matrix(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "index.npy")
+            built = SemanticIndex(ProductDatabase.PRODUCTS_DATA, path)
+            loaded = SemanticIndex(ProductDatabase.PRODUCTS_DATA, path)
+
+            assert isinstance(loaded.vectors, np.memmap)
+            assert np.array_equal(built.vectors, loaded.vectors)
+
+            changed = SemanticIndex(ProductDatabase.PRODUCTS_DATA[:3], path)
+            assert changed.vectors.shape[0] == len(changed.row_products)
+            del built, loaded, changed
+
+    def test_search_latency_over_100k_rows(self):
+        rows = 100_000
+        large = SemanticIndex([])
+        large.products = [{"id": f"P{row}"} for row in range(rows)]
+        large.row_products = np.arange(rows)
+        large.vectors = embed([f"товар {row % 1000}" for row in range(rows)], large.dimensions)
+
+        large.search("товар 5", k=5)
+        started = time.perf_counter()
+        for _ in range(10):
+            results = large.search("товар 5", k=5)
+        elapsed = (time.perf_counter() - started) / 10
+
+        assert results[0][1] == pytest.approx(1.0)
+        assert elapsed < 0.1
+
+
+class TestPlanQuerySemantic:
+    @pytest.fixture(autouse=True)
+    def temp_index_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "SEMANTIC_INDEX_PATH", str(tmp_path / "index.npy"))
+        semantic_index.cache_clear()
+        yield
+        semantic_index.cache_clear()
+
+    def test_exact_index_is_tried_first(self):
+        plan = plan_query("рюкзак, powerbank", semantic=True)
+
+        assert [product.id for product in plan.products] == ["PROD010", "PROD006"]
+        assert plan.semantic == {"powerbank": pytest.approx(1.0)}
+
+    def test_semantic_can_be_disabled(self):
+        plan = plan_query("powerbank", semantic=False)
+
+        assert plan.products == []
+        assert plan.not_found == ["powerbank"]
+
+    def test_unmatched_terms_stay_not_found(self):
+        plan = plan_query("коврик для йоги, телепорт", semantic=True)
+
+        assert [product.id for product in plan.products] == ["PROD003"]
+        assert plan.not_found == ["телепорт"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
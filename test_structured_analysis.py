@@ -0,0 +1,152 @@
+import json
+import pytest
+from config import Config
+from database import ProductDatabase
+from supplier_ranking import supplier_ranker
+from supplier_stats import statistics_engine
+from structured_analysis import (
+    AnalysisFormatError,
+    parse_analysis,
+    render_markdown,
+    render_text,
+    rule_based_analysis,
+    escape_markdown,
+    sheet_rows,
+    SHEET_HEADER
+)
+
+
+def _answer(suppliers, **overrides):
+    pick = lambda supplier: {"supplier_id": supplier["id"], "reason": f"Причина {supplier['id']}"}
+    answer = {
+        "best_pick": pick(suppliers[0]),
+        "budget": pick(suppliers[-1]),
+        "premium": pick(suppliers[1]),
+        "risks": ["Долгая доставка", "Высокий MOQ"],
+        "recommendation": {"supplier_id": suppliers[0]["id"], "text": "Заказать образцы"}
+    }
+    answer.update(overrides)
+    return answer
+
+
+class TestParseAnalysis:
+    def setup_method(self):
+        product = ProductDatabase.find_product_by_name("Беспроводные наушники")
+        self.suppliers = supplier_ranker.top_k(
+            ProductDatabase.generate_supplier_prices(product, Config), Config.MAX_SUPPLIERS_PER_PRODUCT
+        )
+
+    def test_resolves_supplier_ids(self):
+        structured = parse_analysis(json.dumps(_answer(self.suppliers)), self.suppliers)
+
+        best = structured["best_pick"]
+        assert best["supplier_id"] == self.suppliers[0]["id"]
+        assert best["supplier"] == self.suppliers[0]["name"]
+        assert best["price_usd"] == self.suppliers[0]["final_price_usd"]
+        assert structured["recommendation"]["text"] == "Заказать образцы"
+        assert structured["risks"] == ["Долгая доставка", "Высокий MOQ"]
+
+    def test_accepts_fenced_json(self):
+        content = "```json\n" + json.dumps(_answer(self.suppliers), ensure_ascii=False) + "\n```"
+
+        assert parse_analysis(content, self.suppliers)["budget"]["supplier_id"] == self.suppliers[-1]["id"]
+
+    @pytest.mark.parametrize("content", [
+        "Лучший выбор: первый поставщик",
+        "{not json}",
+        json.dumps({"best_pick": {"supplier_id": "SUP001", "reason": "x"}}),
+        json.dumps({"risks": "строка вместо списка"})
+    ])
+    def test_rejects_malformed_answers(self, content):
+        with pytest.raises(AnalysisFormatError):
+            parse_analysis(content, self.suppliers)
+
+    def test_rejects_unknown_suppliers(self):
+        answer = _answer(self.suppliers, premium={"supplier_id": "SUP999", "reason": "x"})
+
+        with pytest.raises(AnalysisFormatError, match="SUP999"):
+            parse_analysis(json.dumps(answer), self.suppliers)
+
+    def test_rejects_too_many_risks(self):
+        answer = _answer(self.suppliers, risks=[f"риск {index}" for index in range(10)])
+
+        with pytest.raises(AnalysisFormatError):
+            parse_analysis(json.dumps(answer), self.suppliers)
+
+
+class TestRuleBasedAnalysis:
+    def setup_method(self):
+        product = ProductDatabase.find_product_by_name("Беспроводные наушники")
+        self.suppliers = ProductDatabase.generate_supplier_prices(product, Config)
+        self.statistics = statistics_engine.calculate(self.suppliers)
+        self.top = supplier_ranker.top_k(self.suppliers, Config.MAX_SUPPLIERS_PER_PRODUCT)
+
+    def test_picks_follow_statistics(self):
+        structured = rule_based_analysis(self.suppliers, self.statistics, self.top)
+
+        assert structured["budget"]["supplier"] == self.statistics["best_supplier"]
+        assert structured["best_pick"]["supplier"] == self.statistics["best_value_supplier"]
+        assert structured["recommendation"]["supplier_id"] == self.top[0]["id"]
+        assert structured["premium"]["rating"] == max(supplier["rating"] for supplier in self.top)
+        assert render_text(structured)
+
+    def test_without_suppliers(self):
+        assert rule_based_analysis([], {"total_suppliers_analyzed": 0}, []) is None
+
+
+class TestRenderers:
+    def setup_method(self):
+        product = ProductDatabase.find_product_by_name("Беспроводные наушники")
+        suppliers = ProductDatabase.generate_supplier_prices(product, Config)[:3]
+        # round-trip through JSON like the analysis cache and job store do
+        self.structured = json.loads(json.dumps(parse_analysis(json.dumps(_answer(suppliers)), suppliers)))
+        self.analysis = {"product_name": product.name, "analysis": "", "structured": self.structured}
+
+    def test_markdown_and_text(self):
+        markdown = render_markdown(self.structured)
+        text = render_text(self.structured)
+
+        assert "**🏆 Лучший выбор:**" in markdown
+        assert "**" not in text
+        assert self.structured["best_pick"]["supplier"] in text
+        assert "• Долгая доставка" in text
+
+    def test_markdown_escapes_model_text(self):
+        self.structured["best_pick"]["reason"] = "MOQ_min *50* шт, см. `spec`"
+        self.structured["risks"] = ["[срок] 30_дней"]
+        self.structured["recommendation"]["supplier"] = "Shenzhen_Tech*"
+
+        markdown = render_markdown(self.structured)
+
+        assert "MOQ\\_min \\*50\\* шт, см. \\`spec\\`" in markdown
+        assert "• \\[срок] 30\\_дней" in markdown
+        assert "Shenzhen\\_Tech\\*" in markdown
+        assert "MOQ_min *50* шт" in render_text(self.structured)
+
+    def test_escape_markdown(self):
+        assert escape_markdown("a_b*c`d[e]") == "a\\_b\\*c\\`d\\[e]"
+
+    def test_english_labels(self):
+        assert "Best pick" in render_text(self.structured, language="en")
+
+    def test_no_risks(self):
+        self.structured["risks"] = []
+
+        assert "⚠️ Риски: не выявлены" in render_text(self.structured)
+
+    def test_sheet_rows(self):
+        rows = sheet_rows(self.analysis)
+
+        assert all(len(row) == len(SHEET_HEADER) for row in rows)
+        assert [row[1] for row in rows] == [
+            "Лучший выбор", "Бюджетный вариант", "Премиум вариант", "Риски", "Риски", "Рекомендация"
+        ]
+
+    def test_sheet_rows_for_free_text(self):
+        rows = sheet_rows({"product_name": "Товар", "analysis": "Анализ не удался."})
+
+        assert rows == [["Товар", "", "", "", None, None, "Анализ не удался."]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from database import ProductDatabase
+from supplier_ranking import SupplierRanker, select_top_k
+from config import Config
+
+
+def _supplier(name: str, price: float, rating: float = 4.5,
+              lead_time: str = "7-14 days", moq: float = 500) -> dict:
+    return {
+        "name": name,
+        "final_price_usd": price,
+        "rating": rating,
+        "lead_time": lead_time,
+        "moq": moq
+    }
+
+
+class TestSelectTopK:
+    def test_smallest_sorted(self):
+        values = np.array([5.0, 1.0, 4.0, 2.0, 3.0])
+        assert list(select_top_k(values, 3)) == [1, 3, 4]
+
+    def test_largest_sorted(self):
+        values = np.array([5.0, 1.0, 4.0, 2.0, 3.0])
+        assert list(select_top_k(values, 2, largest=True)) == [0, 2]
+
+    def test_k_larger_than_input(self):
+        values = np.array([2.0, 1.0])
+        assert list(select_top_k(values, 5)) == [1, 0]
+
+    def test_empty(self):
+        assert len(select_top_k(np.array([]), 3)) == 0
+
+
+class TestSupplierRanker:
+    def test_price_only_weights(self):
+        ranker = SupplierRanker({"price": 1.0})
+        suppliers = [_supplier("A", 30.0), _supplier("B", 10.0), _supplier("C", 20.0)]
+        top = ranker.top_k(suppliers, 2)
+        assert [s["name"] for s in top] == ["B", "C"]
+
+    def test_rating_breaks_price_tie(self):
+        ranker = SupplierRanker({"price": 0.5, "rating": 0.5})
+        suppliers = [_supplier("A", 10.0, rating=4.0), _supplier("B", 10.0, rating=4.9)]
+        assert ranker.top_k(suppliers, 1)[0]["name"] == "B"
+
+    def test_lead_time_and_moq_criteria(self):
+        ranker = SupplierRanker({"lead_time": 1.0, "moq": 1.0})
+        suppliers = [
+            _supplier("Slow", 10.0, lead_time="15-20 days", moq=1000),
+            _supplier("Fast", 10.0, lead_time="3-5 days", moq=200),
+        ]
+        assert ranker.top_k(suppliers, 1)[0]["name"] == "Fast"
+
+    def test_top_k_does_not_mutate_input(self):
+        suppliers = [_supplier("A", 10.0)]
+        SupplierRanker().top_k(suppliers, 1)
+        assert "score" not in suppliers[0]
+
+    def test_generated_prices(self):
+        product = ProductDatabase.find_product_by_name("Рюкзак")
+        suppliers = ProductDatabase.generate_supplier_prices(product, Config)
+        top = SupplierRanker().top_k(suppliers, Config.MAX_SUPPLIERS_PER_PRODUCT)
+
+        assert len(top) == Config.MAX_SUPPLIERS_PER_PRODUCT
+        scores = [s["score"] for s in top]
+        assert scores == sorted(scores, reverse=True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,81 @@
+import math
+import pytest
+from database import ProductDatabase
+from supplier_stats import SupplierStatisticsEngine, parse_lead_time_days
+from config import Config
+
+
+def _supplier(name: str, price: float, rating: float, lead_time: str = "7-14 days") -> dict:
+    return {"name": name, "final_price_usd": price, "rating": rating, "lead_time": lead_time}
+
+
+class TestParseLeadTime:
+    def test_range(self):
+        assert parse_lead_time_days("7-14 days") == (7.0, 14.0)
+
+    def test_single_value(self):
+        assert parse_lead_time_days("5 days") == (5.0, 5.0)
+
+    def test_unparseable(self):
+        min_days, max_days = parse_lead_time_days("по запросу")
+        assert math.isnan(min_days) and math.isnan(max_days)
+
+
+class TestSupplierStatisticsEngine:
+    def test_empty_suppliers(self):
+        stats = SupplierStatisticsEngine().calculate([])
+        assert stats == {"total_suppliers_analyzed": 0}
+
+    def test_average_rating_with_fewer_suppliers_than_top_n(self):
+        suppliers = [_supplier("A", 10.0, 4.0), _supplier("B", 20.0, 5.0)]
+        stats = SupplierStatisticsEngine(top_n=5).calculate(suppliers)
+        assert stats["average_rating"] == pytest.approx(4.5)
+
+    def test_average_rating_uses_cheapest_top_n(self):
+        suppliers = [
+            _supplier("A", 30.0, 1.0),
+            _supplier("B", 10.0, 4.0),
+            _supplier("C", 20.0, 5.0),
+        ]
+        stats = SupplierStatisticsEngine(top_n=2).calculate(suppliers)
+        assert stats["average_rating"] == pytest.approx(4.5)
+        assert stats["overall_average_rating"] == pytest.approx(10.0 / 3, rel=1e-2)
+
+    def test_price_statistics(self):
+        suppliers = [
+            _supplier("A", 30.0, 4.0, "3-5 days"),
+            _supplier("B", 10.0, 4.0, "14-21 days"),
+            _supplier("C", 20.0, 4.0, "7-10 days"),
+        ]
+        stats = SupplierStatisticsEngine().calculate(suppliers)
+
+        assert stats["best_supplier"] == "B"
+        assert stats["best_supplier_index"] == 1
+        assert stats["best_price_usd"] == 10.0
+        assert stats["worst_supplier"] == "A"
+        assert stats["median_price_usd"] == 20.0
+        assert stats["mean_price_usd"] == 20.0
+        assert stats["price_range_usd"] == "$10.00 - $30.00"
+        assert stats["price_percentiles_usd"][50] == 20.0
+        assert stats["min_lead_time_days"] == 3.0
+        assert stats["max_lead_time_days"] == 21.0
+        assert stats["fastest_supplier"] == "A"
+
+    def test_rating_weighted_statistics(self):
+        suppliers = [_supplier("A", 10.0, 1.0), _supplier("B", 20.0, 3.0)]
+        stats = SupplierStatisticsEngine().calculate(suppliers)
+        assert stats["rating_weighted_price_usd"] == pytest.approx(17.5)
+        assert stats["best_value_supplier"] == "B"
+
+    def test_generated_prices(self):
+        product = ProductDatabase.find_product_by_name("Смарт-часы")
+        suppliers = ProductDatabase.generate_supplier_prices(product, Config)
+        stats = SupplierStatisticsEngine().calculate(suppliers)
+
+        assert stats["total_suppliers_analyzed"] == len(suppliers)
+        assert stats["best_price_usd"] == min(s["final_price_usd"] for s in suppliers)
+        assert stats["min_price_usd"] <= stats["median_price_usd"] <= stats["max_price_usd"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import pytest
+from config import Config
+from user_settings import UserSettings, UserSettingsStore, parse_setting, DAY_SECONDS
+
+
+class FakeClock:
+    def __init__(self, now: float = 10 * DAY_SECONDS):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestParseSetting:
+    def test_valid_values(self):
+        assert parse_setting("currency", " usd ") == "USD"
+        assert parse_setting("max_suppliers", "3") == 3
+        assert parse_setting("report_format", "TEXT") == "text"
+        assert parse_setting("daily_tokens", "0") == 0
+
+    @pytest.mark.parametrize("name, value", [
+        ("currency", "XYZ"),
+        ("max_suppliers", "0"),
+        ("max_suppliers", str(Config.MAX_USER_SUPPLIERS + 1)),
+        ("report_format", "pdf"),
+        ("daily_requests", "-1"),
+        ("color", "red")
+    ])
+    def test_invalid_values(self, name, value):
+        with pytest.raises(ValueError):
+            parse_setting(name, value)
+
+
+class TestUserSettingsStore:
+    def setup_method(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "state.sqlite3")
+        self.clock = FakeClock()
+        self.store = UserSettingsStore(self.path, cache_size=2, cache_ttl_seconds=60, clock=self.clock)
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_defaults_come_from_config(self):
+        settings = self.store.get(1)
+
+        assert settings.to_dict() == UserSettings(None).to_dict()
+        assert settings.currency == Config.REPORT_CURRENCY
+        assert settings.max_suppliers == Config.MAX_SUPPLIERS_PER_PRODUCT
+
+    def test_update_persists_and_refreshes_cache(self):
+        self.store.get(1)
+        self.store.update(1, currency="USD", max_suppliers=3)
+        updated = self.store.update(1, report_format="text")
+
+        assert (updated.currency, updated.max_suppliers, updated.report_format) == ("USD", 3, "text")
+
+        other = UserSettingsStore(self.path)
+        assert other.get(1).to_dict() == updated.to_dict()
+        other.close()
+
+        with pytest.raises(ValueError):
+            self.store.update(1, color="red")
+
+    def test_lookups_are_served_from_lru(self):
+        self.store.get(1)
+        self.store.get(2)
+        self.store.get(1)
+        self.store.get(3)
+        assert (self.store.hits, self.store.misses) == (1, 3)
+
+        self.store.get(1)
+        self.store.get(2)
+        assert (self.store.hits, self.store.misses) == (2, 4)
+
+        self.clock.now += 60
+        self.store.get(2)
+        assert self.store.misses == 5
+
+    def test_daily_request_quota(self):
+        self.store.update(1, daily_requests=2)
+
+        assert self.store.consume_request(1)
+        assert self.store.consume_request(1)
+        assert not self.store.consume_request(1)
+        assert self.store.usage(1)["requests"] == 2
+        assert self.store.consume_request(2)
+
+        self.clock.now += DAY_SECONDS
+        assert self.store.consume_request(1)
+
+    def test_token_quota(self):
+        self.store.update(1, daily_tokens=1000)
+
+        self.store.add_tokens(1, 400)
+        self.store.add_tokens(1, 500)
+        assert self.store.usage(1)["tokens"] == 900
+        assert self.store.tokens_left(1) == 100
+
+        self.store.add_tokens(1, 500)
+        assert self.store.tokens_left(1) == 0
+
+        self.clock.now += DAY_SECONDS
+        assert self.store.tokens_left(1) == 1000
+
+    def test_anonymous_users_are_not_limited(self):
+        assert self.store.consume_request(None)
+        assert self.store.get(None).user_id is None
+        assert self.store.usage(None) == {"requests": 0, "tokens": 0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
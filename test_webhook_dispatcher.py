@@ -0,0 +1,101 @@
+import asyncio
+import json
+import queue
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+import pytest
+from webhook_dispatcher import (
+    WebhookDispatcher, ChatOrderedUpdateProcessor, update_chat_id, worker_for_chat, SECRET_TOKEN_HEADER
+)
+
+
+def _message(chat_id: int, text: str = "рюкзак") -> dict:
+    return {"update_id": 1, "message": {"message_id": 1, "chat": {"id": chat_id}, "text": text}}
+
+
+def _post(url: str, body: bytes, headers: dict = None) -> int:
+    request = urllib.request.Request(url, data=body, headers=headers or {}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+class TestRouting:
+    def test_update_chat_id(self):
+        assert update_chat_id(_message(42)) == 42
+        assert update_chat_id({"update_id": 1, "callback_query": {
+            "from": {"id": 7}, "message": {"chat": {"id": -100}}
+        }}) == -100
+        assert update_chat_id({"update_id": 1, "inline_query": {"from": {"id": 7}}}) == 7
+        assert update_chat_id({"update_id": 1}) == 0
+
+    def test_worker_for_chat_is_stable(self):
+        assert worker_for_chat(42, 4) == worker_for_chat(42, 4) == 2
+        assert 0 <= worker_for_chat(-1001234567, 3) < 3
+
+
+class TestWebhookDispatcher:
+    def setup_method(self):
+        self.queues = [queue.Queue(), queue.Queue()]
+        self.dispatcher = WebhookDispatcher(self.queues, "/telegram", secret_token="secret").start()
+
+    def teardown_method(self):
+        self.dispatcher.stop()
+
+    def _post_update(self, update: dict, secret: str = "secret") -> int:
+        return _post(
+            self.dispatcher.url,
+            json.dumps(update).encode("utf-8"),
+            {SECRET_TOKEN_HEADER: secret, "Content-Type": "application/json"}
+        )
+
+    def test_routes_chat_to_same_worker(self):
+        for chat_id in (10, 11, 10, 10):
+            assert self._post_update(_message(chat_id)) == 200
+
+        assert self.dispatcher.routed == [3, 1]
+        assert [self.queues[0].get_nowait()["message"]["chat"]["id"] for _ in range(3)] == [10, 10, 10]
+        assert self.queues[1].get_nowait()["message"]["chat"]["id"] == 11
+
+    def test_rejects_wrong_secret(self):
+        assert self._post_update(_message(10), secret="wrong") == 403
+        assert self.queues[0].empty()
+
+    def test_rejects_bad_requests(self):
+        assert _post(self.dispatcher.url.replace("/telegram", "/other"), b"{}") == 404
+        assert _post(self.dispatcher.url, b"not json", {SECRET_TOKEN_HEADER: "secret"}) == 400
+
+
+class TestChatOrderedUpdateProcessor:
+    def test_orders_per_chat_and_runs_chats_concurrently(self):
+        events = []
+
+        async def handle(name: str, delay: float):
+            events.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            events.append(f"{name}:end")
+
+        def update(chat_id: int):
+            return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id))
+
+        async def run():
+            processor = ChatOrderedUpdateProcessor(8)
+            await asyncio.gather(
+                processor.process_update(update(1), handle("a1", 0.05)),
+                processor.process_update(update(1), handle("a2", 0.0)),
+                processor.process_update(update(2), handle("b1", 0.0))
+            )
+            return processor
+
+        processor = asyncio.run(run())
+
+        assert events.index("a1:end") < events.index("a2:start")
+        assert events.index("b1:end") < events.index("a1:end")
+        assert not processor._chat_locks
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+from config import Config
+from config_reload import on_config_change
+from job_store import connect, immediate_transaction
+
+DAY_SECONDS = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_settings (
+    user_id INTEGER PRIMARY KEY,
+    currency TEXT,
+    max_suppliers INTEGER,
+    report_format TEXT,
+    daily_requests INTEGER,
+    daily_tokens INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_usage (
+    user_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+"""
+
+SETTING_FIELDS = ("currency", "max_suppliers", "report_format", "daily_requests", "daily_tokens")
+
+
+class UserSettings:
+    def __init__(
+        self,
+        user_id: Optional[int],
+        currency: Optional[str] = None,
+        max_suppliers: Optional[int] = None,
+        report_format: Optional[str] = None,
+        daily_requests: Optional[int] = None,
+        daily_tokens: Optional[int] = None
+    ):
+        self.user_id = user_id
+        self.currency = (currency or Config.REPORT_CURRENCY).upper()
+        self.max_suppliers = max_suppliers or Config.MAX_SUPPLIERS_PER_PRODUCT
+        self.report_format = report_format or Config.DEFAULT_REPORT_FORMAT
+        self.daily_requests = daily_requests if daily_requests is not None else Config.DAILY_REQUEST_QUOTA
+        self.daily_tokens = daily_tokens if daily_tokens is not None else Config.DAILY_TOKEN_QUOTA
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in SETTING_FIELDS}
+
+
+def parse_setting(name: str, value: str) -> Any:
+    if name == "currency":
+        from fx import fx_table
+
+        currency = value.strip().upper()
+        fx_table.rate(currency)
+        return currency
+
+    if name == "max_suppliers":
+        count = int(value)
+        if not 1 <= count <= Config.MAX_USER_SUPPLIERS:
+            raise ValueError(f"max_suppliers must be between 1 and {Config.MAX_USER_SUPPLIERS}")
+        return count
+
+    if name == "report_format":
+        report_format = value.strip().lower()
+        if report_format not in Config.REPORT_FORMATS:
+            raise ValueError(f"report_format must be one of {', '.join(Config.REPORT_FORMATS)}")
+        return report_format
+
+    if name in ("daily_requests", "daily_tokens"):
+        quota = int(value)
+        if quota < 0:
+            raise ValueError(f"{name} must not be negative")
+        return quota
+
+    raise ValueError(f"Unknown setting: {name}")
+
+
+class UserSettingsStore:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        cache_ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path or Config.STATE_DB_PATH
+        self.cache_size = cache_size or Config.USER_SETTINGS_CACHE_SIZE
+        self.cache_ttl_seconds = cache_ttl_seconds or Config.USER_SETTINGS_CACHE_TTL_SECONDS
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[int, Tuple[float, UserSettings]]" = OrderedDict()
+        self._connection = connect(self.path)
+        self._lock = threading.Lock()
+        self._connection.executescript(SCHEMA)
+
+    def _day(self) -> int:
+        return int(self.clock() // DAY_SECONDS)
+
+    def get(self, user_id: Optional[int]) -> UserSettings:
+        if user_id is None:
+            return UserSettings(None)
+
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] > self.clock():
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return cached[1]
+
+            self.misses += 1
+            row = self._connection.execute(
+                "SELECT * FROM user_settings WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            settings = UserSettings(user_id, **{field: row[field] for field in SETTING_FIELDS} if row else {})
+
+            self._cache[user_id] = (self.clock() + self.cache_ttl_seconds, settings)
+            self._cache.move_to_end(user_id)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return settings
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def update(self, user_id: int, **changes: Any) -> UserSettings:
+        unknown = set(changes) - set(SETTING_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown setting: {', '.join(sorted(unknown))}")
+
+        columns = list(changes)
+        with self._lock:
+            self._connection.execute(
+                f"INSERT INTO user_settings (user_id, {', '.join(columns)}, updated_at) "
+                f"VALUES (?, {', '.join('?' for _ in columns)}, ?) "
+                f"ON CONFLICT (user_id) DO UPDATE SET "
+                f"{', '.join(f'{column} = excluded.{column}' for column in columns)}, "
+                f"updated_at = excluded.updated_at",
+                (user_id, *changes.values(), self.clock())
+            )
+            self._cache.pop(user_id, None)
+        return self.get(user_id)
+
+    def usage(self, user_id: Optional[int]) -> Dict[str, int]:
+        if user_id is None:
+            return {"requests": 0, "tokens": 0}
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT requests, tokens FROM user_usage WHERE user_id = ? AND day = ?",
+                (user_id, self._day())
+            ).fetchone()
+        return {"requests": row["requests"], "tokens": row["tokens"]} if row else {"requests": 0, "tokens": 0}
+
+    def consume_request(self, user_id: Optional[int], settings: Optional[UserSettings] = None) -> bool:
+        if user_id is None:
+            return True
+
+        settings = settings or self.get(user_id)
+        day = self._day()
+        with self._lock, immediate_transaction(self._connection):
+            row = self._connection.execute(
+                "SELECT requests FROM user_usage WHERE user_id = ? AND day = ?", (user_id, day)
+            ).fetchone()
+            if row and row["requests"] >= settings.daily_requests:
+                return False
+            self._connection.execute(
+                "INSERT INTO user_usage (user_id, day, requests) VALUES (?, ?, 1) "
+                "ON CONFLICT (user_id, day) DO UPDATE SET requests = requests + 1",
+                (user_id, day)
+            )
+        return True
+
+    def add_tokens(self, user_id: Optional[int], tokens: int):
+        if user_id is None or tokens <= 0:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO user_usage (user_id, day, tokens) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, day) DO UPDATE SET tokens = tokens + excluded.tokens",
+                (user_id, self._day(), tokens)
+            )
+
+    def tokens_left(self, user_id: Optional[int], settings: Optional[UserSettings] = None) -> int:
+        settings = settings or self.get(user_id)
+        return max(0, settings.daily_tokens - self.usage(user_id)["tokens"])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_user_settings_store: Optional[UserSettingsStore] = None
+
+
+def get_user_settings_store() -> UserSettingsStore:
+    global _user_settings_store
+    if _user_settings_store is None:
+        _user_settings_store = UserSettingsStore()
+    return _user_settings_store
+
+
+@on_config_change(
+    "REPORT_CURRENCY",
+    "MAX_SUPPLIERS_PER_PRODUCT",
+    "DEFAULT_REPORT_FORMAT",
+    "DAILY_REQUEST_QUOTA",
+    "DAILY_TOKEN_QUOTA",
+    "USER_SETTINGS_CACHE_SIZE",
+    "USER_SETTINGS_CACHE_TTL_SECONDS"
+)
+def _reload_user_settings(changed):
+    if _user_settings_store is None:
+        return
+    _user_settings_store.cache_size = Config.USER_SETTINGS_CACHE_SIZE
+    _user_settings_store.cache_ttl_seconds = Config.USER_SETTINGS_CACHE_TTL_SECONDS
+    _user_settings_store.clear_cache()
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def update_chat_id(update: Dict[str, Any]) -> int:
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        if "chat" in value:
+            return value["chat"]["id"]
+        if isinstance(value.get("message"), dict) and "chat" in value["message"]:
+            return value["message"]["chat"]["id"]
+        if "from" in value:
+            return value["from"]["id"]
+    return 0
+
+
+def worker_for_chat(chat_id: int, workers: int) -> int:
+    return chat_id % workers
+
+
+class WebhookDispatcher:
+    def __init__(
+        self,
+        queues: List[Any],
+        path: str,
+        secret_token: Optional[str] = None,
+        listen: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.queues = queues
+        self.path = path
+        self.secret_token = secret_token
+        self.listen = listen
+        self.port = port
+        self.routed = [0] * len(queues)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def dispatch(self, update: Dict[str, Any]) -> int:
+        worker = worker_for_chat(update_chat_id(update), len(self.queues))
+        self.queues[worker].put(update)
+        self.routed[worker] += 1
+        return worker
+
+    def _create_server(self) -> ThreadingHTTPServer:
+        dispatcher = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if self.path != dispatcher.path:
+                    self.send_response(404)
+                elif dispatcher.secret_token and self.headers.get(SECRET_TOKEN_HEADER) != dispatcher.secret_token:
+                    self.send_response(403)
+                else:
+                    try:
+                        update = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    except ValueError:
+                        self.send_response(400)
+                    else:
+                        dispatcher.dispatch(update)
+                        self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        server = ThreadingHTTPServer((self.listen, self.port), Handler)
+        server.daemon_threads = True
+        return server
+
+    def start(self) -> "WebhookDispatcher":
+        self._server = self._create_server()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server = self._create_server()
+        logger.info("Webhook dispatcher listening on %s for %s workers", self.url, len(self.queues))
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "WebhookDispatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks = defaultdict(asyncio.Lock)
+        self._pending = defaultdict(int)
+
+    async def do_process_update(self, update: object, coroutine):
+        chat = getattr(update, "effective_chat", None)
+        if chat is None:
+            await coroutine
+            return
+
+        self._pending[chat.id] += 1
+        try:
+            async with self._chat_locks[chat.id]:
+                await coroutine
+        finally:
+            self._pending[chat.id] -= 1
+            if not self._pending[chat.id]:
+                del self._pending[chat.id]
+                del self._chat_locks[chat.id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass